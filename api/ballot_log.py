@@ -0,0 +1,219 @@
+"""
+Write-ahead ballot log
+
+Every answer event of the chat vote flow is appended to a JSON-lines file
+before the room state changes, so a restarted worker can restore voters
+who were in the middle of a survey. Completed ballots are logged (with
+their idempotency key) before they are queued in the outbox; on startup
+any completed ballot the outbox never saw is queued again.
+
+Appends are a single buffered write of one line (no fsync): they survive
+a crash of the process, not of the machine. Every COMPACT_EVERY appends a
+background thread rewrites the file down to the open sessions,
+undelivered ballots and one slim "voted" event per chat voter, survey and
+day of the delivered ones, which is all the participation count needs;
+appends go on meanwhile and are carried over.
+
+Events:
+    {"op": "start",    "session", "code", "block", "question", "type"}
+    {"op": "question", "session", "block", "question", "type"}
+    {"op": "answer",   "session", "block", "question", "type", "answer"}
+    {"op": "complete", "session", "key", "code", "payload", "at"}
+    {"op": "cancel",   "session"}
+    {"op": "voted",    "session", "code", "at"}    (written by compaction)
+"""
+import json
+import os
+import threading
+import time
+import traceback
+
+from api.vote_runtime import compile_answer_check
+
+COMPACT_EVERY = 1000  # appends between compactions
+
+
+class BallotLog:
+    """Append-only log of answer events with in-memory replay state"""
+
+    def __init__(self, path, is_delivered=None, on_complete=None):
+        self.path = path
+        # key -> True once Vote2 accepted the ballot; lets compaction drop it
+        self.is_delivered = is_delivered or (lambda key: False)
+        # called as on_complete(code, session, at) for every completed ballot, replayed ones included
+        self.on_complete = on_complete
+        self.sessions = {}  # session -> {"room", "code", "pending", "answers", "types"}
+        self.completed = {}  # key -> {"session", "code", "payload"}
+        self.voters = {}  # (code, session, day) -> at, for delivered ballots compaction dropped
+        self._lock = threading.Lock()
+        self._appends = 0
+        self._compactor = None  # background compaction thread while one runs
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash mid-write
+                    self._apply(event)
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def start(self, session, code, block, question, q_type, room=None):
+        self._append({"op": "start", "session": session, "room": room or session, "code": code,
+                      "block": block, "question": question, "type": q_type})
+
+    def question(self, session, block, question, q_type):
+        self._append({"op": "question", "session": session, "block": block, "question": question, "type": q_type})
+
+    def answer(self, session, block, question, q_type, ans_list):
+        self._append({"op": "answer", "session": session, "block": block,
+                      "question": question, "type": q_type, "answer": ans_list})
+
+    def complete(self, session, key, code, payload):
+        self._append({"op": "complete", "session": session, "key": key, "code": code, "payload": payload,
+                      "at": time.time()})
+
+    def cancel(self, session):
+        if session in self.sessions:
+            self._append({"op": "cancel", "session": session})
+
+    def restore_rooms(self, rooms, load_structure=None):
+        """
+        Put every in-flight vote back into its room; returns the number
+        restored. With load_structure(code) -> blocks, the pending question's
+        answer check is compiled again, as when the question was asked.
+        """
+        for session, s in self.sessions.items():
+            state = rooms.setdefault(s["room"], {
+                "pending_create": None,
+                "last_survey_code": None,
+                "pending_vote_for_code": None,
+                "vote_block": None,
+                "vote_answer": {},
+            })
+            state["pending_confirmation"] = {"code": s["code"], **s["pending"]}
+            blocks = load_structure(s["code"]) if load_structure else None
+            block = (blocks or {}).get(s["pending"]["block"]) or {}
+            question = (block.get("questions") or {}).get(s["pending"]["question"])
+            if question:
+                state["vote_block"] = blocks
+                state["pending_confirmation"]["check"] = compile_answer_check(question, s["pending"]["type"])
+            state["vote_answers"] = dict(s["answers"])
+            state["question_types"] = dict(s["types"])
+            state["vote_session"] = session
+        return len(self.sessions)
+
+    def replay_unsent(self, outbox, include_failed=False):
+        """Queue completed ballots the outbox has no record of; returns how many"""
+        replayed = 0
+        for key, ballot in list(self.completed.items()):
+            status = outbox.key_status(key)
+            if status is None or (include_failed and status == "failed"):
+                outbox.enqueue(ballot["code"], ballot["payload"], dedupe_key=key)
+                replayed += 1
+        return replayed
+
+    def compact(self):
+        """
+        Rewrite the log with only open sessions and undelivered ballots.
+        The state is written and synced without holding the lock; events
+        appended meanwhile are copied over before the file is replaced.
+        """
+        with self._lock:
+            keys = list(self.completed)
+        delivered = [k for k in keys if self.is_delivered(k)]
+        with self._lock:
+            for key in delivered:
+                ballot = self.completed.pop(key, None)
+                if ballot is not None:
+                    self._add_voter(ballot["session"], ballot["code"], ballot["at"])
+            events = [{"op": "voted", "session": session, "code": code, "at": at}
+                      for (code, session, _), at in self.voters.items()]
+            for session, s in self.sessions.items():
+                events.append({"op": "start", "session": session, "room": s["room"], "code": s["code"], **s["pending"]})
+                for (block, question), ans_list in s["answers"].items():
+                    events.append({"op": "answer", "session": session, "block": block, "question": question,
+                                   "type": s["types"].get((block, question), ""), "answer": ans_list})
+            for key, ballot in self.completed.items():
+                events.append({"op": "complete", "key": key, **ballot})
+            self._file.flush()
+            written = os.path.getsize(self.path)  # the state above covers the log up to here
+            self._appends = 0
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write("".join(json.dumps(event) + "\n" for event in events).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            with self._lock:
+                self._file.flush()
+                with open(self.path, "rb") as old:
+                    old.seek(written)
+                    f.write(old.read())
+                f.flush()
+                self._file.close()
+                os.replace(tmp_path, self.path)
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+
+    def close(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._file.close()
+
+    def _append(self, event):
+        with self._lock:
+            self._file.write(json.dumps(event) + "\n")
+            self._apply(event)
+            self._appends += 1
+            if self._appends >= COMPACT_EVERY and self._compactor is None:
+                # off the request path: the chat request that hits the limit does not wait for the rewrite
+                self._compactor = threading.Thread(target=self._compact_in_background, name="ballot-log-compact",
+                                                   daemon=True)
+                self._compactor.start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._compactor = None
+
+    def _apply(self, event):
+        op = event.get("op")
+        session = event.get("session")
+        if op == "start":
+            self.sessions[session] = {
+                "room": event.get("room") or session,  # logs written before sessions were per voter
+                "code": event["code"],
+                "pending": {"block": event["block"], "question": event["question"], "type": event["type"]},
+                "answers": {},
+                "types": {},
+            }
+        elif op in ("question", "answer") and session in self.sessions:
+            s = self.sessions[session]
+            if op == "question":
+                s["pending"] = {"block": event["block"], "question": event["question"], "type": event["type"]}
+            else:
+                s["answers"][(event["block"], event["question"])] = event["answer"]
+                s["types"][(event["block"], event["question"])] = event["type"]
+        elif op == "complete":
+            self.sessions.pop(session, None)
+            self.completed[event["key"]] = {"session": session, "code": event["code"], "payload": event["payload"],
+                                            "at": event.get("at")}
+            if self.on_complete:
+                self.on_complete(event["code"], session, event.get("at"))
+        elif op == "cancel":
+            self.sessions.pop(session, None)
+        elif op == "voted":
+            self._add_voter(session, event["code"], event.get("at"))
+            if self.on_complete:
+                self.on_complete(event["code"], session, event.get("at"))
+
+    def _add_voter(self, session, code, at):
+        # One entry per voter, survey and day is enough for the daily participation sketches
+        day = None if at is None else int(at // 86400)
+        self.voters.setdefault((code, session, day), at)
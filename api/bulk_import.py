@@ -0,0 +1,224 @@
+"""
+Bulk ballot import from CSV or JSONL
+
+Streams ballots from a file, maps columns to (block, question) using the
+cached survey structure, and submits them with bounded concurrency over a
+pooled requests.Session. Progress is checkpointed so an interrupted import
+can be resumed, and rejected rows are written to an error report.
+
+Columns (CSV header or JSONL keys) may be "<block>.<question>" (e.g. "0.1")
+or the question text (DE). An optional "id" column is ignored. Cells use the
+same syntax as chat answers: "2", "0,2", "42" or free text. Empty cells
+skip the question.
+
+Usage:
+    python -m api.bulk_import <enter_code> ballots.csv [--concurrency 8] [--restart]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api.vote_runtime import (
+    get_cached_vote_structure, compile_ballot_validator, iter_questions, parse_answer,
+    build_full_answer_payload, submit_all_answers
+)
+
+DEFAULT_CONCURRENCY = 8
+SUBMIT_ATTEMPTS = 3  # per row, for 429/5xx/network errors
+PROGRESS_EVERY = 500  # rows between progress messages
+IGNORED_COLUMNS = {"id"}
+
+
+def read_ballot_rows(path):
+    """
+    Yield (row_number, {column: cell}) from a .csv or .jsonl file. A JSONL
+    line that is not valid JSON is yielded as a ValueError, so it ends up in
+    the error report like any other bad row.
+    """
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for row_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield row_number, json.loads(line)
+                except ValueError as e:
+                    yield row_number, ValueError(f"line is not valid JSON: {e}")
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row_number, row in enumerate(csv.DictReader(f), 1):
+                yield row_number, row
+
+
+def build_column_map(blocks):
+    """Map accepted column names to (block_id, question_id)"""
+    columns = {}
+    for block_id, q_id in iter_questions(blocks):
+        columns[f"{block_id}.{q_id}"] = (block_id, q_id)
+        text = (blocks[block_id]["questions"][q_id].get("question") or {}).get("DE")
+        if text:
+            columns.setdefault(text.strip(), (block_id, q_id))
+    return columns
+
+
+def build_row_payload(blocks, columns, validator, row):
+    """Parse and check one row; raises ValueError with a readable reason"""
+    if isinstance(row, ValueError):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("line is not a JSON object")
+    if None in row:
+        # csv.DictReader keeps cells past the header under the key None
+        raise ValueError(f"row has {len(row[None])} more cells than the header")
+    answers_dict = {}
+    question_types = {}
+    for column, cell in row.items():
+        if column in IGNORED_COLUMNS or cell is None or str(cell).strip() == "":
+            continue
+        key = columns.get(column.strip())
+        if key is None:
+            raise ValueError(f"unknown column '{column}'")
+        if key not in validator:
+            raise ValueError(f"column '{column}': question details missing from the survey structure")
+        q_type, check = validator[key]
+        try:
+            ans_list = parse_answer(q_type, str(cell).strip())
+        except ValueError:
+            raise ValueError(f"'{cell}' is not a valid {q_type} answer for column '{column}'")
+        try:
+            check(ans_list)
+        except ValueError as e:
+            raise ValueError(f"column '{column}': {e}")
+        answers_dict[key] = ans_list
+        question_types[key] = q_type
+    if not answers_dict:
+        raise ValueError("row has no answers")
+    return build_full_answer_payload(blocks, answers_dict, question_types)
+
+
+def submit_with_retry(enter_code, payload, session):
+    """Submit one ballot; returns None on success or an error string"""
+    error = None
+    for attempt in range(SUBMIT_ATTEMPTS):
+        try:
+            resp = submit_all_answers(enter_code, payload, session=session, debug=False)
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        else:
+            if 200 <= resp.status_code < 300:
+                return None
+            error = f"{resp.status_code} {resp.text[:200]}"
+            if resp.status_code != 429 and resp.status_code < 500:
+                return error
+        time.sleep(0.5 * 2 ** attempt)
+    return error
+
+
+def make_session(concurrency):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def import_ballots(enter_code, path, concurrency=DEFAULT_CONCURRENCY, resume=True, progress=print):
+    """
+    Import every ballot in path into the survey and return a summary dict.
+
+    Every finished row is appended and flushed to <path>.progress; with
+    resume=True those rows are skipped on the next run, so a crash resubmits
+    at most the rows still in flight. Rejected rows go to <path>.errors.csv.
+    """
+    blocks = get_cached_vote_structure(enter_code)
+    if not blocks:
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
+    columns = build_column_map(blocks)
+    validator = compile_ballot_validator(blocks)
+
+    progress_path = path + ".progress"
+    errors_path = path + ".errors.csv"
+    done_rows = set()
+    if resume and os.path.exists(progress_path):
+        with open(progress_path) as f:
+            done_rows = {int(line) for line in f if line.strip()}
+    elif os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    summary = {"submitted": 0, "failed": 0, "skipped": len(done_rows)}
+    started = time.time()
+    session = make_session(concurrency)
+    error_mode = "a" if resume and os.path.exists(errors_path) else "w"
+
+    with open(progress_path, "a") as progress_file, \
+            open(errors_path, error_mode, newline="") as errors_file, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        error_writer = csv.writer(errors_file)
+        if error_mode == "w":
+            error_writer.writerow(["row", "error"])
+
+        def finish(row_number, error):
+            if error:
+                summary["failed"] += 1
+                error_writer.writerow([row_number, error])
+                errors_file.flush()
+            else:
+                summary["submitted"] += 1
+            progress_file.write(f"{row_number}\n")
+            progress_file.flush()
+            finished = summary["submitted"] + summary["failed"]
+            if finished % PROGRESS_EVERY == 0:
+                rate = finished / max(time.time() - started, 1e-9)
+                progress(f"{finished} rows done ({summary['failed']} errors, {rate:.0f} rows/s)")
+
+        in_flight = {}
+        for row_number, row in read_ballot_rows(path):
+            if row_number in done_rows:
+                continue
+            try:
+                payload = build_row_payload(blocks, columns, validator, row)
+            except ValueError as e:
+                finish(row_number, str(e))
+                continue
+
+            future = pool.submit(submit_with_retry, enter_code, payload, session)
+            in_flight[future] = row_number
+            # Bounded window: never read far ahead of what has been submitted
+            if len(in_flight) >= concurrency * 2:
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for f in completed:
+                    finish(in_flight.pop(f), f.result())
+
+        for f in list(in_flight):
+            finish(in_flight.pop(f), f.result())
+
+    summary["seconds"] = round(time.time() - started, 3)
+    summary["errors_file"] = errors_path
+    progress(
+        f"Import finished: {summary['submitted']} submitted, {summary['failed']} failed, "
+        f"{summary['skipped']} skipped (already done) in {summary['seconds']}s"
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import ballots from CSV or JSONL")
+    parser.add_argument("enter_code")
+    parser.add_argument("path")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--restart", action="store_true", help="ignore earlier progress and import every row")
+    args = parser.parse_args(argv)
+
+    summary = import_ballots(args.enter_code, args.path, args.concurrency, resume=not args.restart)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+ChoiceMulti statistics from bitset-encoded selections
+
+Each respondent's selections are one integer with bit i set for option i
+(the results store keeps them in an array("Q")). Identical selection
+patterns are grouped first, so per-option counts, the option x option
+co-selection matrix and the distribution of selection counts only touch
+the distinct patterns, weighted by how often each occurs. NumPy does the
+grouping and the weighted matrix products when installed.
+"""
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+BINCOUNT_MAX_OPTIONS = 20  # up to 2**20 patterns are counted with bincount instead of a sort
+
+
+def selection_mask(ans_list):
+    """Bitset of the option indices in one ChoiceMulti answer list"""
+    mask = 0
+    for ans in ans_list:
+        try:
+            index = int(ans.get("answer"))
+        except (TypeError, ValueError):
+            continue
+        if index >= 0:
+            mask |= 1 << index
+    return mask
+
+
+def multi_choice_statistics(masks, num_options, use_numpy=True):
+    """
+    {"respondents", "option_counts", "co_selection", "selection_counts"}
+    where co_selection[i][j] counts respondents who chose both i and j
+    (the diagonal equals option_counts) and selection_counts maps
+    "number of options chosen" -> respondents.
+    """
+    # Lists appear once a mask outgrew 64 bits; those stay in Python ints
+    if np is not None and use_numpy and num_options <= 64 and not isinstance(masks, list):
+        return _numpy_statistics(masks, num_options)
+    return _python_statistics(masks, num_options)
+
+
+def _numpy_statistics(masks, num_options):
+    arr = np.array(masks, dtype=np.uint64)
+    if num_options <= BINCOUNT_MAX_OPTIONS:
+        arr &= np.uint64((1 << num_options) - 1)
+        weights = np.bincount(arr.astype(np.int64), minlength=1 << num_options)
+        patterns = np.nonzero(weights)[0].astype(np.uint64)
+        weights = weights[patterns.astype(np.int64)]
+    else:
+        patterns, weights = np.unique(arr, return_counts=True)
+
+    # float64 so the product runs through BLAS; counts stay exact below 2**53
+    bits = ((patterns[:, None] >> np.arange(num_options, dtype=np.uint64)) & np.uint64(1)).astype(np.float64)
+    weighted = bits * weights[:, None]
+    per_pattern = bits.sum(axis=1).astype(np.int64)
+    distribution = np.bincount(per_pattern, weights=weights, minlength=num_options + 1)
+    return {
+        "respondents": int(arr.size),
+        "option_counts": weighted.sum(axis=0).astype(np.int64).tolist(),
+        "co_selection": (weighted.T @ bits).astype(np.int64).tolist(),
+        "selection_counts": {k: int(n) for k, n in enumerate(distribution.tolist()) if n},
+    }
+
+
+def _python_statistics(masks, num_options):
+    option_counts = [0] * num_options
+    co_selection = [[0] * num_options for _ in range(num_options)]
+    selection_counts = Counter()
+    for pattern, weight in Counter(masks).items():
+        chosen = [i for i in range(num_options) if pattern >> i & 1]
+        selection_counts[len(chosen)] += weight
+        for i in chosen:
+            option_counts[i] += weight
+            row = co_selection[i]
+            for j in chosen:
+                row[j] += weight
+    return {
+        "respondents": len(masks),
+        "option_counts": option_counts,
+        "co_selection": co_selection,
+        "selection_counts": dict(sorted(selection_counts.items())),
+    }
+
+
+def top_pairs(co_selection, limit=3):
+    """[(i, j, count)] of the options most often chosen together, i < j"""
+    pairs = [
+        (i, j, co_selection[i][j])
+        for i in range(len(co_selection)) for j in range(i + 1, len(co_selection))
+        if co_selection[i][j]
+    ]
+    return sorted(pairs, key=lambda p: (-p[2], p[0], p[1]))[:limit]
@@ -0,0 +1,241 @@
+"""
+Cross-tabulation across survey questions
+
+Answers of two questions are joined by respondent (the dictionary-encoded
+respondent column of the results store; a respondent's last answer wins)
+and compared as:
+    choice x choice    contingency table of respondents per option pair
+    choice x slider    slider statistics grouped by option
+    slider x slider    count, means and Pearson correlation
+Single and multiple choice answers are both handled as option bitsets, so
+a table is one matrix product over the aligned rows. With NumPy the join
+is an intersect1d and the group-by runs vectorized; without it the same
+numbers come from dict joins in Python.
+
+Questions are referenced by their 1-based position in the survey ("3") or
+as "<block>.<question>" ("0.2").
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+from api import get_result
+from api.vote_runtime import get_cached_vote_structure, iter_questions
+
+CHOICE_TYPES = ("ChoiceSingle", "ChoiceMulti")
+
+
+def resolve_question(blocks, ref):
+    """(block_id, q_id) for a question reference; raises ValueError if it does not exist"""
+    keys = list(iter_questions(blocks))
+    ref = str(ref).strip()
+    if "." in ref:
+        block_id, _, q_id = ref.partition(".")
+        if (block_id, q_id) in keys:
+            return block_id, q_id
+    elif ref.isdigit() and 1 <= int(ref) <= len(keys):
+        return keys[int(ref) - 1]
+    raise ValueError(f"question {ref} does not exist (1-{len(keys)} or <block>.<question>)")
+
+
+def crosstab(enter_code, row_ref, col_refs, use_numpy=True):
+    """
+    Cross-tab the row question against every column question.
+    Returns {"survey", "row", "tables": [...]}; raises ValueError for
+    unknown questions, free-text questions or failed fetches.
+    """
+    blocks = get_cached_vote_structure(enter_code)
+    if not blocks:
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
+    refs = [row_ref, *col_refs]
+    keys = [resolve_question(blocks, ref) for ref in refs]
+
+    fetched = get_result.fetch_survey_tallies(enter_code, blocks, keys)
+    columns = [_column(ref, key, q, tally) for ref, key, (q, tally) in zip(refs, keys, fetched)]
+    for column in columns:
+        if column["type"] not in CHOICE_TYPES and column["type"] != "RangeSlider":
+            raise ValueError(f"question {column['ref']} ({column['type']}) cannot be cross-tabulated")
+
+    fast = np is not None and use_numpy and all(len(c.get("labels", ())) <= 64 for c in columns)
+    row = columns[0]
+    tables = [_table(row, col, fast) for col in columns[1:]]
+    return {"survey": enter_code, "row": _meta(row), "tables": tables}
+
+
+def _column(ref, key, q, tally):
+    column = {
+        "ref": str(ref), "block": key[0], "question": key[1],
+        "text": (q.get("question") or {}).get("DE", ""),
+        "type": q.get("question_type", ""),
+        "respondents": tally.respondents,
+    }
+    if column["type"] in CHOICE_TYPES:
+        options = (q.get("config") or {}).get("options") or {}
+        column["labels"] = [v.get("DE", k) for k, v in options.items()]
+        if column["type"] == "ChoiceMulti":
+            column["masks"] = tally.selections
+        else:
+            column["masks"] = [1 << c if c >= 0 else 0 for c in tally.choices]
+    elif column["type"] == "RangeSlider":
+        column["values"] = tally.values
+    return column
+
+
+def _meta(column):
+    meta = {k: column[k] for k in ("ref", "block", "question", "text", "type")}
+    if "labels" in column:
+        meta["labels"] = column["labels"]
+    return meta
+
+
+def _table(row, col, fast):
+    table = {"column": _meta(col)}
+    # Group by whichever side is a choice question
+    if row["type"] in CHOICE_TYPES and col["type"] in CHOICE_TYPES:
+        table["kind"] = "contingency"
+    elif row["type"] in CHOICE_TYPES or col["type"] in CHOICE_TYPES:
+        table["kind"] = "grouped"
+    else:
+        table["kind"] = "correlation"
+    table.update((_numpy_table if fast else _python_table)(row, col, table["kind"]))
+    return table
+
+
+# --- NumPy path ---
+
+def _last_answers(respondents):
+    """Sorted respondent numbers and the position of each one's last answer"""
+    r = np.asarray(respondents, dtype=np.int64)
+    unique, first_in_reversed = np.unique(r[::-1], return_index=True)
+    positions = len(r) - 1 - first_in_reversed
+    known = unique >= 0
+    return unique[known], positions[known]
+
+
+def _bits(masks, positions, num_options):
+    m = np.asarray(masks, dtype=np.uint64)[positions]
+    return ((m[:, None] >> np.arange(num_options, dtype=np.uint64)) & np.uint64(1)).astype(np.float64)
+
+
+def _numpy_table(row, col, kind):
+    row_ids, row_pos = _last_answers(row["respondents"])
+    col_ids, col_pos = _last_answers(col["respondents"])
+    _, ri, ci = np.intersect1d(row_ids, col_ids, assume_unique=True, return_indices=True)
+    row_pos, col_pos = row_pos[ri], col_pos[ci]
+    result = {"respondents": int(len(row_pos))}
+
+    if kind == "contingency":
+        a = _bits(row["masks"], row_pos, len(row["labels"]))
+        b = _bits(col["masks"], col_pos, len(col["labels"]))
+        result["counts"] = (a.T @ b).astype(np.int64).tolist()
+        return result
+
+    if kind == "grouped":
+        if row["type"] in CHOICE_TYPES:
+            group, g_pos, numeric, n_pos = row, row_pos, col, col_pos
+        else:
+            group, g_pos, numeric, n_pos = col, col_pos, row, row_pos
+        bits = _bits(group["masks"], g_pos, len(group["labels"])).astype(bool)
+        values = np.asarray(numeric["values"], dtype=np.float64)[n_pos]
+        groups = []
+        for i, label in enumerate(group["labels"]):
+            selected = values[bits[:, i]]
+            if not selected.size:
+                groups.append(_group_stats(label, []))
+                continue
+            groups.append({
+                "label": label,
+                "count": int(selected.size),
+                "mean": float(selected.mean()),
+                "median": float(np.median(selected)),
+                "std": float(selected.std()),
+                "min": float(selected.min()),
+                "max": float(selected.max()),
+            })
+        result["groups"] = groups
+        return result
+
+    x = np.asarray(row["values"], dtype=np.float64)[row_pos]
+    y = np.asarray(col["values"], dtype=np.float64)[col_pos]
+    if len(x) < 2:
+        result.update(_correlation(x.tolist(), y.tolist()))
+        return result
+    result.update({
+        "row_mean": float(x.mean()),
+        "column_mean": float(y.mean()),
+        "pearson_r": float(np.corrcoef(x, y)[0, 1]) if x.std() and y.std() else None,
+    })
+    return result
+
+
+# --- pure-Python path ---
+
+def _python_table(row, col, kind):
+    row_last = {r: i for i, r in enumerate(row["respondents"]) if r >= 0}
+    col_last = {r: i for i, r in enumerate(col["respondents"]) if r >= 0}
+    common = sorted(row_last.keys() & col_last.keys())
+    result = {"respondents": len(common)}
+
+    if kind == "contingency":
+        counts = [[0] * len(col["labels"]) for _ in row["labels"]]
+        for r in common:
+            a, b = row["masks"][row_last[r]], col["masks"][col_last[r]]
+            chosen_b = [j for j in range(len(col["labels"])) if b >> j & 1]
+            for i in range(len(row["labels"])):
+                if a >> i & 1:
+                    for j in chosen_b:
+                        counts[i][j] += 1
+        result["counts"] = counts
+        return result
+
+    if kind == "grouped":
+        if row["type"] in CHOICE_TYPES:
+            group, g_last, numeric, n_last = row, row_last, col, col_last
+        else:
+            group, g_last, numeric, n_last = col, col_last, row, row_last
+        by_option = [[] for _ in group["labels"]]
+        for r in common:
+            mask, value = group["masks"][g_last[r]], numeric["values"][n_last[r]]
+            for i in range(len(group["labels"])):
+                if mask >> i & 1:
+                    by_option[i].append(value)
+        result["groups"] = [_group_stats(label, values) for label, values in zip(group["labels"], by_option)]
+        return result
+
+    result.update(_correlation([row["values"][row_last[r]] for r in common],
+                               [col["values"][col_last[r]] for r in common]))
+    return result
+
+
+def _group_stats(label, values):
+    if not values:
+        return {"label": label, "count": 0, "mean": None, "median": None, "std": None, "min": None, "max": None}
+    ordered = sorted(values)
+    n = len(ordered)
+    mean = math.fsum(ordered) / n
+    middle = n // 2
+    median = ordered[middle] if n % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+    return {
+        "label": label,
+        "count": n,
+        "mean": mean,
+        "median": median,
+        "std": math.sqrt(math.fsum((v - mean) ** 2 for v in ordered) / n),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def _correlation(x, y):
+    n = len(x)
+    if not n:
+        return {"row_mean": None, "column_mean": None, "pearson_r": None}
+    mx, my = math.fsum(x) / n, math.fsum(y) / n
+    sxy = math.fsum((a - mx) * (b - my) for a, b in zip(x, y))
+    sxx = math.fsum((a - mx) ** 2 for a in x)
+    syy = math.fsum((b - my) ** 2 for b in y)
+    r = sxy / math.sqrt(sxx * syy) if sxx and syy else None
+    return {"row_mean": mx, "column_mean": my, "pearson_r": r}
@@ -0,0 +1,102 @@
+"""
+Multi-survey dashboard
+
+Results of many surveys (e.g. weekly pulse surveys) are computed
+concurrently and lined up question by question: questions with the same
+text and type are one row, options are matched by label, and every row
+holds one entry per survey in the order given. Each survey is read with
+`load` (the app passes its result cache, so fresh reports are reused and
+stale ones revalidated in the background) and defaults to computing the
+full survey document directly.
+"""
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from api.fetch_question import fetch_survey_list
+from api.get_result import get_survey_document
+
+DASHBOARD_CONCURRENCY = int(os.getenv("DASHBOARD_CONCURRENCY", "8"))
+MAX_DASHBOARD_SURVEYS = 50
+
+
+def resolve_surveys(codes=None, title_pattern=None):
+    """
+    [{"code", "title"}] for the given codes, or for every survey whose title
+    matches the shell-style pattern (case-insensitive, e.g. "Pulse KW*").
+    Raises ValueError when nothing matches.
+    """
+    listed = fetch_survey_list()
+    if title_pattern:
+        pattern = title_pattern.casefold()
+        if not any(ch in pattern for ch in "*?["):
+            pattern = f"*{pattern}*"
+        surveys = [
+            {"code": s["enter_code"], "title": s["title"]}
+            for s in listed if fnmatch.fnmatchcase(s["title"].casefold(), pattern)
+        ]
+        if not surveys:
+            raise ValueError(f"no survey title matches {title_pattern}")
+    else:
+        # chat input is lowercased; use the listed spelling of a code when there is one
+        known = {s["enter_code"].lower(): {"code": s["enter_code"], "title": s["title"]} for s in listed}
+        surveys = [dict(known.get(code.lower()) or {"code": code, "title": code}) for code in codes or []]
+        if not surveys:
+            raise ValueError("no survey codes given")
+    if len(surveys) > MAX_DASHBOARD_SURVEYS:
+        raise ValueError(f"{len(surveys)} surveys match; narrow it down to at most {MAX_DASHBOARD_SURVEYS}")
+    return surveys
+
+
+def build_dashboard(surveys, concurrency=None, load=get_survey_document):
+    """
+    {"surveys": [{"code", "title", "error"}], "questions": [row, ...]} where a
+    row is {"text", "type", "labels", "series": [entry or None per survey]}.
+    `load(code)` returns a survey document (see get_survey_document).
+    """
+    workers = max(1, min(concurrency or DASHBOARD_CONCURRENCY, len(surveys)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        documents = list(pool.map(lambda code: _document(load, code), [s["code"] for s in surveys]))
+
+    rows = {}  # (text, type) -> row, in order of first appearance
+    for index, (survey, (document, error)) in enumerate(zip(surveys, documents)):
+        survey["error"] = error
+        for block in (document or {}).get("blocks", []):
+            for result in block["questions"]:
+                if "error" in result:
+                    # keep the survey's other questions, but say that one is missing
+                    survey["error"] = survey["error"] or result["error"]
+                    continue
+                key = (" ".join(result["text"].split()).casefold(), result["type"])
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = {
+                        "text": result["text"], "type": result["type"], "labels": [],
+                        "series": [None] * len(surveys),
+                    }
+                row["series"][index] = _entry(row, result)
+    return {"surveys": surveys, "questions": list(rows.values())}
+
+
+def _document(load, code):
+    try:
+        return load(code), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def _entry(row, result):
+    entry = {"responses": result["responses"]}
+    if "options" in result:
+        for option in result["options"]:
+            if option["label"] not in row["labels"]:
+                row["labels"].append(option["label"])
+        total = sum(o["count"] for o in result["options"])
+        entry["counts"] = {o["label"]: o["count"] for o in result["options"]}
+        entry["shares"] = {o["label"]: (o["count"] / total if total else 0.0) for o in result["options"]}
+    elif "stats" in result:
+        stats = result["stats"]
+        entry["mean"] = round(stats["mean"], 2) if stats else None
+    elif "top_terms" in result:
+        entry["top_terms"] = [t["term"] for t in result["top_terms"][:5]]
+    return entry
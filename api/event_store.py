@@ -0,0 +1,329 @@
+"""
+Local columnar event store
+
+Analysis events fetched from Vote2 are appended to per-question column
+files, so later analyses read them from disk instead of downloading and
+parsing the JSON again. Surveys marked closed are served from disk only.
+
+Layout under EVENT_STORE_DIR (the store is off when it is unset):
+    <code>/survey.json                       {"closed": bool}
+    <code>/respondents.jsonl                 respondent id per line; line n is respondent number n
+    <code>/<block>.<question>/meta.json      {"rows", "last_id", "synced_at"} (cursor, last moved at)
+    <code>/<block>.<question>/respondent.i64 respondent number per event
+    <code>/<block>.<question>/timestamp.f64  event time (epoch seconds, NaN if unknown)
+    <code>/<block>.<question>/value.f64      first answer as a number (NaN if not numeric)
+    <code>/<block>.<question>/mask.u64       option bitset of the answer (see choice_stats)
+    <code>/<block>.<question>/id.off|.dat    event id as JSON, Arrow-style end offsets + bytes
+    <code>/<block>.<question>/answer.off|.dat answer list as JSON
+
+Fixed-width columns are memory-mapped and returned as NumPy arrays (or
+memoryviews without NumPy) without copying. Columns are written before
+meta.json is replaced, so after a crash the extra tail is ignored and
+overwritten by the next append.
+
+Usage:
+    python -m api.event_store sync <code> [--close]
+    python -m api.event_store reopen <code>
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: memoryviews are returned instead
+    np = None
+
+from api.choice_stats import selection_mask
+from api.results_store import event_answers, event_respondent, event_time
+
+EVENT_STORE_DIR = os.getenv("EVENT_STORE_DIR")
+
+# column file -> array typecode (8 bytes each)
+FIXED_COLUMNS = {"respondent.i64": "q", "timestamp.f64": "d", "value.f64": "d", "mask.u64": "Q"}
+NUMPY_DTYPES = {"q": "<i8", "d": "<f8", "Q": "<u8"}
+VARIABLE_COLUMNS = ("id", "answer")
+
+
+class EventStore:
+    """Append-only column files per (survey, block, question)"""
+
+    def __init__(self, root):
+        self.root = root
+        self._respondents = {}  # code -> (list of ids, {id: number})
+        self._lock = threading.Lock()
+
+    # --- writing ---
+
+    def append(self, enter_code, block_id, q_id, events):
+        """
+        Persist the events past the stored cursor (row count, checked against
+        the last event id). If upstream history changed, the question is
+        rewritten from scratch. meta.json is only rewritten when the cursor
+        moves, so polling an unchanged survey writes nothing.
+        """
+        with self._lock:
+            qdir = self._question_dir(enter_code, block_id, q_id)
+            meta_path = os.path.join(qdir, "meta.json")
+            meta = self._read_meta(qdir)
+            rows = meta["rows"]
+            if len(events) < rows or (rows and events[rows - 1].get("id") != meta["last_id"]):
+                rows = 0
+            new = events[rows:]
+            if new:
+                numbers = self._respondent_numbers(enter_code, [event_respondent(e) for e in new])
+                self._write_rows(qdir, rows, new, numbers)
+            cursor = {"rows": rows + len(new), "last_id": events[-1].get("id") if events else None}
+            if cursor["rows"] != meta["rows"] or cursor["last_id"] != meta["last_id"] or not os.path.exists(meta_path):
+                self._write_json(meta_path, dict(cursor, synced_at=time.time()))
+
+    def set_closed(self, enter_code, closed=True):
+        """Closed surveys are analysed from disk without upstream calls"""
+        with self._lock:
+            path = os.path.join(self._survey_dir(enter_code), "survey.json")
+            if os.path.exists(path) and self.is_closed(enter_code) == bool(closed):
+                return
+            self._write_json(path, {"closed": bool(closed)})
+
+    def _write_rows(self, qdir, rows, events, numbers):
+        fixed = {name: array(code) for name, code in FIXED_COLUMNS.items()}
+        blobs = {name: [] for name in VARIABLE_COLUMNS}
+        for event, number in zip(events, numbers):
+            answers = event_answers(event)
+            try:
+                value = float(answers[0].get("answer"))
+            except (IndexError, TypeError, ValueError):
+                value = math.nan
+            fixed["respondent.i64"].append(number)
+            fixed["timestamp.f64"].append(event_time(event))
+            fixed["value.f64"].append(value)
+            fixed["mask.u64"].append(selection_mask(answers) & 0xFFFFFFFFFFFFFFFF)
+            blobs["id"].append(json.dumps(event.get("id")).encode("utf-8"))
+            blobs["answer"].append(json.dumps(answers, ensure_ascii=False).encode("utf-8"))
+
+        for name, column in fixed.items():
+            self._append_file(os.path.join(qdir, name), rows * 8, column.tobytes())
+        for name, items in blobs.items():
+            offsets_path = os.path.join(qdir, f"{name}.off")
+            start = self._offset_at(offsets_path, rows)
+            ends = array("q")
+            end = start
+            for item in items:
+                end += len(item)
+                ends.append(end)
+            self._append_file(offsets_path, rows * 8, ends.tobytes())
+            self._append_file(os.path.join(qdir, f"{name}.dat"), start, b"".join(items))
+
+    @staticmethod
+    def _append_file(path, keep, data):
+        # Drop anything past `keep` bytes (a torn earlier append) and write after it
+        mode = "r+b" if os.path.exists(path) else "wb"
+        with open(path, mode) as f:
+            f.truncate(keep)
+            f.seek(keep)
+            f.write(data)
+
+    @staticmethod
+    def _offset_at(offsets_path, rows):
+        # End offset of row rows-1, i.e. where row `rows` starts in the data file
+        if rows == 0:
+            return 0
+        with open(offsets_path, "rb") as f:
+            f.seek((rows - 1) * 8)
+            return array("q", f.read(8))[0]
+
+    def _respondent_numbers(self, enter_code, respondents):
+        ids, numbers = self._load_respondents(enter_code)
+        added = []
+        result = []
+        for respondent in respondents:
+            if respondent is None:
+                result.append(-1)
+                continue
+            number = numbers.get(respondent)
+            if number is None:
+                number = numbers[respondent] = len(ids)
+                ids.append(respondent)
+                added.append(respondent)
+            result.append(number)
+        if added:
+            with open(os.path.join(self._survey_dir(enter_code), "respondents.jsonl"), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in added))
+        return result
+
+    def _load_respondents(self, enter_code):
+        key = enter_code.lower()
+        if key not in self._respondents:
+            path = os.path.join(self._survey_dir(enter_code), "respondents.jsonl")
+            ids = []
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+                complete = data[:data.rfind(b"\n") + 1]
+                if len(complete) < len(data):
+                    # torn last line from a crash; cut it so appends start on a fresh line
+                    with open(path, "r+b") as f:
+                        f.truncate(len(complete))
+                ids = [json.loads(line) for line in complete.decode("utf-8").splitlines()]
+            self._respondents[key] = (ids, {r: n for n, r in enumerate(ids)})
+        return self._respondents[key]
+
+    # --- reading ---
+
+    def is_closed(self, enter_code):
+        path = os.path.join(self.root, enter_code.lower(), "survey.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return bool(json.load(f).get("closed"))
+        except (OSError, ValueError):
+            return False
+
+    def has_question(self, enter_code, block_id, q_id):
+        return os.path.exists(os.path.join(self._question_path(enter_code, block_id, q_id), "meta.json"))
+
+    def rows(self, enter_code, block_id, q_id):
+        return self._read_meta(self._question_path(enter_code, block_id, q_id))["rows"]
+
+    def cursor(self, enter_code, block_id, q_id):
+        """(rows, last event id) of a stored question; changes whenever its events do"""
+        meta = self._read_meta(self._question_path(enter_code, block_id, q_id))
+        return meta["rows"], meta["last_id"]
+
+    def respondent_ids(self, enter_code):
+        """Respondent id strings; index = respondent number in the respondent column"""
+        with self._lock:
+            return list(self._load_respondents(enter_code)[0])
+
+    def columns(self, enter_code, block_id, q_id):
+        """
+        {"respondent", "timestamp", "value", "mask"} as zero-copy views of the
+        memory-mapped column files, cut to the committed row count.
+        """
+        qdir = self._question_path(enter_code, block_id, q_id)
+        rows = self._read_meta(qdir)["rows"]
+        return {
+            name.split(".")[0]: _map_column(os.path.join(qdir, name), code, rows)
+            for name, code in FIXED_COLUMNS.items()
+        }
+
+    def read_events(self, enter_code, block_id, q_id):
+        """
+        The stored events rebuilt in Vote2's analysis event shape, for
+        export and text questions; choice and slider tallies read columns().
+        """
+        qdir = self._question_path(enter_code, block_id, q_id)
+        rows = self._read_meta(qdir)["rows"]
+        if not rows:
+            return []
+        ids = self.respondent_ids(enter_code)
+        columns = self.columns(enter_code, block_id, q_id)
+        event_ids = _read_json_column(qdir, "id", rows)
+        answers = _read_json_column(qdir, "answer", rows)
+        events = []
+        for i in range(rows):
+            number = int(columns["respondent"][i])
+            timestamp = float(columns["timestamp"][i])
+            events.append({
+                "id": event_ids[i],
+                "participant": ids[number] if number >= 0 else None,
+                "timestamp": None if math.isnan(timestamp) else timestamp,
+                "content": {"answer": {"0": {"0": answers[i]}}},
+            })
+        return events
+
+    # --- paths and metadata ---
+
+    def _survey_dir(self, enter_code):
+        path = os.path.join(self.root, enter_code.lower())
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _question_path(self, enter_code, block_id, q_id):
+        return os.path.join(self.root, enter_code.lower(), f"{block_id}.{q_id}")
+
+    def _question_dir(self, enter_code, block_id, q_id):
+        path = self._question_path(enter_code, block_id, q_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _read_meta(qdir):
+        try:
+            with open(os.path.join(qdir, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"rows": 0, "last_id": None, "synced_at": None}
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+
+def _map_column(path, typecode, rows):
+    if rows == 0:
+        return np.empty(0, dtype=NUMPY_DTYPES[typecode]) if np is not None else memoryview(array(typecode))
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if np is not None:
+        return np.frombuffer(mapped, dtype=NUMPY_DTYPES[typecode], count=rows)
+    return memoryview(mapped)[:rows * 8].cast(typecode)
+
+
+def _read_json_column(qdir, name, rows):
+    # Values are stored back to back; one JSON array parse decodes them all at once
+    offsets = _map_column(os.path.join(qdir, f"{name}.off"), "q", rows)
+    with open(os.path.join(qdir, f"{name}.dat"), "rb") as f:
+        data = f.read(int(offsets[rows - 1]))
+    parts = []
+    start = 0
+    for end in offsets.tolist():
+        parts.append(data[start:end])
+        start = end
+    return json.loads(b"[" + b",".join(parts) + b"]")
+
+
+event_store = EventStore(EVENT_STORE_DIR) if EVENT_STORE_DIR else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local event store (EVENT_STORE_DIR)")
+    parser.add_argument("action", choices=["sync", "reopen"])
+    parser.add_argument("enter_code")
+    parser.add_argument("--close", action="store_true", help="after syncing, serve the survey from disk only")
+    args = parser.parse_args(argv)
+
+    if event_store is None:
+        print("Set EVENT_STORE_DIR to use the event store", file=sys.stderr)
+        return 1
+    if args.action == "reopen":
+        event_store.set_closed(args.enter_code, False)
+        return 0
+
+    from api import get_result
+    from api.vote_runtime import get_cached_vote_structure, iter_questions
+
+    blocks = get_cached_vote_structure(args.enter_code)
+    if not blocks:
+        print(f"Cannot load structure for survey {args.enter_code}", file=sys.stderr)
+        return 1
+    # sync first, so a closed survey is complete on disk
+    event_store.set_closed(args.enter_code, False)
+    for block_id, q_id in iter_questions(blocks):
+        get_result.fetch_question_events(args.enter_code, block_id, q_id)
+        print(f"{block_id}.{q_id}: {event_store.rows(args.enter_code, block_id, q_id)} events")
+    if args.close:
+        event_store.set_closed(args.enter_code, True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
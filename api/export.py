@@ -0,0 +1,218 @@
+"""
+Raw results export
+
+Streams every answer of a survey as one row per answer (one row per chosen
+option for multiple choice) through a generator pipeline:
+
+    structure -> per-question events -> rows -> CSV / JSONL / Parquet chunks
+
+Questions are fetched one at a time and their events are released before
+the next question is requested, so memory is bounded by the largest single
+question, not by the survey. Question texts and option labels come from the
+cached vote structure, or are fetched when the structure lacks them. A
+question that cannot be fetched becomes one row with `error` set instead
+of ending the stream early. Parquet needs pyarrow; CSV and JSONL always work.
+
+Usage:
+    python -m api.export <code> [--format csv|jsonl|parquet] [--out results.csv]
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: Parquet export is unavailable without it
+    pa = pq = None
+
+from api import get_result
+from api.results_store import event_answers, event_respondent
+from api.vote_runtime import get_cached_vote_structure, iter_questions
+
+CHUNK_ROWS = 1000  # rows per CSV/JSONL chunk and per Parquet row group
+
+COLUMNS = [
+    "survey", "block", "block_title", "question", "question_text", "question_type",
+    "event_id", "respondent", "timestamp", "answer", "label", "error",
+]
+
+MIMETYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def available_formats():
+    return [f for f in MIMETYPES if f != "parquet" or pa is not None]
+
+
+def export_rows(enter_code, blocks=None):
+    """
+    Yield one dict per answer, question by question in survey order. A
+    question whose details or events cannot be fetched yields a single row
+    with only its ids and `error` set, so a partial export is visible as such.
+    """
+    blocks = blocks or get_cached_vote_structure(enter_code)
+    if not blocks:
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
+    for block_id, q_id in iter_questions(blocks):
+        block = blocks[block_id]
+        base = dict.fromkeys(COLUMNS)
+        base.update(
+            survey=enter_code,
+            block=block_id,
+            block_title=(block.get("title") or {}).get("DE", ""),
+            question=q_id,
+        )
+        try:
+            question = get_result.question_meta(enter_code, block_id, q_id, block["questions"][q_id])
+            events = get_result.fetch_question_events(enter_code, block_id, q_id)
+        except ValueError as e:
+            yield dict(base, error=str(e))
+            continue
+        q_type = question.get("question_type", "")
+        options = (question.get("config") or {}).get("options") or {}
+        labels = {str(i): v.get("DE", k) for i, (k, v) in enumerate(options.items())}
+        base.update(
+            question_text=(question.get("question") or {}).get("DE", ""),
+            question_type=q_type,
+        )
+        for event in events:
+            for ans in event_answers(event) or [{}]:
+                answer = ans.get("answer")
+                yield dict(
+                    base,
+                    event_id=event.get("id"),
+                    respondent=event_respondent(event),
+                    timestamp=event.get("timestamp") or event.get("created_at"),
+                    answer=answer,
+                    label=labels.get(str(answer), "") if q_type.startswith("Choice") else "",
+                )
+        del events
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % CHUNK_ROWS == 0:
+            yield _take(buffer)
+    yield _take(buffer)
+
+
+def jsonl_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) == CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def parquet_chunks(rows):
+    """Parquet bytes, one row group per CHUNK_ROWS rows; all columns as strings"""
+    schema = pa.schema([(name, pa.string()) for name in COLUMNS])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == CHUNK_ROWS:
+                writer.write_table(_table(batch, schema))
+                batch = []
+                yield sink.take()
+        if batch:
+            writer.write_table(_table(batch, schema))
+    yield sink.take()
+
+
+def export_chunks(enter_code, fmt="csv"):
+    """
+    Encoded chunks of the whole survey export in the given format. Format and
+    structure are checked before the generator is returned, so callers can
+    report a ValueError before any bytes are sent.
+    """
+    writers = {"csv": csv_chunks, "jsonl": jsonl_chunks, "parquet": parquet_chunks}
+    if fmt not in writers:
+        raise ValueError(f"Unknown export format {fmt} (use {', '.join(available_formats())})")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+    blocks = get_cached_vote_structure(enter_code)
+    if not blocks:
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
+    return _encoded(writers[fmt](export_rows(enter_code, blocks)))
+
+
+def _encoded(chunks):
+    for chunk in chunks:
+        if chunk:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def _take(buffer):
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def _table(batch, schema):
+    columns = {name: [None if row[name] is None else str(row[name]) for row in batch] for name in COLUMNS}
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last take()"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every answer of a survey")
+    parser.add_argument("enter_code")
+    parser.add_argument("--format", default="csv", choices=list(MIMETYPES))
+    parser.add_argument("--out", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        for chunk in export_chunks(args.enter_code, args.format):
+            out.write(chunk)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if args.out:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,20 @@
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from dotenv import load_dotenv
 
 from api.fetch_question import fetch_question
 from api.submit_answer import fetch_vote_structure
+from api.results_store import results_store
+from api.event_store import event_store
+from api.range_stats import range_statistics
+from api.choice_stats import multi_choice_statistics, top_pairs
+from api.text_stats import TOP_TERMS
 
 load_dotenv()
 
@@ -15,8 +26,51 @@ headers = {
     "Content-Type": "application/json"
 }
 
+# Questions fetched in parallel by get_full_survey_result
+RESULT_CONCURRENCY = int(os.getenv("RESULT_CONCURRENCY", "4"))
+# Optional token bucket over all upstream calls: RESULT_RATE_LIMIT calls per
+# second on average (0 = unlimited), with bursts of up to RESULT_BURST calls
+RESULT_RATE_LIMIT = float(os.getenv("RESULT_RATE_LIMIT", "0"))
+RESULT_BURST = int(os.getenv("RESULT_BURST", "20"))
+
+_throttle_lock = threading.Lock()
+_tokens = None  # calls that may start right away; negative = callers already waiting
+_tokens_at = 0.0
+
+
+def _throttle():
+    """Take one call from the token bucket, waiting when the burst is used up"""
+    global _tokens, _tokens_at
+    if RESULT_RATE_LIMIT <= 0:
+        return
+    with _throttle_lock:
+        now = time.monotonic()
+        burst = max(1, RESULT_BURST)
+        tokens = burst if _tokens is None else min(burst, _tokens + (now - _tokens_at) * RESULT_RATE_LIMIT)
+        _tokens = tokens - 1
+        _tokens_at = now
+        wait = -_tokens / RESULT_RATE_LIMIT if _tokens < 0 else 0
+    if wait:
+        time.sleep(wait)
+
+
+def fetch_question_events(enter_code, block_id, question_id):
+    """All analysis events of one question; raises ValueError when they cannot be fetched"""
+    return _get_events(enter_code, block_id, question_id)[0]
 
-def get_survey_results(enter_code, block_id=0, question_id=0):
+
+def _is_stored(enter_code, block_id, question_id):
+    # Closed survey with this question on disk: no upstream call needed
+    return event_store is not None and event_store.is_closed(enter_code) \
+        and event_store.has_question(enter_code, block_id, question_id)
+
+
+def _get_events(enter_code, block_id, question_id):
+    # (events, time the request was sent)
+    if _is_stored(enter_code, block_id, question_id):
+        return event_store.read_events(enter_code, block_id, question_id), time.time()
+    _throttle()
+    fetched_at = time.time()
     response = requests.get(
         f"{BASE_URL}/analysis/{enter_code}/blocks/{block_id}/questions/{question_id}",
         headers=headers
@@ -24,117 +78,236 @@ def get_survey_results(enter_code, block_id=0, question_id=0):
     print("Results status:", response.status_code)
 
     if response.status_code != 200:
-        return f"cannot fetch result: {response.status_code} {response.text}"
+        raise ValueError(f"cannot fetch result: {response.status_code} {response.text}")
+    events = response.json().get("events", [])
+    if event_store is not None:
+        event_store.append(enter_code, block_id, question_id, events)
+    return events, fetched_at
 
-    data = response.json()
-    events = data.get("events", [])
-    if not events:
-        return "Not enough responses yet."
 
-    # Question meta
+def question_meta(enter_code, block_id, question_id, question=None):
+    """
+    The question with type, text and config: the vote structure's copy when
+    it has them, else fetched. Raises ValueError when it cannot be fetched.
+    """
+    if question and question.get("question_type") and question.get("question"):
+        return question
+    _throttle()
     q = fetch_question(enter_code, block_id, question_id)
-    question_text = q["question"]["DE"]
-    q_type = q.get("question_type")
-
-    # Extract raw answers once
-    raw_answers = []
-    for event in events:
-        content = event.get("content", {})
-        ans = (
-            content.get("answer", {})
-            .get("0", {})
-            .get("0", [{}])[0]
-            .get("answer")
-        )
-        if ans is not None:
-            raw_answers.append(ans)
-
-    # Choice questions (single/multi) -> count per option index
-    if q_type and q_type.startswith("Choice"):
-        options_cfg = q.get("config", {}).get("options", {})
-        option_labels = [v["DE"] for _, v in options_cfg.items()]
+    if not q:
+        raise ValueError(f"cannot fetch question {block_id}.{question_id}")
+    return q
 
-        counts = {}
-        for ans in raw_answers:
-            counts[ans] = counts.get(ans, 0) + 1
 
-        result_lines = [
-            f"\nResults for Survey {enter_code}",
-            f"Block: {block_id}",
-            f"Question: {question_text}",
-            "-----------------------------------",
+def fetch_question_tally(enter_code, block_id, question_id, question=None):
+    """
+    Question details and its up-to-date tally from the results store.
+    Pass the question from the vote structure to skip the fetch_question
+    call when it already has type and config. Choice and slider questions
+    of a closed survey are tallied from the event store's columns. Raises
+    ValueError when the analysis cannot be fetched.
+    """
+    q = None
+    if _is_stored(enter_code, block_id, question_id):
+        q = question_meta(enter_code, block_id, question_id, question)
+        q_type = q.get("question_type") or ""
+        num_options = len((q.get("config") or {}).get("options") or {})
+        # option bitsets are stored in 64 bits
+        if q_type == "RangeSlider" or (q_type.startswith("Choice") and num_options <= 64):
+            return q, results_store.load_columns(enter_code, block_id, question_id, q_type, event_store, num_options)
+
+    events, fetched_at = _get_events(enter_code, block_id, question_id)
+    q = q or question_meta(enter_code, block_id, question_id, question)
+
+    # Only events past the stored cursor are counted; our queued ballots are included
+    tally = results_store.update(enter_code, block_id, question_id, q.get("question_type"), events, fetched_at)
+    return q, tally
+
+
+def fetch_survey_tallies(enter_code, blocks, keys):
+    """[(question, tally)] for the (block_id, q_id) keys, fetched concurrently and returned in order"""
+    def fetch(key):
+        return fetch_question_tally(enter_code, key[0], key[1], blocks[key[0]]["questions"][key[1]])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(RESULT_CONCURRENCY, len(keys)))) as pool:
+        return list(pool.map(fetch, keys))
+
+
+def question_result(enter_code, block_id=0, question_id=0, question=None):
+    """
+    Structured result of one question: text, type, responses and, by type,
+    option counts (plus selection counts and top pairs for ChoiceMulti),
+    slider statistics, or top terms and phrases. A question whose analysis
+    cannot be fetched has only "error".
+    """
+    result = {"block": str(block_id), "question": str(question_id)}
+    try:
+        q, tally = fetch_question_tally(enter_code, block_id, question_id, question)
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+    q_type = q.get("question_type") or ""
+    result.update(text=q["question"]["DE"], type=q_type, responses=tally.responses)
+
+    if q_type.startswith("Choice"):
+        options_cfg = q.get("config", {}).get("options", {})
+        option_labels = [v["DE"] for _, v in options_cfg.items()]
+        counts = tally.option_counts
+        if q_type == "ChoiceMulti" and tally.selections:
+            # every selection of every response, each option at most once per respondent
+            stats = multi_choice_statistics(tally.selections, len(option_labels))
+            counts = {str(i): n for i, n in enumerate(stats["option_counts"])}
+            result["selection_counts"] = {str(k): n for k, n in stats["selection_counts"].items()}
+            result["pairs"] = [{"options": [i, j], "count": n} for i, j, n in top_pairs(stats["co_selection"])]
+        result["options"] = [
+            {"label": label, "count": counts.get(str(idx), 0)} for idx, label in enumerate(option_labels)
+        ]
+    elif q_type == "RangeSlider":
+        stats = range_statistics(tally.values, q.get("config", {}).get("range_config"))
+        if stats:
+            # string keys, so the document is the same before and after a JSON round trip
+            stats["percentiles"] = {str(p): v for p, v in stats["percentiles"].items()}
+        result["stats"] = stats
+    elif tally.text is not None and tally.text.answers:
+        result["top_terms"] = [{"term": term, "count": n} for term, n, _ in tally.text.terms.top(TOP_TERMS)]
+        result["top_phrases"] = [
+            {"term": term, "count": n} for term, n, _ in tally.text.bigrams.top(TOP_TERMS) if n > 1
         ]
+    return result
+
 
-        total_votes = 0
-        for idx, opt_text in enumerate(option_labels):
-            votes = counts.get(str(idx), 0)
-            total_votes += votes
-            result_lines.append(f"{opt_text}: {votes} votes")
+def render_question_result(enter_code, result):
+    """Chat text for one question_result"""
+    if "error" in result:
+        return result["error"]
+    if not result["responses"]:
+        return "Not enough responses yet."
+    header = [
+        f"\nResults for Survey {enter_code}",
+        f"Block: {result['block']}",
+        f"Question: {result['text']}",
+    ]
 
+    if "options" in result:
+        result_lines = header + ["-----------------------------------"]
+        for option in result["options"]:
+            result_lines.append(f"{option['label']}: {option['count']} votes")
         result_lines.append("-----------------------------------")
-        result_lines.append(f"Total responses: {total_votes}")
+        result_lines.append(f"Total responses: {result['responses']}")
+
+        if "selection_counts" in result:
+            result_lines.append("Options chosen per response: " + ", ".join(
+                f"{k}: {n}" for k, n in result["selection_counts"].items()
+            ))
+            if result["pairs"]:
+                result_lines.append("Most often chosen together:")
+                for pair in result["pairs"]:
+                    i, j = pair["options"]
+                    labels = result["options"]
+                    result_lines.append(f"  {labels[i]['label']} + {labels[j]['label']}: {pair['count']}")
         return "\n".join(result_lines)
 
-    # RangeSlider -> numeric stats
-    if q_type == "RangeSlider":
-        values = []
-        for ans in raw_answers:
-            try:
-                values.append(float(ans))
-            except ValueError:
-                pass
-
-        if not values:
-            return (
-                f"\nResults for Survey {enter_code}\n"
-                f"Block: {block_id}\n"
-                f"Question: {question_text}\n"
-                "No numeric answers yet."
-            )
-
-        avg = sum(values) / len(values)
-        result_lines = [
-            f"\nResults for Survey {enter_code}",
-            f"Block: {block_id}",
-            f"Question: {question_text}",
+    if "stats" in result:
+        stats = result["stats"]
+        if not stats:
+            return "\n".join(header + ["No numeric answers yet."])
+        result_lines = header + [
             "-----------------------------------",
-            f"Responses: {len(values)}",
-            f"Average: {avg:.2f}",
+            f"Responses: {stats['count']}",
+            f"Average: {stats['mean']:.2f}",
+            f"Median: {stats['median']:g}",
+            f"Std. deviation: {stats['std']:.2f}",
+            f"Min / Max: {stats['min']:g} / {stats['max']:g}",
+            "Percentiles: " + ", ".join(f"P{p} {v:g}" for p, v in stats["percentiles"].items()),
+            "Distribution:",
         ]
+        for row in stats["histogram"]:
+            label = f"{row['low']:g}" if row["low"] == row["high"] else f"{row['low']:g}–{row['high']:g}"
+            result_lines.append(f"  {label}: {row['count']}")
         return "\n".join(result_lines)
 
     # TextQuestion or others -> just count of answers
-    result_lines = [
-        f"\nResults for Survey {enter_code}",
-        f"Block: {block_id}",
-        f"Question: {question_text}",
+    result_lines = header + [
         "-----------------------------------",
-        f"Text responses: {len(raw_answers)}",
+        f"Text responses: {result['responses']}",
     ]
+    if result.get("top_terms"):
+        result_lines.append("Top terms: " + ", ".join(f"{t['term']} ({t['count']})" for t in result["top_terms"]))
+    if result.get("top_phrases"):
+        result_lines.append("Top phrases: " + ", ".join(f"{t['term']} ({t['count']})" for t in result["top_phrases"]))
     return "\n".join(result_lines)
 
 
-def get_full_survey_result(enter_code):
+def get_survey_results(enter_code, block_id=0, question_id=0, question=None):
+    """Result text for one question"""
+    return render_question_result(enter_code, question_result(enter_code, block_id, question_id, question))
+
+
+def get_survey_document(enter_code, concurrency=None):
+    """
+    Structured results of every question of a survey:
+    {"survey", "blocks": [{"id", "title", "questions": [question_result]}], "etag"}.
+    Questions are fetched concurrently (at most `concurrency`, default
+    RESULT_CONCURRENCY) and listed in block/question order. The etag is a
+    hash of everything else in the document, so it changes exactly when an
+    aggregate, label or question text does. Raises ValueError when the
+    survey structure cannot be loaded.
+    """
     blocks = fetch_vote_structure(enter_code)
     if not blocks:
-        return f"Cannot load structure for survey {enter_code}"
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
 
-    lines = [f"Results for survey {enter_code}"]
+    keys = []
+    for block_id in sorted(blocks.keys(), key=lambda x: int(x)):
+        questions = blocks[block_id].get("questions", {})
+        for q_id in sorted(questions.keys(), key=lambda x: int(x)):
+            keys.append((block_id, q_id))
+
+    def fetch(key):
+        block_id, q_id = key
+        return question_result(enter_code, block_id, q_id, blocks[block_id]["questions"][q_id])
+
+    workers = max(1, min(concurrency or RESULT_CONCURRENCY, len(keys) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(zip(keys, pool.map(fetch, keys)))
 
+    document = {"survey": enter_code, "blocks": []}
     for block_id in sorted(blocks.keys(), key=lambda x: int(x)):
         block = blocks[block_id]
-        block_title = (
-            block.get("title", {}).get("DE")
-            or block.get("title", {}).get("EN")
-            or f"Block {block_id}"
-        )
-        lines.append(f"\n=== Block {block_id}: {block_title} ===\n")
-
         questions = block.get("questions", {})
-        for q_id in sorted(questions.keys(), key=lambda x: int(x)):
-            result_text = get_survey_results(enter_code, block_id, q_id)
-            if isinstance(result_text, tuple):
-                result_text = " ".join(str(p) for p in result_text)
-            lines.append(result_text)
+        document["blocks"].append({
+            "id": block_id,
+            "title": (
+                block.get("title", {}).get("DE")
+                or block.get("title", {}).get("EN")
+                or f"Block {block_id}"
+            ),
+            "questions": [results[(block_id, q_id)] for q_id in sorted(questions.keys(), key=lambda x: int(x))],
+        })
+    document["etag"] = document_etag(document)
+    return document
 
+
+def document_etag(document):
+    """Strong ETag value: hash of the canonical JSON of the document without its etag"""
+    body = {k: v for k, v in document.items() if k != "etag"}
+    canonical = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_survey_document(document):
+    """Chat report for a get_survey_document result"""
+    lines = [f"Results for survey {document['survey']}"]
+    for block in document["blocks"]:
+        lines.append(f"\n=== Block {block['id']}: {block['title']} ===\n")
+        for result in block["questions"]:
+            lines.append(render_question_result(document["survey"], result))
     return "\n".join(lines)
+
+
+def get_full_survey_result(enter_code, concurrency=None):
+    """Result report for every question of a survey (see get_survey_document)"""
+    try:
+        return render_survey_document(get_survey_document(enter_code, concurrency))
+    except ValueError as e:
+        return str(e)
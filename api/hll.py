@@ -0,0 +1,80 @@
+"""
+HyperLogLog distinct counter
+
+A fixed array of 2**precision one-byte registers (4 KB at the default
+precision 12) estimates how many distinct items were added, with a
+standard error of about 1.04 / sqrt(2**precision) (1.6 %). Adding the same
+item again changes nothing, and two sketches of the same precision merge
+into the sketch of the union by taking the register-wise maximum.
+"""
+import hashlib
+import math
+
+HLL_PRECISION = 12
+
+
+def _hash64(item):
+    return int.from_bytes(hashlib.blake2b(str(item).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Distinct count estimate in 2**precision bytes"""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError("register count does not match precision")
+
+    def add(self, item):
+        h = _hash64(item)
+        rest_bits = 64 - self.precision
+        index = h >> rest_bits
+        rest = h & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1  # position of the first 1-bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def count(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def copy(self):
+        return HyperLogLog(self.precision, self.registers)
+
+    def standard_error(self):
+        return 1.04 / math.sqrt(self.size)
+
+    def to_bytes(self):
+        return bytes([self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data[0], data[1:])
+
+
+def union(sketches, precision=HLL_PRECISION):
+    """A new sketch counting the union of the given ones"""
+    merged = HyperLogLog(precision)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,166 @@
+"""
+Live results over Server-Sent Events
+
+Every survey someone is watching has one poll thread. Each poll builds a
+compact snapshot of all question tallies (one upstream fetch per question,
+shared by every subscriber) and pushes only the questions that changed
+since the previous poll. A new subscriber first gets the latest full
+snapshot. The thread stops once the last subscriber has disconnected.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+
+from api import get_result
+from api.choice_stats import multi_choice_statistics
+from api.vote_runtime import get_cached_vote_structure, iter_questions
+
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "2"))
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments on a quiet stream
+SUBSCRIBER_QUEUE = 50  # pending events per subscriber before it is resynced
+
+
+def question_snapshot(q, tally):
+    """Compact summary of one question's tally, compared between polls"""
+    q_type = q.get("question_type") or ""
+    summary = {"text": (q.get("question") or {}).get("DE", ""), "type": q_type, "responses": tally.responses}
+    if q_type.startswith("Choice"):
+        labels = [v.get("DE", k) for k, v in ((q.get("config") or {}).get("options") or {}).items()]
+        if q_type == "ChoiceMulti" and tally.selections:
+            counts = multi_choice_statistics(tally.selections, len(labels))["option_counts"]
+        else:
+            counts = [tally.option_counts.get(str(i), 0) for i in range(len(labels))]
+        summary["options"] = [{"label": label, "count": n} for label, n in zip(labels, counts)]
+    elif q_type == "RangeSlider":
+        summary["mean"] = round(tally.mean(), 2) if tally.values else None
+    elif tally.text is not None:
+        summary["top_terms"] = [term for term, _, _ in tally.text.terms.top(5)]
+    return summary
+
+
+def survey_snapshot(enter_code):
+    """{"<block>.<question>": question_snapshot} for every question of the survey"""
+    blocks = get_cached_vote_structure(enter_code)
+    if not blocks:
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
+    keys = list(iter_questions(blocks))
+    fetched = get_result.fetch_survey_tallies(enter_code, blocks, keys)
+    return {f"{b}.{q_id}": question_snapshot(q, tally) for (b, q_id), (q, tally) in zip(keys, fetched)}
+
+
+def diff_snapshots(old, new):
+    """Questions whose summary changed (or appeared) between two snapshots"""
+    return {key: summary for key, summary in new.items() if old.get(key) != summary}
+
+
+def format_event(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class LiveResults:
+    """Shared per-survey poll loops fanning out to SSE subscribers"""
+
+    def __init__(self, snapshot=survey_snapshot, interval=None):
+        self.snapshot = snapshot
+        self.interval = LIVE_POLL_INTERVAL if interval is None else interval
+        self._feeds = {}  # code -> {"subscribers": set of queues, "latest": snapshot or None}
+        self._lock = threading.Lock()
+        self.polls = 0
+
+    def subscribe(self, enter_code):
+        """Queue of (event, data) for the survey; starts its poll loop if needed"""
+        key = enter_code.lower()
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE)
+        with self._lock:
+            feed = self._feeds.get(key)
+            if feed is None:
+                feed = self._feeds[key] = {"subscribers": set(), "latest": None}
+                threading.Thread(
+                    target=self._poll, args=(key, feed), name=f"votebot-live-{key}", daemon=True
+                ).start()
+            elif feed["latest"] is not None:
+                subscriber.put(("snapshot", {"survey": key, "questions": feed["latest"]}))
+            feed["subscribers"].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, enter_code, subscriber):
+        with self._lock:
+            feed = self._feeds.get(enter_code.lower())
+            if feed:
+                feed["subscribers"].discard(subscriber)
+
+    def subscriber_count(self, enter_code):
+        with self._lock:
+            feed = self._feeds.get(enter_code.lower())
+            return len(feed["subscribers"]) if feed else 0
+
+    def stream(self, enter_code):
+        """SSE text chunks for one client; unsubscribes when the client goes away"""
+        subscriber = self.subscribe(enter_code)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    kind, data = subscriber.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(kind, data)
+        finally:
+            self.unsubscribe(enter_code, subscriber)
+
+    def _poll(self, key, feed):
+        last_error = None
+        while True:
+            with self._lock:
+                if not feed["subscribers"]:
+                    del self._feeds[key]
+                    return
+            started = time.monotonic()
+            try:
+                self.polls += 1
+                current = self.snapshot(key)
+            except Exception as e:
+                if not isinstance(e, ValueError):
+                    traceback.print_exc()
+                if str(e) != last_error:
+                    last_error = str(e)
+                    with self._lock:
+                        subscribers = list(feed["subscribers"])
+                    self._publish(subscribers, "error", {"survey": key, "error": last_error}, feed)
+            else:
+                last_error = None
+                # Swap in the new snapshot before publishing, so a client joining now gets
+                # either this snapshot on subscribe or the diff below, never neither
+                with self._lock:
+                    previous, feed["latest"] = feed["latest"], current
+                    subscribers = list(feed["subscribers"])
+                if previous is None:
+                    self._publish(subscribers, "snapshot", {"survey": key, "questions": current}, feed)
+                else:
+                    changed = diff_snapshots(previous, current)
+                    if changed:
+                        self._publish(subscribers, "update", {"survey": key, "questions": changed}, feed)
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _publish(self, subscribers, kind, data, feed):
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((kind, data))
+            except queue.Full:
+                # A slow client missed diffs; replace its backlog with one full snapshot
+                _drain(subscriber)
+                with self._lock:
+                    latest = feed["latest"] or {}
+                subscriber.put_nowait(("snapshot", {"survey": data["survey"], "questions": latest}))
+
+
+def _drain(subscriber):
+    while True:
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            return
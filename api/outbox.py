@@ -0,0 +1,246 @@
+"""
+Durable answer-submission outbox
+
+Completed ballots are written to a local SQLite outbox and acknowledged to
+the voter right away. Worker threads drain the outbox into Vote2 with
+retries and exponential backoff. Per survey, ballots are sent in the order
+they were queued: only the oldest unsent ballot of a survey is eligible.
+
+Ballots may carry an idempotency key (see vote_runtime.ballot_key). A key
+seen within DEDUPE_TTL is not queued twice, and a queued ballot whose key
+already reached Vote2 is marked sent without another upstream call.
+"""
+import json
+import sqlite3
+import threading
+import time
+import traceback
+
+from api.vote_runtime import submit_all_answers, was_submitted, remember_submission
+
+OUTBOX_WORKERS = 2
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 1.0  # seconds; doubles with every failed attempt
+BACKOFF_MAX = 300.0
+POLL_INTERVAL = 1.0  # seconds an idle worker waits before checking again
+DEDUPE_TTL = 3600  # seconds a ballot key blocks identical ballots
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enter_code TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT,
+    dedupe_key TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, enter_code, id);
+"""
+
+
+class AnswerOutbox:
+    """SQLite-backed queue of ballots waiting to be submitted to Vote2"""
+
+    def __init__(self, path, submit=submit_all_answers, workers=OUTBOX_WORKERS,
+                 on_queued=None, on_sent=None, on_failed=None):
+        self.path = path
+        self.submit = submit
+        self.workers = workers
+        # Optional callbacks(enter_code, payload, dedupe_key) for the ballot lifecycle
+        self.on_queued = on_queued
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads = []
+        self._stopped = False
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(outbox)")]
+        if "dedupe_key" not in columns:
+            # outbox files created before idempotency keys existed
+            self._db.execute("ALTER TABLE outbox ADD COLUMN dedupe_key TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_dedupe ON outbox (dedupe_key, created_at)")
+        # Ballots claimed by a worker that died with the process go back in line
+        self._db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+
+    def enqueue(self, enter_code, payload, dedupe_key=None):
+        """
+        Persist a ballot and return its outbox id; workers start on first use.
+        A ballot whose dedupe_key was queued within DEDUPE_TTL is not stored
+        again and the id of the earlier entry is returned.
+        """
+        now = time.time()
+        with self._lock:
+            if dedupe_key:
+                row = self._db.execute(
+                    "SELECT id FROM outbox WHERE dedupe_key = ? AND created_at > ? AND status != 'failed' LIMIT 1",
+                    (dedupe_key, now - DEDUPE_TTL)
+                ).fetchone()
+                if row is not None:
+                    return row[0]
+            cur = self._db.execute(
+                "INSERT INTO outbox (enter_code, payload, next_attempt_at, created_at, dedupe_key) VALUES (?, ?, ?, ?, ?)",
+                (enter_code, json.dumps(payload), now, now, dedupe_key)
+            )
+            self._wakeup.notify()
+        if self.on_queued:
+            self.on_queued(enter_code, payload, dedupe_key)
+        self._ensure_workers()
+        return cur.lastrowid
+
+    def key_status(self, dedupe_key):
+        """Status of the newest ballot queued with this key, or None if it was never queued"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status FROM outbox WHERE dedupe_key = ? ORDER BY id DESC LIMIT 1", (dedupe_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def drain(self):
+        """Submit every ballot that is due now, in this thread; returns how many were tried"""
+        tried = 0
+        while True:
+            entry = self._claim()
+            if entry is None:
+                return tried
+            self._process(entry)
+            tried += 1
+
+    def stats(self):
+        """Queue depth and age metrics"""
+        now = time.time()
+        with self._lock:
+            rows = dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            oldest = self._db.execute(
+                "SELECT MIN(created_at) FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()[0]
+        return {
+            "depth": rows.get("pending", 0) + rows.get("sending", 0),
+            "pending": rows.get("pending", 0),
+            "sending": rows.get("sending", 0),
+            "sent": rows.get("sent", 0),
+            "failed": rows.get("failed", 0),
+            "oldest_age_seconds": round(now - oldest, 3) if oldest else 0.0
+        }
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join()
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            for n in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"outbox-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _worker(self):
+        while True:
+            try:
+                entry = self._claim()
+            except Exception:
+                traceback.print_exc()
+                entry = None
+            if entry is not None:
+                self._process(entry)
+                continue
+            with self._lock:
+                if self._stopped:
+                    return
+                self._wakeup.wait(POLL_INTERVAL)
+
+    def _claim(self):
+        # Oldest due ballot that is also the head of its survey's queue
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT id, enter_code, payload, attempts, dedupe_key FROM outbox AS o
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                  AND id = (SELECT MIN(id) FROM outbox
+                            WHERE enter_code = o.enter_code AND status IN ('pending', 'sending'))
+                ORDER BY id LIMIT 1
+                """,
+                (time.time(),)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE outbox SET status = 'sending' WHERE id = ?", (row[0],))
+        return {"id": row[0], "enter_code": row[1], "payload": json.loads(row[2]), "attempts": row[3], "dedupe_key": row[4]}
+
+    def _process(self, entry):
+        # A claimed ballot must never stay in 'sending': that would block its survey's queue
+        try:
+            self._deliver(entry)
+        except Exception:
+            traceback.print_exc()
+            try:
+                with self._lock:
+                    self._db.execute(
+                        "UPDATE outbox SET status = 'pending', next_attempt_at = ? WHERE id = ? AND status = 'sending'",
+                        (time.time() + BACKOFF_BASE, entry["id"])
+                    )
+            except Exception:
+                traceback.print_exc()
+
+    def _deliver(self, entry):
+        key = entry["dedupe_key"]
+        if key and was_submitted(key):
+            self._finish(entry, "sent", error="duplicate suppressed")
+            self._notify(self.on_sent, entry)
+            return
+        try:
+            resp = self.submit(entry["enter_code"], entry["payload"])
+        except Exception as e:
+            error, retry = str(e), True
+        else:
+            if 200 <= resp.status_code < 300:
+                if key:
+                    remember_submission(key)
+                self._finish(entry, "sent")
+                self._notify(self.on_sent, entry)
+                return
+            error = f"{resp.status_code} {resp.text[:200]}"
+            # Other client errors will not succeed on retry
+            retry = resp.status_code == 429 or resp.status_code >= 500
+
+        attempts = entry["attempts"] + 1
+        if retry and attempts < MAX_ATTEMPTS:
+            delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+            with self._lock:
+                self._db.execute(
+                    "UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, time.time() + delay, error, entry["id"])
+                )
+        else:
+            print(f"Outbox: giving up on ballot {entry['id']} for {entry['enter_code']}: {error}")
+            self._finish(entry, "failed", attempts, error)
+            self._notify(self.on_failed, entry)
+
+    @staticmethod
+    def _notify(callback, entry):
+        # The ballot's status is already recorded; a failing callback must not change it
+        if callback is None:
+            return
+        try:
+            callback(entry["enter_code"], entry["payload"], entry["dedupe_key"])
+        except Exception:
+            traceback.print_exc()
+
+    def _finish(self, entry, status, attempts=None, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, sent_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts if attempts is not None else entry["attempts"] + 1, time.time(), error, entry["id"])
+            )
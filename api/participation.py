@@ -0,0 +1,113 @@
+"""
+Distinct-respondent counting
+
+One HyperLogLog sketch per (survey, question, day) for respondents seen in
+Vote2 analysis events (fed by the results store as it consumes new events
+or reads a closed survey's stored columns),
+and one per (survey, day) for chat voters completing a ballot (fed by the
+ballot log, including ballots replayed from it on startup). Any selection
+of surveys, questions and days is answered by merging the matching
+sketches, so participation across a whole program costs a few KB per
+sketch instead of a set of every respondent id.
+
+Chat voters are counted separately: their chat session and their Vote2
+participant id cannot be matched, so adding both would count people twice.
+"""
+import math
+import threading
+
+from api.hll import HLL_PRECISION, HyperLogLog, union
+from api.results_store import event_respondent, event_time
+
+WINDOW_SECONDS = 86400  # sketches are kept per day
+VOTE2 = "vote2"
+CHAT = "chat"
+
+
+class ParticipationCounter:
+    """HyperLogLog sketches keyed by (code, source, block, question, window)"""
+
+    def __init__(self, precision=HLL_PRECISION, window=WINDOW_SECONDS):
+        self.precision = precision
+        self.window = window
+        self._sketches = {}
+        self._lock = threading.Lock()
+
+    def add_events(self, enter_code, block_id, q_id, events):
+        """Results store listener: count the respondents of newly seen events"""
+        with self._lock:
+            for event in events:
+                respondent = event_respondent(event)
+                if respondent is None:
+                    continue
+                when = event_time(event)
+                window = self._window(None if math.isnan(when) else when)
+                self._sketch(enter_code, VOTE2, str(block_id), str(q_id), window).add(respondent)
+
+    def add_columns(self, enter_code, block_id, q_id, respondent_ids, columns):
+        """Results store column listener: count the respondents of a question read from the event store"""
+        seen = set(zip(columns["respondent"].tolist(), columns["timestamp"].tolist()))
+        with self._lock:
+            for number, when in seen:
+                if number < 0:
+                    continue
+                window = self._window(None if math.isnan(when) else when)
+                self._sketch(enter_code, VOTE2, str(block_id), str(q_id), window).add(respondent_ids[number])
+
+    def add_chat_ballot(self, enter_code, session, at=None):
+        """Ballot log listener: count a chat voter who completed a ballot"""
+        with self._lock:
+            self._sketch(enter_code, CHAT, "", "", self._window(at)).add(session)
+
+    def merged(self, codes=None, questions=None, since=None, until=None, source=VOTE2):
+        """
+        Union sketch of the selection. codes/questions (as (block, question)
+        pairs) of None mean all; since/until are epoch seconds bounding the
+        day windows; sketches of events without a timestamp only count when
+        no time bound is given.
+        """
+        codes = {c.lower() for c in codes} if codes is not None else None
+        questions = {(str(b), str(q)) for b, q in questions} if questions is not None else None
+        with self._lock:
+            selected = [
+                sketch for (code, src, block, question, window), sketch in self._sketches.items()
+                if src == source
+                and (codes is None or code in codes)
+                and (questions is None or (block, question) in questions)
+                and self._in_range(window, since, until)
+            ]
+            return union(selected, self.precision)
+
+    def estimate(self, codes=None, questions=None, since=None, until=None, source=VOTE2):
+        return self.merged(codes, questions, since, until, source).count()
+
+    def surveys(self):
+        with self._lock:
+            return sorted({key[0] for key in self._sketches})
+
+    def memory_bytes(self):
+        with self._lock:
+            return sum(len(sketch.registers) for sketch in self._sketches.values())
+
+    def _sketch(self, enter_code, source, block_id, q_id, window):
+        # Called with _lock held
+        key = (enter_code.lower(), source, block_id, q_id, window)
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = HyperLogLog(self.precision)
+        return sketch
+
+    def _window(self, when):
+        return None if when is None else int(when // self.window) * self.window
+
+    def _in_range(self, window, since, until):
+        if since is None and until is None:
+            return True
+        if window is None:
+            return False
+        if since is not None and window + self.window <= since:
+            return False
+        return until is None or window < until
+
+
+participation = ParticipationCounter()
@@ -0,0 +1,113 @@
+"""
+RangeSlider statistics
+
+Count, mean, median, standard deviation, min/max, percentiles and a
+histogram over the question's range_config. Values are converted to a
+NumPy array once (a buffer copy from the results store's array("d")); without
+NumPy the same numbers come from a single sort in pure Python.
+"""
+import bisect
+import math
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+DEFAULT_PERCENTILES = (10, 25, 75, 90)
+MAX_HISTOGRAM_BINS = 10
+
+
+def histogram_bins(range_config, bins=None):
+    """
+    Histogram edges over the slider range and the (low, high) slider values
+    each bin covers. Small sliders get one bin per position; larger ones are
+    grouped into at most `bins` bins of whole steps.
+    """
+    range_config = range_config or {}
+    low = float(range_config.get("min", 0))
+    high = float(range_config.get("max", 100))
+    step = float(range_config.get("stepsize") or 1)
+    positions = max(1, int(round((high - low) / step)) + 1)
+    bins = max(1, min(bins or MAX_HISTOGRAM_BINS, positions))
+
+    if positions <= bins:
+        edges = [low + (i - 0.5) * step for i in range(positions + 1)]
+        covers = [(low + i * step, low + i * step) for i in range(positions)]
+        return edges, covers
+
+    per_bin = math.ceil((positions - 1) / bins)
+    starts = [low + i * per_bin * step for i in range(math.ceil((positions - 1) / per_bin))]
+    covers = [(start, start + (per_bin - 1) * step) for start in starts[:-1]] + [(starts[-1], high)]
+    return starts + [high], covers
+
+
+def range_statistics(values, range_config=None, percentiles=DEFAULT_PERCENTILES, bins=None, use_numpy=True):
+    """
+    Summary statistics for numeric answers. Standard deviation is the
+    population value (ddof=0); percentiles interpolate linearly like
+    numpy.percentile. Returns None when there are no values.
+    """
+    if len(values) == 0:
+        return None
+    edges, covers = histogram_bins(range_config, bins)
+    if np is not None and use_numpy:
+        stats = _numpy_statistics(values, edges, percentiles)
+    else:
+        stats = _python_statistics(values, edges, percentiles)
+    stats["histogram"] = [
+        {"low": low, "high": high, "count": count} for (low, high), count in zip(covers, stats["histogram"])
+    ]
+    return stats
+
+
+def _numpy_statistics(values, edges, percentiles):
+    # A copy, not a view: the results store keeps appending to its array("d")
+    arr = np.array(values, dtype=np.float64)
+    quantiles = np.percentile(arr, [50, *percentiles])
+    counts, _ = np.histogram(arr, bins=edges)
+    return {
+        "count": int(arr.size),
+        "mean": float(arr.mean()),
+        "median": float(quantiles[0]),
+        "std": float(arr.std()),
+        "min": float(arr.min()),
+        "max": float(arr.max()),
+        "percentiles": {p: float(v) for p, v in zip(percentiles, quantiles[1:])},
+        "histogram": counts.tolist(),
+    }
+
+
+def _python_statistics(values, edges, percentiles):
+    ordered = sorted(values)
+    n = len(ordered)
+    mean = math.fsum(ordered) / n
+    variance = math.fsum((v - mean) ** 2 for v in ordered) / n
+
+    def percentile(p):
+        pos = (n - 1) * p / 100
+        lower = int(pos)
+        upper = min(lower + 1, n - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+    # Same binning as numpy.histogram: right-open bins, the last one closed
+    counts = []
+    for i in range(len(edges) - 1):
+        lo = bisect.bisect_left(ordered, edges[i])
+        if i == len(edges) - 2:
+            hi = bisect.bisect_right(ordered, edges[i + 1])
+        else:
+            hi = bisect.bisect_left(ordered, edges[i + 1])
+        counts.append(hi - lo)
+
+    return {
+        "count": n,
+        "mean": mean,
+        "median": percentile(50),
+        "std": math.sqrt(variance),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "percentiles": {p: percentile(p) for p in percentiles},
+        "histogram": counts,
+    }
+
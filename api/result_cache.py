@@ -0,0 +1,109 @@
+"""
+Result cache with stale-while-revalidate
+
+Full survey results are cached per enter code. An entry younger than
+RESULT_CACHE_TTL is served as is. An older one is still served, up to
+RESULT_CACHE_MAX_STALE seconds past its TTL, while one background refresh
+recomputes it; beyond that the caller waits for a fresh result. Concurrent
+misses for the same survey share one computation.
+
+Queuing one of our own ballots invalidates the survey's entry, so the next
+request recomputes and the ballot shows up (via the results store overlay).
+"""
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "5"))
+RESULT_CACHE_MAX_STALE = float(os.getenv("RESULT_CACHE_MAX_STALE", "60"))
+REFRESH_WORKERS = 2
+
+
+class ResultCache:
+    """compute(enter_code) results per survey, refreshed at most once per TTL"""
+
+    def __init__(self, compute, ttl=None, max_stale=None, clock=time.monotonic):
+        self.compute = compute
+        self.ttl = RESULT_CACHE_TTL if ttl is None else ttl
+        self.max_stale = RESULT_CACHE_MAX_STALE if max_stale is None else max_stale
+        self.clock = clock
+        self._entries = {}  # code -> (value, computed_at, generation)
+        self._inflight = {}  # code -> (Future, generation) of the running computation
+        self._generations = {}  # code -> bumped by invalidate()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="votebot-result-refresh")
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+    def get(self, enter_code):
+        """Cached result for the survey; computes it when missing or too stale"""
+        key = enter_code.lower()
+        with self._lock:
+            generation = self._generations.get(key, 0)
+            entry = self._entries.get(key)
+            if entry and entry[2] == generation:
+                value, computed_at, _ = entry
+                age = self.clock() - computed_at
+                if age <= self.ttl:
+                    self.counters["hits"] += 1
+                    return value
+                if age <= self.ttl + self.max_stale:
+                    self.counters["stale_hits"] += 1
+                    if key not in self._inflight:
+                        self.counters["refreshes"] += 1
+                        future = self._start(key, generation)
+                        self._executor.submit(self._refresh, key, enter_code, generation, future)
+                    return value
+            self.counters["misses"] += 1
+            running = self._inflight.get(key)
+            # Join a computation only if it started after the last invalidation
+            owner = running is None or running[1] != generation
+            future = self._start(key, generation) if owner else running[0]
+
+        if owner:
+            self._run(key, enter_code, generation, future)
+        return future.result()
+
+    def invalidate(self, enter_code):
+        """Drop the survey's entry; a computation already running is not stored"""
+        key = enter_code.lower()
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), refreshing=len(self._inflight))
+
+    def _start(self, key, generation):
+        # Called with _lock held
+        future = Future()
+        self._inflight[key] = (future, generation)
+        return future
+
+    def _refresh(self, key, enter_code, generation, future):
+        try:
+            self._run(key, enter_code, generation, future)
+        except Exception:
+            # The stale entry stays; its max staleness bound still applies
+            traceback.print_exc()
+
+    def _run(self, key, enter_code, generation, future):
+        started = self.clock()  # the result is as old as the data it was computed from
+        try:
+            value = self.compute(enter_code)
+        except Exception as e:
+            self._finish(key, future)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = (value, started, generation)
+        self._finish(key, future)
+        future.set_result(value)
+
+    def _finish(self, key, future):
+        with self._lock:
+            if self._inflight.get(key, (None,))[0] is future:
+                del self._inflight[key]
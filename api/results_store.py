@@ -0,0 +1,450 @@
+"""
+Incremental results store
+
+Keeps a running tally per (survey, block, question): option counts for
+choice questions, count/sum/sum of squares plus the raw values for
+RangeSlider, and a response count with bounded term/bigram sketches for
+text questions (see api/text_stats.py), and a per-minute timeline of
+responses and options (see api/timeline.py). Each update only consumes events
+past the question's cursor (event count, checked against the id of the
+last event seen), so repeated result checks cost the delta.
+
+Respondents are dictionary-encoded to integers and stored in a column
+parallel to each question's per-response values, so answers to different
+questions can be joined by respondent (see api/crosstab.py). Surveys are
+created with editable answers, so a respondent's later event replaces
+their earlier answer: its contribution is subtracted from the aggregates
+and its row in the columns is reused by the last row (O(1) per edit).
+To make that possible each respondent's latest contribution is kept: the
+option keys, value or, for text questions, the answer's interned tokens
+(never the raw text), so memory grows with respondents, not with answers.
+Respondent numbers are assigned per survey and dropped by clear().
+
+Questions of closed surveys in the local event store are tallied straight
+from its memory-mapped columns (respondent, value, option bitset) in a
+few vectorized passes instead of rebuilding and replaying every event.
+
+Ballots submitted through our own outbox are ingested right away as an
+overlay and dropped from it once Vote2 has them, so results include them
+before the next analysis fetch and never count them twice.
+"""
+import math
+import threading
+import time
+from array import array
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional: from_columns falls back to a Python loop
+    np = None
+
+from api.choice_stats import selection_mask
+from api.text_stats import TextSummary
+from api.timeline import Timeline, latest_rows, options_of_mask, timeline_from_columns
+
+
+def event_answers(event):
+    """The answer list of one analysis event"""
+    return (event.get("content") or {}).get("answer", {}).get("0", {}).get("0") or []
+
+
+def event_respondent(event):
+    """Who gave an analysis event: participant/submission id, else the event id"""
+    for field in ("participant", "participant_id", "respondent", "submission_id", "id"):
+        if event.get(field) is not None:
+            return str(event[field])
+    return None
+
+
+def event_time(event):
+    """Epoch seconds of an event from a numeric or ISO 8601 timestamp; NaN if missing"""
+    raw = event.get("timestamp") or event.get("created_at")
+    if raw is None:
+        return math.nan
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(raw).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return math.nan
+
+
+def payload_answers(payload):
+    """Yield (block_id, q_id, answer list) from an answer payload"""
+    for block_id, block in (payload.get("blocks") or {}).items():
+        for q_id, question in (block.get("questions") or {}).items():
+            for answer in question.get("answers") or []:
+                yield block_id, q_id, answer.get("0", {}).get("0") or []
+
+
+class QuestionTally:
+    """
+    Running aggregates for one question. Each respondent counts once with
+    their latest answer: `latest` maps a respondent number to what their
+    current answer contributed, and a later answer first subtracts that
+    contribution, so an edit costs O(1) instead of a recount.
+    """
+
+    def __init__(self, q_type=""):
+        self.q_type = q_type or ""
+        self.cursor = 0  # events consumed
+        self.last_id = None  # id of the last consumed event
+        self.responses = 0
+        self.option_counts = {}  # answer -> count (choice questions)
+        self.values = array("d")  # numeric answers (RangeSlider)
+        self.selections = array("Q")  # one option bitset per response (ChoiceMulti)
+        self.choices = array("q")  # option index per response, -1 if unreadable (ChoiceSingle)
+        # respondent number per entry of the column above (values for RangeSlider,
+        # every response for TextQuestion)
+        self.respondents = array("q")
+        self.total = 0.0
+        self.total_sq = 0.0
+        # top terms and bigrams in constant memory (TextQuestion)
+        self.text = TextSummary() if self.q_type == "TextQuestion" else None
+        self.timeline = Timeline()  # responses and chosen options per minute
+        # respondent number -> (column index or -1, option_counts keys, value, when, options, text tokens)
+        self.latest = {}
+        self._latest_shared = False  # copy(): latest still belongs to the original
+        self.columnar = False  # built by from_columns(): no `latest`, so it cannot take edits
+
+    @classmethod
+    def from_columns(cls, q_type, columns, numbers, num_options=0, use_numpy=True):
+        """
+        Tally of a stored choice or RangeSlider question built from event
+        store columns ({"respondent", "timestamp", "value", "mask"}), where
+        numbers[n] is this store's number for stored respondent n. Only each
+        respondent's last row counts, like add() with edits. Choice answers
+        come from the option bitsets, so option_counts keys are the option
+        indexes as strings.
+        """
+        tally = cls(q_type)
+        tally.columnar = True
+        choice = tally.q_type.startswith("Choice")
+        stored = columns["respondent"]
+        tally.timeline = timeline_from_columns(
+            columns["timestamp"], columns["mask"] if choice else None, num_options if choice else 0, stored,
+            use_numpy=use_numpy
+        )
+        mapping = list(numbers) + [-1]  # stored -1 (no respondent) maps to the last entry
+        if np is not None and use_numpy:
+            tally._fill_numpy(columns, np.asarray(mapping, dtype=np.int64))
+        else:
+            tally._fill_python(columns, mapping)
+        return tally
+
+    def _fill_numpy(self, columns, mapping):
+        keep = latest_rows(np.asarray(columns["respondent"], dtype=np.int64))
+        respondents = mapping[np.asarray(columns["respondent"], dtype=np.int64)[keep]]
+        self.responses = int(keep.sum())
+        if self.q_type == "RangeSlider":
+            values = np.asarray(columns["value"], dtype=np.float64)[keep]
+            numeric = ~np.isnan(values)
+            values, respondents = values[numeric], respondents[numeric]
+            self.values.frombytes(values.tobytes())
+            self.total = float(values.sum())
+            self.total_sq = float(np.dot(values, values))
+        else:
+            masks = np.asarray(columns["mask"], dtype=np.uint64)[keep]
+            highest = int(np.bitwise_or.reduce(masks)) if masks.size else 0
+            for option in range(highest.bit_length()):
+                n = int(((masks >> np.uint64(option)) & np.uint64(1)).sum())
+                if n:
+                    self.option_counts[str(option)] = n
+            if self.q_type == "ChoiceMulti":
+                self.selections.frombytes(masks.tobytes())
+            else:
+                lowest = masks & (~masks + np.uint64(1))
+                choices = np.where(masks == 0, -1, np.log2(np.maximum(lowest, 1).astype(np.float64))).astype(np.int64)
+                self.choices.frombytes(choices.tobytes())
+        self.respondents.frombytes(respondents.tobytes())
+
+    def _fill_python(self, columns, mapping):
+        stored = columns["respondent"].tolist()
+        last = {number: i for i, number in enumerate(stored) if number >= 0}
+        for i, number in enumerate(stored):
+            if number >= 0 and last[number] != i:
+                continue
+            self.responses += 1
+            respondent = mapping[number]
+            if self.q_type == "RangeSlider":
+                value = float(columns["value"][i])
+                if math.isnan(value):
+                    continue
+                self.values.append(value)
+                self.total += value
+                self.total_sq += value * value
+            else:
+                mask = int(columns["mask"][i])
+                options = options_of_mask(mask)
+                if self.q_type == "ChoiceMulti":
+                    self.selections.append(mask)
+                else:
+                    self.choices.append(options[0] if options else -1)
+                for option in options:
+                    self.option_counts[str(option)] = self.option_counts.get(str(option), 0) + 1
+            self.respondents.append(respondent)
+
+    def add(self, ans_list, respondent=-1, when=None):
+        if respondent >= 0 and respondent in self.latest:
+            self._retract(self.latest[respondent])  # an edited answer replaces the earlier one
+        else:
+            self.responses += 1
+        index, keys, value, options, tokens = -1, (), None, (), None
+        if self.q_type.startswith("Choice"):
+            keys = []
+            for ans in ans_list:
+                key = ans.get("answer")
+                if key is not None:
+                    self.option_counts[key] = self.option_counts.get(key, 0) + 1
+                    keys.append(key)
+            if self.q_type == "ChoiceMulti":
+                mask = selection_mask(ans_list)
+                if mask >> 64 and not isinstance(self.selections, list):
+                    self.selections = list(self.selections)  # more than 64 options
+                self.selections.append(mask)
+                options = options_of_mask(mask)
+            else:
+                try:
+                    self.choices.append(int(ans_list[0].get("answer")))
+                except (IndexError, TypeError, ValueError):
+                    self.choices.append(-1)
+                if self.choices[-1] >= 0:
+                    options = (self.choices[-1],)
+            index = len(self.respondents)
+            self.respondents.append(respondent)
+        elif self.q_type == "RangeSlider":
+            for ans in ans_list[:1]:
+                try:
+                    value = float(ans.get("answer"))
+                except (TypeError, ValueError):
+                    continue
+                index = len(self.respondents)
+                self.values.append(value)
+                self.respondents.append(respondent)
+                self.total += value
+                self.total_sq += value * value
+        else:
+            index = len(self.respondents)
+            self.respondents.append(respondent)
+            if self.text is not None:
+                for ans in ans_list[:1]:
+                    tokens = self.text.add(ans.get("answer"))
+        self.timeline.add(when, options)
+        if respondent >= 0:
+            self._own_latest()
+            # tuples of plain values, which the garbage collector stops tracking
+            self.latest[respondent] = (index, tuple(keys), value, when, tuple(options), tokens)
+
+    def _retract(self, contribution):
+        index, keys, value, when, options, tokens = contribution
+        for key in keys:
+            self.option_counts[key] -= 1
+            if not self.option_counts[key]:
+                del self.option_counts[key]
+        if value is not None:
+            self.total -= value
+            self.total_sq -= value * value
+        if tokens:
+            self.text.remove(tokens)
+        self.timeline.remove(when, options)
+        if index >= 0:
+            self._remove_row(index)
+
+    def _remove_row(self, index):
+        # Move the last row into the freed one, keeping the columns parallel
+        column = self._column()
+        last = len(self.respondents) - 1
+        if index != last:
+            moved = self.respondents[last]
+            self.respondents[index] = moved
+            if column is not None:
+                column[index] = column[last]
+            if moved >= 0:
+                self._own_latest()
+                self.latest[moved] = (index, *self.latest[moved][1:])
+        self.respondents.pop()
+        if column is not None:
+            column.pop()
+
+    def _column(self):
+        if self.q_type == "ChoiceMulti":
+            return self.selections
+        if self.q_type.startswith("Choice"):
+            return self.choices
+        if self.q_type == "RangeSlider":
+            return self.values
+        return None
+
+    def _own_latest(self):
+        if self._latest_shared:
+            self.latest = dict(self.latest)
+            self._latest_shared = False
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    def copy(self):
+        other = QuestionTally(self.q_type)
+        other.__dict__.update(self.__dict__)
+        other.option_counts = dict(self.option_counts)
+        other.values = array("d", self.values)
+        other.selections = self.selections[:]
+        other.choices = array("q", self.choices)
+        other.respondents = array("q", self.respondents)
+        if self.text is not None:
+            other.text = self.text.copy()
+        other.timeline = self.timeline.copy()
+        # Entries are immutable tuples. The original keeps writing to its dict;
+        # the copy takes its own before its first write
+        other._latest_shared = True
+        return other
+
+
+class ResultsStore:
+    """Per-question tallies, updated from new analysis events only"""
+
+    def __init__(self):
+        self._tallies = {}  # (code, block_id, q_id) -> QuestionTally
+        self._overlay = {}  # (code, block_id, q_id) -> [{"key", "answers", "queued_at", "delivered_at"}]
+        self.respondent_ids = {}  # enter code -> {respondent string: number used in its tally columns}
+        self._stored_numbers = {}  # enter code -> our number of each event store respondent, in stored order
+        # called as listener(enter_code, block_id, q_id, events) with the events consumed by an update
+        self.event_listeners = []
+        # called as listener(enter_code, block_id, q_id, respondent ids, columns) when load_columns rebuilds
+        self.column_listeners = []
+        self._lock = threading.Lock()
+
+    def update(self, enter_code, block_id, q_id, q_type, events, fetched_at=None):
+        """
+        Fold new events into the question's tally and return a snapshot that
+        includes our own ballots Vote2 did not have at fetched_at.
+        """
+        key = (enter_code.lower(), str(block_id), str(q_id))
+        with self._lock:
+            tally = self._tallies.get(key)
+            cursor_ok = (
+                tally is not None and not tally.columnar and tally.q_type == (q_type or "")
+                and len(events) >= tally.cursor
+                and (tally.cursor == 0 or events[tally.cursor - 1].get("id") == tally.last_id)
+            )
+            if not cursor_ok:
+                # First fetch, changed type, or upstream history rewritten: rebuild
+                tally = QuestionTally(q_type)
+            new_events = events[tally.cursor:]
+            for event in new_events:
+                tally.add(event_answers(event), self._respondent_number(key[0], event_respondent(event)),
+                          event_time(event))
+            if len(events) > tally.cursor:
+                tally.cursor = len(events)
+                tally.last_id = events[-1].get("id")
+            self._tallies[key] = tally
+
+            snapshot = self._snapshot(key, tally, fetched_at)
+
+        if new_events:
+            for listener in self.event_listeners:
+                listener(enter_code, str(block_id), str(q_id), new_events)
+        return snapshot
+
+    def load_columns(self, enter_code, block_id, q_id, q_type, event_store, num_options=0):
+        """
+        Tally of a stored choice or RangeSlider question read from the event
+        store's columns (see QuestionTally.from_columns), rebuilt only when
+        the stored rows changed, as a snapshot with our own ballots like update().
+        """
+        key = (enter_code.lower(), str(block_id), str(q_id))
+        rows, last_id = event_store.cursor(enter_code, block_id, q_id)
+        with self._lock:
+            tally = self._tallies.get(key)
+            if tally is not None and tally.columnar and tally.q_type == (q_type or "") \
+                    and (tally.cursor, tally.last_id) == (rows, last_id):
+                return self._snapshot(key, tally, None)
+            ids = event_store.respondent_ids(enter_code)
+            # respondents.jsonl only grows, so the other questions of the survey reuse this mapping
+            numbers = self._stored_numbers.setdefault(key[0], [])
+            known = self.respondent_ids.setdefault(key[0], {})
+            if not known:
+                # nobody numbered yet for this survey: stored numbers can be used as they are
+                known.update(zip(ids, range(len(ids))))
+                numbers[:] = range(len(ids))
+            else:
+                numbers.extend(self._respondent_number(key[0], respondent) for respondent in ids[len(numbers):])
+
+        columns = event_store.columns(enter_code, block_id, q_id)
+        tally = QuestionTally.from_columns(q_type, columns, numbers, num_options)
+        tally.cursor, tally.last_id = rows, last_id
+        with self._lock:
+            self._tallies[key] = tally
+            snapshot = self._snapshot(key, tally, None)
+        for listener in self.column_listeners:
+            listener(enter_code, str(block_id), str(q_id), ids, columns)
+        return snapshot
+
+    def ingest_ballot(self, enter_code, payload, key=None):
+        """Count a ballot we queued before Vote2 reports it"""
+        with self._lock:
+            for block_id, q_id, ans_list in payload_answers(payload):
+                self._overlay.setdefault((enter_code.lower(), block_id, q_id), []).append(
+                    {"key": key, "answers": ans_list, "queued_at": time.time(), "delivered_at": None}
+                )
+
+    def mark_delivered(self, enter_code, payload, key=None):
+        """Vote2 accepted the ballot; the next fetch started after now includes it"""
+        now = time.time()
+        with self._lock:
+            for overlay, ballot in self._matching(enter_code, payload, key):
+                ballot["delivered_at"] = now
+
+    def forget_ballot(self, enter_code, payload, key=None):
+        """The ballot will never reach Vote2; stop counting it"""
+        with self._lock:
+            for overlay, ballot in self._matching(enter_code, payload, key):
+                overlay.remove(ballot)
+
+    def clear(self, enter_code=None):
+        with self._lock:
+            for store in (self._tallies, self._overlay):
+                for k in [k for k in store if enter_code is None or k[0] == enter_code.lower()]:
+                    del store[k]
+            for numbering in (self.respondent_ids, self._stored_numbers):
+                if enter_code is None:
+                    numbering.clear()
+                else:
+                    numbering.pop(enter_code.lower(), None)
+
+    def _respondent_number(self, code, respondent):
+        if respondent is None:
+            return -1
+        numbers = self.respondent_ids.setdefault(code, {})
+        number = numbers.get(respondent)
+        if number is None:
+            number = numbers[respondent] = len(numbers)
+        return number
+
+    def _snapshot(self, key, tally, fetched_at):
+        # Called with _lock held
+        overlay = self._overlay.get(key, [])
+        if fetched_at is not None:
+            overlay = [b for b in overlay if b["delivered_at"] is None or b["delivered_at"] > fetched_at]
+            self._overlay[key] = overlay
+        # A copy, so rendering never races with the next update of this question
+        snapshot = tally.copy()
+        for ballot in overlay:
+            snapshot.add(ballot["answers"], self._respondent_number(key[0], f"local:{ballot['key']}"),
+                         ballot["queued_at"])
+        return snapshot
+
+    def _matching(self, enter_code, payload, key):
+        # One overlay entry per question of the payload
+        for block_id, q_id, ans_list in payload_answers(payload):
+            overlay = self._overlay.get((enter_code.lower(), block_id, q_id), [])
+            for ballot in overlay:
+                if ballot["key"] == key and ballot["answers"] == ans_list:
+                    yield overlay, ballot
+                    break
+
+
+results_store = ResultsStore()
@@ -0,0 +1,182 @@
+"""
+Bounded-memory text answer analytics
+
+Free-text answers are tokenized (lowercase words, German and English stop
+words removed) and fed into two Space-Saving sketches, one for terms and one
+for bigrams. Each sketch tracks at most `capacity` items no matter how many
+answers arrive; an item's count overestimates its true frequency by at most
+its recorded error, and every item more frequent than total/capacity is
+guaranteed to be tracked. The raw answers are never kept: add() returns
+an answer's tokens, interned so a word is stored once however many answers
+use it, and remove() takes back exactly those tokens. The results store
+keeps them for each respondent's latest answer, so an edit can be undone.
+"""
+import re
+import sys
+
+TERM_CAPACITY = 500  # items tracked per sketch
+TOP_TERMS = 10  # terms/bigrams shown in the chat result
+
+WORD_RE = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*")
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+herself him himself his how i if in into is it its itself just me more most my myself no nor not now of off on
+once only or other our ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves also get got its it's i'm don't can't
+aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes auch auf aus bei
+bin bis bist da damit dann das dass dasselbe dazu dein deine deinem deinen deiner dem den denn der des desselben
+dessen dich die dies diese dieselbe dieselben diesem diesen dieser dieses dir doch dort du durch ein eine einem
+einen einer eines einig einige einigem einigen einiger einiges einmal er es etwas euch euer eure eurem euren
+eurer für gegen gewesen hab habe haben hat hatte hatten hier hin hinter ich ihm ihn ihnen ihr ihre ihrem ihren
+ihrer ihres im in indem ins ist jede jedem jeden jeder jedes jene jenem jenen jener jenes jetzt kann kein keine
+keinem keinen keiner keines können könnte machen man manche manchem manchen mancher manches mein meine meinem
+meinen meiner meines mich mir mit muss musste nach nicht nichts noch nun nur ob oder ohne sehr sein seine
+seinem seinen seiner seines selbst sich sie sind so solche solchem solchen solcher solches soll sollte sondern
+sonst über um und uns unsere unserem unseren unser unseres unter viel vom von vor war waren warst was weg weil
+weiter welche welchem welchen welcher welches wenn werde werden wie wieder will wir wird wirst wo wollen wollte
+würde würden zu zum zur zwar zwischen
+""".split())
+
+
+def tokenize(text):
+    """Lowercase words of one answer without stop words and one-letter tokens"""
+    return [
+        word for word in WORD_RE.findall(str(text or "").lower())
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters (Metwally et al.) over at most `capacity`
+    items. Items are bucketed by count so increments and evictions are O(1).
+    """
+
+    def __init__(self, capacity=TERM_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}  # item -> estimated count
+        self.errors = {}  # item -> overestimation bound
+        self._buckets = {}  # count -> items with that count (insertion ordered)
+        self._min = 0
+
+    def offer(self, item):
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self._move(item, count, count + 1)
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self._buckets.setdefault(1, {})[item] = None
+            self._min = 1
+            return
+        # Replace the oldest item with the smallest count; its count becomes the new item's error
+        floor = self._min
+        bucket = self._buckets[floor]
+        evicted = next(iter(bucket))
+        del bucket[evicted], self.counts[evicted], self.errors[evicted]
+        if not bucket:
+            del self._buckets[floor]
+        self.counts[item] = floor + 1
+        self.errors[item] = floor
+        self._buckets.setdefault(floor + 1, {})[item] = None
+        if floor not in self._buckets:
+            self._min = floor + 1
+
+    def retract(self, item):
+        """
+        Take back one occurrence of an item (an edited answer). Tracked items
+        lose one count and are dropped at zero; an evicted item has nothing
+        left to take back, so only the total changes.
+        """
+        self.total -= 1
+        count = self.counts.get(item)
+        if count is None:
+            return
+        if count > 1:
+            self._move(item, count, count - 1)
+            self._min = min(self._min, count - 1)
+            return
+        del self._buckets[1][item], self.counts[item], self.errors[item]
+        if not self._buckets[1]:
+            del self._buckets[1]
+            self._min = min(self._buckets, default=0)
+
+    def _move(self, item, count, new_count):
+        bucket = self._buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[count]
+            if self._min == count:
+                self._min = new_count
+        self._buckets.setdefault(new_count, {})[item] = None
+        self.counts[item] = new_count
+
+    def top(self, limit=TOP_TERMS):
+        """[(item, count, error)] by descending count"""
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], self.errors[kv[0]], kv[0]))
+        return [(item, count, self.errors[item]) for item, count in ranked[:limit]]
+
+    def copy(self):
+        other = SpaceSaving(self.capacity)
+        other.total = self.total
+        other.counts = dict(self.counts)
+        other.errors = dict(self.errors)
+        other._buckets = {count: dict(items) for count, items in self._buckets.items()}
+        other._min = self._min
+        return other
+
+
+class TextSummary:
+    """Term and bigram heavy hitters for one free-text question"""
+
+    def __init__(self, capacity=TERM_CAPACITY):
+        self.answers = 0
+        self.terms = SpaceSaving(capacity)
+        self.bigrams = SpaceSaving(capacity)
+
+    def add(self, text):
+        """Count one answer; returns its tokens for remove()"""
+        tokens = tuple(sys.intern(token) for token in tokenize(text))
+        if not tokens:
+            return tokens
+        self.answers += 1
+        for token in tokens:
+            self.terms.offer(token)
+        for first, second in zip(tokens, tokens[1:]):
+            self.bigrams.offer(f"{first} {second}")
+        return tokens
+
+    def remove(self, tokens):
+        """Take back an answer counted by add(), given the tokens it returned"""
+        if not tokens:
+            return
+        self.answers -= 1
+        for token in tokens:
+            self.terms.retract(token)
+        for first, second in zip(tokens, tokens[1:]):
+            self.bigrams.retract(f"{first} {second}")
+
+    def frequency_table(self, limit=50, bigrams=False):
+        """
+        Word-cloud input: [{"term", "count", "error", "weight"}] where weight
+        scales the counts to 0..1 relative to the most frequent entry.
+        """
+        top = (self.bigrams if bigrams else self.terms).top(limit)
+        highest = top[0][1] if top else 1
+        return [
+            {"term": term, "count": count, "error": error, "weight": round(count / highest, 4)}
+            for term, count, error in top
+        ]
+
+    def copy(self):
+        other = TextSummary(self.terms.capacity)
+        other.answers = self.answers
+        other.terms = self.terms.copy()
+        other.bigrams = self.bigrams.copy()
+        return other
@@ -0,0 +1,135 @@
+"""
+Answers over time
+
+A Timeline counts one question's responses and chosen options per minute.
+The results store adds each event as it consumes it, so the timeline of a
+live survey is kept up to date in O(1) per event and never rescanned;
+hour and day buckets are summed from the minutes when asked for. Events
+without a timestamp are only counted in `untimed`.
+
+timeline_from_columns builds the same counts in one vectorized pass over
+the timestamp and option-mask columns of the event store (NumPy, with a
+pure Python fallback).
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # optional: timeline_from_columns falls back to a Python loop
+    np = None
+
+RESOLUTION = 60  # seconds per stored bucket
+BUCKETS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+class Timeline:
+    """Responses and option selections per minute"""
+
+    def __init__(self):
+        self.counts = {}  # (minute start, option index or None for responses) -> count
+        self.untimed = 0
+
+    def add(self, when, options=()):
+        """Count one response given at epoch seconds `when` choosing the option indexes"""
+        if when is None or math.isnan(when):
+            self.untimed += 1
+            return
+        minute = int(when // RESOLUTION) * RESOLUTION
+        counts = self.counts
+        counts[(minute, None)] = counts.get((minute, None), 0) + 1
+        for option in options:
+            counts[(minute, option)] = counts.get((minute, option), 0) + 1
+
+    def remove(self, when, options=()):
+        """Take back a response counted by add() (its answer was replaced)"""
+        if when is None or math.isnan(when):
+            self.untimed -= 1
+            return
+        minute = int(when // RESOLUTION) * RESOLUTION
+        counts = self.counts
+        for option in (None, *options):
+            key = (minute, option)
+            n = counts[key] - 1
+            if n:
+                counts[key] = n
+            else:
+                del counts[key]
+
+    def copy(self):
+        other = Timeline()
+        other.counts = dict(self.counts)
+        other.untimed = self.untimed
+        return other
+
+    def buckets(self, width=RESOLUTION):
+        """[(start, responses, {option: count})] per non-empty bucket of `width` seconds, oldest first"""
+        if width % RESOLUTION:
+            raise ValueError(f"bucket width must be a multiple of {RESOLUTION} seconds")
+        rolled = {}
+        for (minute, option), n in self.counts.items():
+            bucket = rolled.setdefault(minute - minute % width, [0, {}])
+            if option is None:
+                bucket[0] += n
+            else:
+                bucket[1][option] = bucket[1].get(option, 0) + n
+        return [(start, *rolled[start]) for start in sorted(rolled)]
+
+
+def options_of_mask(mask):
+    """Option indexes set in a selection bitset"""
+    options = []
+    while mask:
+        low = mask & -mask
+        options.append(low.bit_length() - 1)
+        mask ^= low
+    return options
+
+
+def timeline_from_columns(timestamps, masks=None, num_options=0, respondents=None, use_numpy=True):
+    """
+    Timeline of stored events: `timestamps` in epoch seconds (NaN if
+    unknown) and, for choice questions, `masks` as option bitsets, both
+    one entry per event (event store columns). With `respondents` only the
+    last event of each respondent (number >= 0) counts, like the results
+    store does for edited answers.
+    """
+    timeline = Timeline()
+    if np is not None and use_numpy:
+        stamps = np.asarray(timestamps, dtype=np.float64)
+        counted = np.ones(stamps.size, dtype=bool)
+        if respondents is not None:
+            counted = latest_rows(np.asarray(respondents, dtype=np.int64))
+        timeline.untimed = int((counted & np.isnan(stamps)).sum())
+        keep = counted & ~np.isnan(stamps)
+        minutes = (np.floor(stamps[keep] / RESOLUTION) * RESOLUTION).astype(np.int64)
+        starts, index = np.unique(minutes, return_inverse=True)
+        for start, n in zip(starts.tolist(), np.bincount(index, minlength=starts.size).tolist()):
+            timeline.counts[(start, None)] = n
+        if masks is not None and num_options:
+            chosen = np.asarray(masks, dtype=np.uint64)[keep]
+            for option in range(min(num_options, 64)):
+                bit = ((chosen >> np.uint64(option)) & np.uint64(1)).astype(np.float64)
+                per_minute = np.bincount(index, weights=bit, minlength=starts.size)
+                for i in np.nonzero(per_minute)[0].tolist():
+                    timeline.counts[(int(starts[i]), option)] = int(per_minute[i])
+        return timeline
+
+    last = {}
+    if respondents is not None:
+        for i in range(len(timestamps)):
+            if respondents[i] >= 0:
+                last[int(respondents[i])] = i
+    for i in range(len(timestamps)):
+        if respondents is not None and respondents[i] >= 0 and last[int(respondents[i])] != i:
+            continue
+        options = options_of_mask(int(masks[i])) if masks is not None and num_options else ()
+        timeline.add(float(timestamps[i]), [o for o in options if o < num_options])
+    return timeline
+
+
+def latest_rows(respondents):
+    """Boolean mask (NumPy) of each respondent's last row and of rows without a respondent (< 0)"""
+    keep = respondents < 0
+    _, first_from_end = np.unique(respondents[::-1], return_index=True)
+    keep[respondents.size - 1 - first_from_end] = True
+    return keep
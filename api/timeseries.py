@@ -0,0 +1,96 @@
+"""
+Vote time series
+
+Participation curves per survey question: responses per minute, hour or
+day bucket with their running total, and for choice questions the count
+and share of every option per bucket. Open surveys read the per-minute
+timelines the results store keeps up to date as events arrive (see
+api/timeline.py), so a request only fetches the new events. Closed
+surveys in the local event store are bucketed straight from the stored
+timestamp and option-mask columns in one vectorized pass.
+"""
+from api import get_result
+from api.event_store import event_store
+from api.timeline import BUCKETS, timeline_from_columns
+from api.vote_runtime import get_cached_vote_structure, iter_questions
+
+
+def option_labels(q):
+    return [v.get("DE", k) for k, v in ((q.get("config") or {}).get("options") or {}).items()]
+
+
+def question_series(block_id, q_id, q, timeline, width):
+    """One question's buckets: [{"start", "responses", "cumulative", "counts", "shares"}]"""
+    q_type = q.get("question_type") or ""
+    labels = option_labels(q) if q_type.startswith("Choice") else []
+    buckets = []
+    cumulative = 0
+    for start, responses, options in timeline.buckets(width):
+        cumulative += responses
+        bucket = {"start": start, "responses": responses, "cumulative": cumulative}
+        if labels:
+            counts = [options.get(i, 0) for i in range(len(labels))]
+            bucket["counts"] = counts
+            # share of the bucket's responses choosing each option
+            bucket["shares"] = [n / responses for n in counts]
+        buckets.append(bucket)
+    return {
+        "block": str(block_id),
+        "question": str(q_id),
+        "text": (q.get("question") or {}).get("DE", ""),
+        "type": q_type,
+        "labels": labels,
+        "untimed": timeline.untimed,
+        "buckets": buckets,
+    }
+
+
+def survey_timeseries(enter_code, bucket="hour"):
+    """
+    {"survey", "bucket", "width", "answers": [...], "questions": [...]}:
+    answers per bucket summed over all questions, and question_series for
+    every question. Raises ValueError for an unknown bucket, a survey that
+    cannot be loaded or a failed fetch.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket} (use {', '.join(BUCKETS)})")
+    width = BUCKETS[bucket]
+    blocks = get_cached_vote_structure(enter_code)
+    if not blocks:
+        raise ValueError(f"Cannot load structure for survey {enter_code}")
+    keys = list(iter_questions(blocks))
+
+    stored = _stored_timelines(enter_code, blocks, keys)
+    if stored is None:
+        fetched = get_result.fetch_survey_tallies(enter_code, blocks, keys)
+        stored = [(q, tally.timeline) for q, tally in fetched]
+
+    questions = [question_series(b, q_id, q, timeline, width) for (b, q_id), (q, timeline) in zip(keys, stored)]
+    totals = {}
+    for series in questions:
+        for row in series["buckets"]:
+            totals[row["start"]] = totals.get(row["start"], 0) + row["responses"]
+    answers = []
+    cumulative = 0
+    for start in sorted(totals):
+        cumulative += totals[start]
+        answers.append({"start": start, "count": totals[start], "cumulative": cumulative})
+    return {"survey": enter_code, "bucket": bucket, "width": width, "answers": answers, "questions": questions}
+
+
+def _stored_timelines(enter_code, blocks, keys):
+    # [(question, Timeline)] from the event store for a closed survey, else None
+    if event_store is None or not event_store.is_closed(enter_code):
+        return None
+    questions = [blocks[b]["questions"][q_id] for b, q_id in keys]
+    if not all(q.get("question_type") and event_store.has_question(enter_code, b, q_id)
+               for (b, q_id), q in zip(keys, questions)):
+        return None
+    timelines = []
+    for (b, q_id), q in zip(keys, questions):
+        columns = event_store.columns(enter_code, b, q_id)
+        num_options = len(option_labels(q)) if q["question_type"].startswith("Choice") else 0
+        timelines.append((q, timeline_from_columns(
+            columns["timestamp"], columns["mask"], num_options, columns["respondent"]
+        )))
+    return timelines
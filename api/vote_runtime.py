@@ -1,6 +1,13 @@
 # api/vote_runtime.py
 
+import hashlib
+import json
+import math
 import os
+import threading
+import time
+from types import SimpleNamespace
+
 import requests
 from dotenv import load_dotenv
 
@@ -14,6 +21,14 @@ headers = {
     "Content-Type": "application/json"
 }
 
+STRUCTURE_CACHE_TTL = 300  # seconds a fetched vote structure is reused
+_structure_cache = {}  # enter_code -> (fetched_at, blocks)
+_validator_cache = {}  # enter_code -> (blocks, compiled validator)
+
+SUBMIT_DEDUPE_TTL = 3600  # seconds a submitted ballot key suppresses repeats
+_submitted_keys = {}  # idempotency key -> submitted_at
+_submitted_lock = threading.Lock()
+
 def fetch_vote_structure(enter_code):
     resp = requests.get(f"{BASE_URL}/vote/{enter_code}", headers=headers)
     print("GET /vote status:", resp.status_code)
@@ -57,6 +72,131 @@ def get_next_question(blocks, current_block, current_question):
     return None, None
 
 
+def iter_questions(blocks):
+    """Yield (block_id, question_id) pairs in answering order"""
+    for block_id in sorted(blocks.keys(), key=lambda x: int(x)):
+        questions = blocks[block_id].get("questions", {})
+        for q_id in sorted(questions.keys(), key=lambda x: int(x)):
+            yield block_id, q_id
+
+
+def get_cached_vote_structure(enter_code):
+    """
+    Return the vote structure for enter_code, reusing a recent fetch.
+    Entries expire after STRUCTURE_CACHE_TTL seconds; failed fetches are not cached.
+    """
+    cached = _structure_cache.get(enter_code)
+    if cached and time.monotonic() - cached[0] < STRUCTURE_CACHE_TTL:
+        return cached[1]
+
+    blocks = fetch_vote_structure(enter_code)
+    if blocks:
+        _structure_cache[enter_code] = (time.monotonic(), blocks)
+    return blocks
+
+
+def parse_answer(question_type, text):
+    """
+    Convert raw chat input into the answer list for one question.
+    Raises ValueError if the input does not fit the question type.
+    """
+    if question_type == "TextQuestion":
+        return [{"answer": text, "condanswer": "string"}]
+
+    if question_type == "RangeSlider":
+        # parse as float but convert to int for submission
+        value = float(text)
+        if not math.isfinite(value):
+            raise ValueError("Not a finite number")
+        return [{"answer": str(int(value)), "condanswer": "string"}]
+
+    if question_type == "ChoiceMulti":
+        # accept comma-separated or space-separated numbers, e.g. "1,3,5" or "1 3 5";
+        # any other token is an error, option ranges are left to compile_answer_check
+        choices = [int(x) for x in text.replace(",", " ").split()]
+        if not choices:
+            raise ValueError("No valid choices")
+        return [{"answer": str(c), "condanswer": "string"} for c in choices]
+
+    # ChoiceSingle
+    value = int(text)
+    return [{"answer": str(value), "condanswer": "string"}]
+
+
+def compile_answer_check(question, q_type=None):
+    """
+    Precompute the limits of one question and return check(ans_list),
+    which raises ValueError for answers Vote2 would reject.
+    """
+    config = question.get("config") or {}
+    q_type = q_type or question.get("question_type", "")
+
+    if q_type in ["ChoiceSingle", "ChoiceMulti"]:
+        num_options = len(config.get("options") or {})
+        if q_type == "ChoiceSingle":
+            min_selectable = max_selectable = 1
+        else:
+            min_selectable = config.get("min_selectable") or 1
+            max_selectable = config.get("max_selectable") or num_options
+
+        def check(ans_list):
+            picked = [int(ans["answer"]) for ans in ans_list]
+            for choice in picked:
+                if not 0 <= choice < num_options:
+                    raise ValueError(f"option {choice} does not exist (0-{num_options - 1})")
+            if len(set(picked)) != len(picked):
+                raise ValueError("each option can only be chosen once")
+            if not min_selectable <= len(picked) <= max_selectable:
+                if min_selectable == max_selectable:
+                    raise ValueError(f"choose exactly {min_selectable} option(s)")
+                raise ValueError(f"choose between {min_selectable} and {max_selectable} options")
+        return check
+
+    if q_type == "RangeSlider":
+        range_config = config.get("range_config") or {}
+        min_val = range_config.get("min", 0)
+        max_val = range_config.get("max", 100)
+
+        def check(ans_list):
+            value = int(ans_list[0]["answer"])
+            if not min_val <= value <= max_val:
+                raise ValueError(f"{value} is outside the range {min_val}–{max_val}")
+        return check
+
+    def check(ans_list):
+        if not ans_list or not str(ans_list[0]["answer"]).strip():
+            raise ValueError("the answer is empty")
+    return check
+
+
+def check_answer(question, q_type, ans_list):
+    """Check parsed answers against the question's options, selection limits or range"""
+    compile_answer_check(question, q_type)(ans_list)
+
+
+def compile_ballot_validator(blocks):
+    """{(block_id, q_id): (question_type, check)} for every question with details in the structure"""
+    validator = {}
+    for block_id, q_id in iter_questions(blocks):
+        question = blocks[block_id]["questions"][q_id]
+        if question.get("question_type"):
+            validator[(block_id, q_id)] = (question["question_type"], compile_answer_check(question))
+    return validator
+
+
+def get_ballot_validator(enter_code):
+    """Ballot validator for a survey, recompiled only when the cached structure changes"""
+    blocks = get_cached_vote_structure(enter_code)
+    if not blocks:
+        return {}
+    cached = _validator_cache.get(enter_code)
+    if cached and cached[0] is blocks:
+        return cached[1]
+    validator = compile_ballot_validator(blocks)
+    _validator_cache[enter_code] = (blocks, validator)
+    return validator
+
+
 def build_full_answer_payload(blocks, answers_dict, question_types=None):
     """
     Build payload for submitting answers.
@@ -87,17 +227,58 @@ def build_full_answer_payload(blocks, answers_dict, question_types=None):
     return {"blocks": payload_blocks}
 
 
-def submit_all_answers(enter_code, payload):
-    print("\n=== DEBUG: Submitting payload ===")
-    import json
-    print(json.dumps(payload, indent=2))
-    print("=================================\n")
+def ballot_key(session_id, enter_code, payload):
+    """Idempotency key of one completed ballot: session + survey + answers hash"""
+    answers = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{session_id}\n{enter_code}\n{answers}".encode("utf-8")).hexdigest()
+
+
+def was_submitted(key):
+    """True if a ballot with this key reached Vote2 within SUBMIT_DEDUPE_TTL"""
+    now = time.time()
+    with _submitted_lock:
+        submitted_at = _submitted_keys.get(key)
+        if submitted_at is not None and now - submitted_at >= SUBMIT_DEDUPE_TTL:
+            del _submitted_keys[key]
+            submitted_at = None
+    return submitted_at is not None
+
+
+def remember_submission(key):
+    now = time.time()
+    with _submitted_lock:
+        _submitted_keys[key] = now
+        # Drop expired keys once the store grows; dicts keep insertion order
+        if len(_submitted_keys) > 1000:
+            for old in [k for k, t in _submitted_keys.items() if now - t >= SUBMIT_DEDUPE_TTL]:
+                del _submitted_keys[old]
+
+
+def submit_all_answers(enter_code, payload, session=None, debug=True, idempotency_key=None):
+    """
+    POST a full answer payload. Pass a requests.Session to reuse pooled
+    connections; debug=False skips the payload dump for bulk submissions.
+    With an idempotency_key, a ballot already accepted by Vote2 is not
+    posted again and a synthetic 200 response is returned instead.
+    """
+    if idempotency_key and was_submitted(idempotency_key):
+        if debug:
+            print(f"Duplicate ballot {idempotency_key[:12]} suppressed")
+        return SimpleNamespace(status_code=200, text="duplicate ballot suppressed")
+
+    if debug:
+        print("\n=== DEBUG: Submitting payload ===")
+        print(json.dumps(payload, indent=2))
+        print("=================================\n")
     
-    resp = requests.post(
+    resp = (session or requests).post(
         f"{BASE_URL}/answers/{enter_code}",
         headers=headers,
         json=payload
     )
-    print(f"Response status: {resp.status_code}")
-    print(f"Response body: {resp.text}")
+    if debug:
+        print(f"Response status: {resp.status_code}")
+        print(f"Response body: {resp.text}")
+    if idempotency_key and 200 <= resp.status_code < 300:
+        remember_submission(idempotency_key)
     return resp
\ No newline at end of file
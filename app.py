@@ -3,13 +3,25 @@ Vote Teams - Survey Creation Chatbot
 Main Flask application with modular workflow handlers
 """
 import os
+import threading
 import requests
-from flask import Flask, render_template, request, jsonify
+from urllib.parse import quote
+from flask import Flask, Response, render_template, request, jsonify
 from api.fetch_question import fetch_question, fetch_surveys, fetch_survey_list
 # from api.submit_answer import submit_answer, fetch_vote_structure, get_next_question
 # from api.test_submit import submit_all_answers, fetch_vote_structure, get_next_question
-from api.vote_runtime import fetch_vote_structure, get_next_question, build_full_answer_payload,submit_all_answers
-from api.get_result import get_full_survey_result
+from api.vote_runtime import fetch_vote_structure, get_next_question, build_full_answer_payload, parse_answer, ballot_key, compile_answer_check, get_cached_vote_structure
+from api.get_result import get_survey_document, render_survey_document
+from api.crosstab import crosstab
+from api.outbox import AnswerOutbox
+from api.results_store import results_store
+from api.result_cache import ResultCache
+from api.live_results import LiveResults
+from api.export import MIMETYPES, available_formats, export_chunks
+from api.ballot_log import BallotLog
+from api.participation import participation
+from api.dashboard import build_dashboard, resolve_surveys
+from api.timeseries import survey_timeseries
 from api.validation import SurveyValidator
 
 # Import workflow modules
@@ -24,7 +36,8 @@ from workflow.advanced_steps import (
     handle_question_type, handle_question_text, handle_question_options,
     handle_rating_min, handle_rating_max, handle_question_confirm,
     handle_more_questions_in_block, handle_more_standalone, handle_more_blocks,
-    handle_standalone_after_blocks, handle_advanced_overview
+    handle_standalone_after_blocks, handle_advanced_overview,
+    handle_advanced_creating
 )
 from workflow.quick_mode import (
     handle_quick_mode_selection, handle_quick_email, handle_quick_title,
@@ -32,6 +45,13 @@ from workflow.quick_mode import (
     handle_quick_rating_min, handle_quick_rating_max,
     handle_quick_confirmation
 )
+from workflow.jobs import submit_job, get_job, working_message
+from workflow.messages import MessageTemplate
+from workflow.one_shot_vote import handle_one_shot_vote
+from workflow.crosstab_command import handle_crosstab
+from workflow.participation_command import handle_participants
+from workflow.dashboard_command import handle_dashboard
+from workflow.timeline_command import handle_timeline
 from workflow.survey_api import create_advanced_survey
 BASE_URL = "https://vote2.telekom.net/api/v1"
 API_KEY = os.getenv("API_KEY")
@@ -43,9 +63,70 @@ headers = {
 
 app = Flask(__name__)
 
+# Upper bound for inputs accepted by /api/messages/batch
+MAX_BATCH_INPUTS = 200
+
+# Vote flow message templates (compiled once, see workflow/messages.py)
+FIRST_QUESTION = MessageTemplate("Block {block} — Question 1 (1/{total}): {question} ({q_type})<br>{body!h}")
+NEXT_QUESTION = MessageTemplate(
+    "Block {block}: {block_title}<br>"
+    "Question {index} ({index}/{total}): {question} ({q_type})<br>{body!h}"
+)
+FIRST_RANGE_BODY = MessageTemplate("Range: {min}–{max}<br>Your answer (number):")
+NEXT_RANGE_BODY = MessageTemplate("Range: {min}–{max}<br><br>Enter number:")
+FIRST_CHOICE_BODY = MessageTemplate("Options: <br>{options!h}<br><br>{prompt}")
+NEXT_CHOICE_BODY = MessageTemplate("Options:<br>{options!h}<br><br>{prompt}")
+OPTION_LINE = MessageTemplate("{index}. {label}")
+SURVEY_LIST_LINE = MessageTemplate("• <strong>{title}</strong> (Code: {enter_code})")
+AVAILABLE_SURVEYS = MessageTemplate(
+    "📋 <strong>Available Surveys:</strong>\n\n{surveys!h}\n\nUse 'vote &lt;code&gt;' to participate."
+)
+LIVE_RESULTS = MessageTemplate("📡 Live results for survey {code}:")
+EXPORT_LINK = MessageTemplate(
+    "📥 <a href=\"/api/results/{path}/export?format={fmt}\" download>Download all answers of {code} ({fmt})</a>"
+)
+
 # Initialize validator
 validator = SurveyValidator()
 
+# Structured results per survey, recomputed at most once per RESULT_CACHE_TTL
+result_cache = ResultCache(get_survey_document)
+
+
+# One shared poll loop per watched survey, pushed to browsers over SSE
+live_results = LiveResults()
+
+
+def ballot_queued(enter_code, payload, key=None):
+    results_store.ingest_ballot(enter_code, payload, key)
+    result_cache.invalidate(enter_code)
+
+
+def ballot_failed(enter_code, payload, key=None):
+    results_store.forget_ballot(enter_code, payload, key)
+    result_cache.invalidate(enter_code)
+
+
+# Completed ballots are queued here and submitted to Vote2 in the background,
+# and counted in the results store until Vote2 reports them itself
+outbox = AnswerOutbox(
+    os.getenv("OUTBOX_PATH", "outbox.sqlite3"),
+    on_queued=ballot_queued,
+    on_sent=results_store.mark_delivered,
+    on_failed=ballot_failed
+)
+
+# Distinct respondents: Vote2 events as the results store sees them, chat voters from the ballot log
+results_store.event_listeners.append(participation.add_events)
+results_store.column_listeners.append(participation.add_columns)
+
+# Answer events are logged before the room state changes, for crash recovery
+ballot_log = BallotLog(
+    os.getenv("BALLOT_LOG_PATH", "ballot_log.jsonl"),
+    is_delivered=lambda key: outbox.key_status(key) == "sent",
+    on_complete=participation.add_chat_ballot
+)
+
 # State management: maps room_id -> state dict
 ROOMS = {
     "demo": {
@@ -58,6 +139,28 @@ ROOMS = {
         "question_types": {}  # track question types {(block, question): "Type"}
     }
 }
+_started = False
+_startup_lock = threading.Lock()
+
+
+def startup():
+    """
+    Restore rooms and requeue unsent ballots from the ballot log. Runs once,
+    before the first request, not on import, so importing the app in tests
+    or benchmarks never replays or submits anything.
+    """
+    global _started
+    with _startup_lock:
+        if _started:
+            return
+        ballot_log.restore_rooms(ROOMS, load_structure=get_cached_vote_structure)
+        ballot_log.replay_unsent(outbox)
+        _started = True
+
+
+@app.before_request
+def run_startup():
+    startup()
     # function to build answer
 # def build_full_answer_payload(blocks, answer_dict):
 #     payload_blocks = {}
@@ -91,7 +194,144 @@ def api_message():
     room = "demo"
     user = payload.get("user", "User")
     text = (payload.get("text") or "").strip()
+    return handle_message(room, user, text)
+
+
+@app.route("/api/messages/batch", methods=["POST"])
+def api_messages_batch():
+    """
+    Apply several chat inputs for one session in order.
+
+    Request body: {"user": "Alice", "inputs": ["vote ABC123", "1", "0,2"]}
+    Every input goes through the same handlers as /api/message. Processing
+    stops at the first input whose reply is flagged as an error.
+    """
+    payload = request.json or {}
+    room = "demo"
+    user = payload.get("user", "User")
+    inputs = payload.get("inputs")
+
+    if not isinstance(inputs, list) or not all(isinstance(i, str) for i in inputs):
+        return jsonify(messages=[{"from": "VoteBot", "text": "'inputs' must be a list of strings.", "error": True}]), 400
+    if len(inputs) > MAX_BATCH_INPUTS:
+        return jsonify(messages=[{"from": "VoteBot", "text": f"Too many inputs (max {MAX_BATCH_INPUTS}).", "error": True}]), 400
 
+    messages = []
+    stopped_at = None
+    for idx, raw in enumerate(inputs):
+        step_messages = handle_message(room, user, raw.strip()).get_json()["messages"]
+        messages.extend(step_messages)
+        if any(m.get("error") for m in step_messages):
+            stopped_at = idx
+            break
+
+    processed = len(inputs) if stopped_at is None else stopped_at + 1
+    return jsonify(messages=messages, processed=processed, stopped_at=stopped_at)
+
+
+@app.route("/api/outbox/stats", methods=["GET"])
+def api_outbox_stats():
+    """Queue depth and age of ballots waiting for Vote2"""
+    return jsonify(outbox.stats())
+
+
+@app.route("/api/results/<code>", methods=["GET"])
+def api_results(code):
+    """Structured results of every question; 304 while the If-None-Match ETag is current"""
+    try:
+        document = result_cache.get(code)
+    except ValueError as e:
+        return jsonify(error=str(e)), 404
+    response = jsonify(document)
+    response.set_etag(document["etag"])
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@app.route("/api/results/<code>/stream", methods=["GET"])
+def api_results_stream(code):
+    """Server-Sent Events: a full snapshot, then only the questions that changed"""
+    return Response(
+        live_results.stream(code),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/results/<code>/export", methods=["GET"])
+def api_results_export(code):
+    """Every answer of the survey, streamed as CSV, JSONL or Parquet (?format=)"""
+    fmt = request.args.get("format", "csv").lower()
+    try:
+        chunks = export_chunks(code, fmt)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return Response(
+        chunks,
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename=results-{code}.{fmt}"}
+    )
+
+
+@app.route("/api/dashboard", methods=["GET"])
+def api_dashboard():
+    """Aligned per-question trends: ?codes=<code>,<code> or ?title=<pattern>"""
+    codes = [c for c in request.args.get("codes", "").split(",") if c.strip()]
+    try:
+        surveys = resolve_surveys(codes, request.args.get("title"))
+        return jsonify(build_dashboard(surveys, load=result_cache.get))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+
+@app.route("/api/results/cache/stats", methods=["GET"])
+def api_result_cache_stats():
+    """Hit/miss counters of the result cache"""
+    return jsonify(result_cache.stats())
+
+
+@app.route("/api/jobs/<int:job_id>", methods=["GET"])
+def api_job(job_id):
+    """Poll a background job; messages are filled in once it has finished"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify(error=f"Unknown job {job_id}"), 404
+    return jsonify(id=job["id"], status=job["status"], messages=job["messages"])
+
+
+@app.route("/api/results/<code>/crosstab", methods=["GET"])
+def api_crosstab(code):
+    """Cross-tab as JSON: ?row=<question>&cols=<question>,<question>"""
+    row = request.args.get("row", "")
+    cols = [c for c in request.args.get("cols", "").split(",") if c.strip()]
+    if not row or not cols:
+        return jsonify(error="row and cols are required"), 400
+    try:
+        return jsonify(crosstab(code, row, cols))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+
+@app.route("/api/results/<code>/timeline", methods=["GET"])
+def api_timeline(code):
+    """Answers and option shares over time: ?bucket=minute|hour|day (default hour)"""
+    try:
+        return jsonify(survey_timeseries(code, request.args.get("bucket", "hour").lower()))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+
+def result_job(survey_code):
+    """Background job body for 'result <code>'"""
+    try:
+        text = render_survey_document(result_cache.get(survey_code))
+    except ValueError as e:
+        text = str(e)
+    return [{"from": "VoteBot", "text": text}]
+
+
+def handle_message(room, user, text):
+    """Process one chat input for a room and return the JSON response"""
     messages = []
     messages.append({"from": user, "text": text})
 
@@ -117,6 +357,9 @@ def api_message():
         
         # === VOTE FLOW ===
     if command == "vote":
+        if param and "|" in param:
+            # one-shot ballot: vote <code> | answer 1 | answer 2 | ...
+            return handle_one_shot_vote(text, messages, outbox, session_id=f"{room}:{user}", ballot_log=ballot_log)
         if param:
             # direct vote with code
             enter_code = param.strip()
@@ -124,7 +367,7 @@ def api_message():
             # 1 load full vote structure
             blocks = fetch_vote_structure(enter_code)
             if not blocks:
-                messages.append({"from": "VoteBot", "text": "Survey has no questions or could not be loaded."})
+                messages.append({"from": "VoteBot", "text": "Survey has no questions or could not be loaded.", "error": True})
                 return jsonify(messages=messages)
 
             # 2 store structure and reset collected answers for this room
@@ -141,7 +384,7 @@ def api_message():
             # 4 fetch first question detail
             data = fetch_question(enter_code, current_block, current_question)
             if not data:
-                messages.append({"from": "VoteBot", "text": "Error fetching first question."})
+                messages.append({"from": "VoteBot", "text": "Error fetching first question.", "error": True})
                 return jsonify(messages=messages)
 
             question_type = data.get("question_type", "")
@@ -173,58 +416,42 @@ def api_message():
                 "code": enter_code,
                 "block": current_block,
                 "question": current_question,
-                "type": question_type
+                "type": question_type,
+                "check": compile_answer_check(data, question_type)
             }
+            # one voter per ballot: the participation sketches count chat voters by this session
+            ROOMS[room]["vote_session"] = f"{room}:{user}"
+            ballot_log.start(ROOMS[room]["vote_session"], enter_code, current_block, current_question, question_type, room)
             
             # Track question type for answer formatting
             ROOMS[room]["question_types"][(current_block, current_question)] = question_type
 
             # 6 display first question
             total_questions = len(blocks[current_block]["questions"])
-            header_text = (
-                f"Block {int(current_block) + 1} — "
-                f"Question 1 (1/{total_questions}): "
-            )
 
             if question_type == "RangeSlider":
                 range_config = data["config"].get("range_config", {})
-                min_val = range_config.get("min", 0)
-                max_val = range_config.get("max", 100)
-                messages.append({
-                    "from": "VoteBot",
-                    "text": (
-                        f"{header_text}{question_text} ({question_type})<br>"
-                        f"Range: {min_val}–{max_val}<br>"
-                        "Your answer (number):"
-                    )
-                })
+                body = FIRST_RANGE_BODY.render(min=range_config.get("min", 0), max=range_config.get("max", 100))
             elif question_type == "TextQuestion":
-                messages.append({
-                    "from": "VoteBot",
-                    "text": (
-                        f"{header_text}{question_text} ({question_type})<br>"
-                        "Your answer (text):"
-                    )
-                })
+                body = "Your answer (text):"
             else:
                 # ChoiceSingle / ChoiceMulti
                 options = [v["DE"] for _, v in data["config"]["options"].items()]
-                options_text = "<br>".join([f"{i}. {opt}" for i, opt in enumerate(options)])
+                options_text = OPTION_LINE.render_each(
+                    [{"index": i, "label": opt} for i, opt in enumerate(options)], sep="<br>"
+                )
 
                 # Different prompt for ChoiceMulti
                 if question_type == "ChoiceMulti":
                     choice_prompt = "Enter your choices (e.g., '0,2' or '0 2'):"
                 else:
                     choice_prompt = "Enter your choice number:"
+                body = FIRST_CHOICE_BODY.render(options=options_text, prompt=choice_prompt)
 
-                messages.append({
-                    "from": "VoteBot",
-                    "text": (
-                        f"{header_text}{question_text} ({question_type})<br>"
-                        f"Options: <br>{options_text}<br><br>"
-                        f"{choice_prompt}"
-                    )
-                })
+            messages.append({"from": "VoteBot", "text": FIRST_QUESTION.render(
+                block=int(current_block) + 1, total=total_questions,
+                question=question_text, q_type=question_type, body=body
+            )})
 
 
         else:
@@ -249,7 +476,7 @@ def api_message():
 
                 blocks = fetch_vote_structure(enter_code)
                 if not blocks:
-                    messages.append({"from": "VoteBot", "text": "Survey has no questions or could not be loaded."})
+                    messages.append({"from": "VoteBot", "text": "Survey has no questions or could not be loaded.", "error": True})
                     return jsonify(messages=messages)
 
                 ROOMS[room]["vote_block"] = blocks
@@ -280,11 +507,11 @@ def api_message():
                     header_text = f"Block {block_index} — Question {q_index} ({q_index}/{total_questions}): "
 
                 else:
-                    messages.append({"from": "VoteBot", "text": "Error fetching question."})
+                    messages.append({"from": "VoteBot", "text": "Error fetching question.", "error": True})
             else:
-                messages.append({"from": "VoteBot", "text": "Invalid number."})
+                messages.append({"from": "VoteBot", "text": "Invalid number.", "error": True})
         except ValueError:
-            messages.append({"from": "VoteBot", "text": "Please enter a valid number."})
+            messages.append({"from": "VoteBot", "text": "Please enter a valid number.", "error": True})
         return jsonify(messages=messages)
 
     # handle answering and moving to next question
@@ -302,30 +529,28 @@ def api_message():
 
         # parse this answer
         try:
-            if q_type == "TextQuestion":
-                ans_list = [{"answer": text, "condanswer": "string"}]
-            elif q_type == "RangeSlider":
-                # For RangeSlider, parse as float but convert to int for submission
-                value = float(text)
-                ans_list = [{"answer": str(int(value)), "condanswer": "string"}]
-            elif q_type == "ChoiceMulti":
-                # For ChoiceMulti, accept comma-separated or space-separated numbers
-                # e.g., "1,3,5" or "1 3 5"
-                text_clean = text.replace(',', ' ')
-                choices = [int(x.strip()) for x in text_clean.split() if x.strip().isdigit()]
-                if not choices:
-                    raise ValueError("No valid choices")
-                # Submit multiple answers for multi-choice
-                ans_list = [{"answer": str(c), "condanswer": "string"} for c in choices]
-            else:
-                # For ChoiceSingle, parse as int
-                value = int(text)
-                ans_list = [{"answer": str(value), "condanswer": "string"}]
+            ans_list = parse_answer(q_type, text)
         except ValueError:
-            messages.append({"from": "VoteBot", "text": "Please enter a valid answer."})
+            messages.append({"from": "VoteBot", "text": "Please enter a valid answer.", "error": True})
             return jsonify(messages=messages)
 
+        # options, selection limits and range are checked here, not by Vote2 after the last question
+        check = conf.get("check")
+        if check is None and blocks:
+            # a vote restored from the ballot log while the structure could not be loaded
+            question = (blocks.get(block) or {}).get("questions", {}).get(q)
+            if question:
+                check = conf["check"] = compile_answer_check(question, q_type)
+        if check:
+            try:
+                check(ans_list)
+            except ValueError as e:
+                messages.append({"from": "VoteBot", "text": f"⚠️ Invalid answer: {e}. Please try again.", "error": True})
+                return jsonify(messages=messages)
+
         # store but do not send yet
+        session = ROOMS[room].get("vote_session") or f"{room}:{user}"
+        ballot_log.answer(session, block, q, q_type, ans_list)
         answers_dict[(block, q)] = ans_list
         ROOMS[room]["vote_answers"] = answers_dict
 
@@ -333,32 +558,29 @@ def api_message():
         next_block, next_q = get_next_question(blocks, block, q)
 
         if next_block is None:
-            # no more questions -> send all at once
+            # no more questions -> queue the ballot; outbox workers send it to Vote2
             question_types = ROOMS[room].get("question_types", {})
             payload = build_full_answer_payload(blocks, answers_dict, question_types)
-            resp = submit_all_answers(code,payload)
-            # resp = requests.post(
-            #     f"{BASE_URL}/answers/{code}",
-            #     headers=headers,
-            #     json=payload
-            # )
+            # same voter, survey and answers -> same key, so a repeated final answer is not queued twice
+            key = ballot_key(session, code, payload)
+            ballot_log.complete(session, key, code, payload)
+            outbox.enqueue(code, payload, dedupe_key=key)
 
             ROOMS[room]["pending_confirmation"] = None
             ROOMS[room]["vote_block"] = None
             ROOMS[room]["vote_answer"] = {}
+            ROOMS[room]["vote_answers"] = {}
             ROOMS[room]["question_types"] = {}  # Clear question types
 
-            if 200 <= resp.status_code < 300:
-                messages.append({"from": "VoteBot", "text": "✅ All questions answered and submitted. Thank you!"})
-            else:
-                messages.append({"from": "VoteBot", "text": f"⚠️ Failed to submit answers: {resp.status_code} {resp.text}"})
+            messages.append({"from": "VoteBot", "text": "✅ All questions answered and submitted. Thank you!"})
             return jsonify(messages=messages)
 
         # load next question
         data = fetch_question(code, next_block, next_q)
         if not data:
             ROOMS[room]["pending_confirmation"] = None
-            messages.append({"from": "VoteBot", "text": "Error loading next question."})
+            ballot_log.cancel(session)
+            messages.append({"from": "VoteBot", "text": "Error loading next question.", "error": True})
             return jsonify(messages=messages)
 
         q_type = data["question_type"]
@@ -366,8 +588,10 @@ def api_message():
             "code": code,
             "block": next_block,
             "question": next_q,
-            "type": q_type
+            "type": q_type,
+            "check": compile_answer_check(data, q_type)
         }
+        ballot_log.question(session, next_block, next_q, q_type)
         
         # Track question type
         ROOMS[room]["question_types"][(next_block, next_q)] = q_type
@@ -384,50 +608,29 @@ def api_message():
         total_questions = len(q_ids)
         
         
-        header_block = f"Block {int(next_block) + 1}: {block_title}<br>"
-        header_q = f"Question {q_index} ({q_index}/{total_questions}): {question_text} ({q_type})<br>"
-        
         if q_type == "RangeSlider":
             c = data.get("config", {}).get("range_config", {}) or {}
-            min_val = c.get("min", 0)
-            max_val = c.get("max", 100)
-            messages.append({
-                "from": "VoteBot",
-                "text": (
-                    f"{header_block}"
-                    f"{header_q}"
-                    f"Range: {min_val}–{max_val}<br><br>"
-                    "Enter number:")
-            })
+            body = NEXT_RANGE_BODY.render(min=c.get("min", 0), max=c.get("max", 100))
         elif q_type == "TextQuestion":
-            messages.append({
-                "from": "VoteBot",
-                "text": (f"{header_block}"
-                        f"{header_q}<br>"
-                        "Enter text:")
-                        })
+            body = "<br>Enter text:"
         else:
             options = data["config"]["options"]
-            text_opts = "\n".join([f"{i}. {opt['DE']}" for i, opt in options.items()])
-            options_html = "".join(text_opts)
+            options_html = OPTION_LINE.render_each(
+                [{"index": i, "label": opt["DE"]} for i, opt in options.items()]
+            )
             
             # Different prompt for ChoiceMulti
             if q_type == "ChoiceMulti":
                 choice_prompt = "Enter your choices (e.g., '0,2' or '0 2'):"
             else:
                 choice_prompt = "Enter your choice:"
-            
-            messages.append({
-                "from": "VoteBot",
-                "text":
-                   (
-                    f"{header_block}"
-                    f"{header_q}"
-                    "Options:<br>"
-                    f"{options_html}<br><br>"
-                    f"{choice_prompt}"
-                )
-            })
+            body = NEXT_CHOICE_BODY.render(options=options_html, prompt=choice_prompt)
+        
+        messages.append({"from": "VoteBot", "text": NEXT_QUESTION.render(
+            block=int(next_block) + 1, block_title=block_title,
+            index=q_index, total=total_questions,
+            question=question_text, q_type=q_type, body=body
+        )})
 
         return jsonify(messages=messages)
 
@@ -470,25 +673,64 @@ def api_message():
     # === RESULTS FLOW ===
     # Handle "result" or "result <code>"
     if command == "result":
-        if param:
-            # Get results for specific code
-            survey_code = param.strip()
-            
-            result_text = get_full_survey_result(survey_code)
-            messages.append({"from": "VoteBot", "text": f"{result_text}"})
-            # results_data = get_survey_results(survey_code, "0", "0")
-            # messages.append({"from": "VoteBot", "text": results_data})
+        # Get results for specific code, or for the last created survey
+        survey_code = param.strip() if param else ROOMS[room].get("last_survey_code")
+        if survey_code:
+            # The full result fans out over every question; run it in the background
+            job_id = submit_job(result_job, survey_code)
+            messages.append(working_message(job_id, f"Collecting results for {survey_code}."))
         else:
-            # Get results for last created survey
-            last_code = ROOMS[room].get("last_survey_code")
-            if last_code:
-                result_text = get_full_survey_result(last_code)
-                # results_data = get_survey_results(last_code, "0", "0")
-                messages.append({"from": "VoteBot", "text": result_text})
-            else:
-                messages.append({"from": "VoteBot", "text": "No survey created yet. Use 'result <code>' to get results for a specific survey."})
+            messages.append({"from": "VoteBot", "text": "No survey created yet. Use 'result <code>' to get results for a specific survey."})
         return jsonify(messages=messages)
     
+    # === LIVE RESULTS ===
+    # "live <code>": the browser subscribes to /api/results/<code>/stream
+    if command == "live":
+        survey_code = param.strip() if param else ROOMS[room].get("last_survey_code")
+        if survey_code:
+            messages.append({
+                "from": "VoteBot",
+                "text": LIVE_RESULTS.render(code=survey_code),
+                "stream": survey_code
+            })
+        else:
+            messages.append({"from": "VoteBot", "text": "Use 'live <code>' to watch the results of a survey.", "error": True})
+        return jsonify(messages=messages)
+
+    # === EXPORT ===
+    # "export <code> [csv|jsonl|parquet]" replies with a download link
+    if command == "export":
+        args = (param or "").split()
+        survey_code = args[0] if args else ROOMS[room].get("last_survey_code")
+        fmt = args[1] if len(args) > 1 else "csv"
+        if not survey_code:
+            messages.append({"from": "VoteBot", "text": "Use 'export <code> [csv|jsonl|parquet]' to download answers.", "error": True})
+        elif fmt not in available_formats():
+            messages.append({"from": "VoteBot", "text": f"Export formats: {', '.join(available_formats())}", "error": True})
+        else:
+            messages.append({"from": "VoteBot", "text": EXPORT_LINK.render(code=survey_code, path=quote(survey_code, safe=""), fmt=fmt)})
+        return jsonify(messages=messages)
+
+    # === PARTICIPATION ===
+    # "participants <code> [<code> ...] [<days>d]"
+    if command == "participants":
+        return handle_participants(param, messages)
+
+    # === DASHBOARD ===
+    # "dashboard <code> <code> ..." or "dashboard title:<pattern>"
+    if command == "dashboard":
+        return handle_dashboard(param, messages, result_cache.get)
+
+    # === TIME SERIES ===
+    # "timeline <code> [minute|hour|day]"
+    if command == "timeline":
+        return handle_timeline(param, messages)
+
+    # === CROSS-TAB ===
+    # "crosstab <code> <question> <question> [...]"
+    if command == "crosstab":
+        return handle_crosstab(param, messages)
+
     # === FETCH SURVEYS ===
     # Handle "fetch" to list all available surveys
     if command == "fetch":
@@ -496,11 +738,8 @@ def api_message():
         if not available_surveys:
             messages.append({"from": "VoteBot", "text": "No surveys available right now."})
         else:
-            survey_list = "\n".join([
-                f"• <strong>{s['title']}</strong> (Code: {s['enter_code']})"
-                for s in available_surveys
-            ])
-            messages.append({"from": "VoteBot", "text": f"📋 <strong>Available Surveys:</strong>\n\n{survey_list}\n\nUse 'vote <code>' to participate."})
+            survey_list = SURVEY_LIST_LINE.render_each(available_surveys)
+            messages.append({"from": "VoteBot", "text": AVAILABLE_SURVEYS.render(surveys=survey_list)})
         return jsonify(messages=messages)
 
     # === CREATE SURVEY FLOW ===
@@ -528,7 +767,7 @@ def api_message():
                 state["temp"]["mode"] = "advanced"
                 return handle_advanced_mode_selection(state, messages)
             else:
-                messages.append({"from": "VoteBot", "text": "Please reply with 1 for Quick or 2 for Advanced"})
+                messages.append({"from": "VoteBot", "text": "Please reply with 1 for Quick or 2 for Advanced", "error": True})
                 return jsonify(messages=messages)
         
         # Route to appropriate mode handler
@@ -547,15 +786,22 @@ def api_message():
             "• <strong>create</strong> - Create a new survey\n"
             "• <strong>vote</strong> - List available surveys\n"
             "• <strong>vote &lt;code&gt;</strong> - Vote in specific survey\n"
+            "• <strong>vote &lt;code&gt; | a1 | a2 ...</strong> - Answer all questions at once\n"
             "• <strong>result</strong> - Results of your last survey\n"
             "• <strong>result &lt;code&gt;</strong> - Results of specific survey\n"
+            "• <strong>live &lt;code&gt;</strong> - Watch results update live\n"
+            "• <strong>export &lt;code&gt; [csv|jsonl|parquet]</strong> - Download all answers\n"
+            "• <strong>participants &lt;code&gt; [...]</strong> - Count distinct respondents\n"
+            "• <strong>dashboard &lt;code&gt; &lt;code&gt; ...</strong> - Compare surveys (or title:&lt;pattern&gt;)\n"
+            "• <strong>crosstab &lt;code&gt; &lt;q&gt; &lt;q&gt;</strong> - Compare answers of two questions\n"
+            "• <strong>timeline &lt;code&gt; [minute|hour|day]</strong> - Answers over time\n"
             "• <strong>fetch</strong> - List all available surveys\n"
             "• <strong>help</strong> - Show this menu"
         )})
     else:
         messages.append({"from": "VoteBot", "text": (
             "Command not recognized. Type <strong>help</strong> to see available commands."
-        )})
+        ), "error": True})
     return jsonify(messages=messages)
 
 
@@ -627,10 +873,13 @@ def handle_advanced_workflow(step, text, state, messages, room):
     elif step == "ask_standalone_after_blocks":
         return handle_standalone_after_blocks(text, state, messages)
     elif step == "advanced_overview":
-        return handle_advanced_overview(text, state, messages, room)
+        return handle_advanced_overview(text, state, messages, room, ROOMS)
+    elif step == "advanced_creating":
+        return handle_advanced_creating(text, state, messages)
     
     return jsonify(messages=messages)
 
 
 if __name__ == "__main__":
+    # startup() runs from the first request, so only the reloader's serving process replays ballots
     app.run(debug=True)
@@ -0,0 +1,46 @@
+"""
+Microbenchmark: ChoiceMulti statistics at 1k, 100k and 1M responses
+
+Usage:
+    python benchmarks/bench_choice_stats.py
+
+Per-option counts, co-selection matrix and selection-count distribution
+from bitset-encoded responses, NumPy path against the pure-Python fallback.
+"""
+import os
+import random
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import choice_stats
+from api.choice_stats import multi_choice_statistics
+
+SIZES = [1_000, 100_000, 1_000_000]
+OPTION_COUNTS = [8, 32]
+
+
+def bench(masks, num_options, use_numpy):
+    runs = max(1, min(50, 200_000 // len(masks)))
+    seconds = timeit.timeit(lambda: multi_choice_statistics(masks, num_options, use_numpy=use_numpy), number=runs)
+    return seconds / runs * 1e3
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'options':>8} {'responses':>10} {'numpy ms':>10} {'python ms':>10}")
+    for num_options in OPTION_COUNTS:
+        for size in SIZES:
+            # 1-4 options per response
+            masks = array("Q", (
+                sum(1 << i for i in rng.sample(range(num_options), rng.randint(1, 4))) for _ in range(size)
+            ))
+            python_ms = bench(masks, num_options, use_numpy=False)
+            numpy_ms = bench(masks, num_options, use_numpy=True) if choice_stats.np is not None else float("nan")
+            print(f"{num_options:>8} {size:>10} {numpy_ms:>10.2f} {python_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Microbenchmark: advanced-mode overview rendering for surveys with many blocks
+
+Usage:
+    python benchmarks/bench_overview.py
+
+Rendering should grow linearly with the number of questions, so the
+per-question cost in the last column should stay roughly flat.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workflow.advanced_helpers import send_advanced_overview
+
+QUESTIONS_PER_BLOCK = 10
+BLOCK_COUNTS = [10, 100, 1000]
+TYPES = ["ChoiceSingle", "ChoiceMulti", "RangeSlider", "TextQuestion"]
+
+
+def make_state(num_blocks):
+    blocks = []
+    for b in range(num_blocks):
+        blocks.append({
+            "title": f"Block <{b}>",
+            "description": f"Description of block {b} & more",
+            "questions": [
+                {"question": f"Question {b}.{q}?", "type": TYPES[q % len(TYPES)]}
+                for q in range(QUESTIONS_PER_BLOCK)
+            ]
+        })
+    return {"temp": {
+        "email": "bench@telekom.de",
+        "title": "Benchmark survey",
+        "description": "Synthetic survey",
+        "language": "DE",
+        "question_blocks": blocks,
+        "standalone_questions": [{"question": f"Standalone {i}", "type": "TextQuestion"} for i in range(10)]
+    }}
+
+
+def main():
+    print(f"{'blocks':>8} {'questions':>10} {'ms/render':>10} {'us/question':>12} {'chars':>10}")
+    for num_blocks in BLOCK_COUNTS:
+        state = make_state(num_blocks)
+        runs = max(3, 2000 // num_blocks)
+        seconds = min(timeit.repeat(lambda: send_advanced_overview(state), number=runs, repeat=5)) / runs
+        num_questions = num_blocks * QUESTIONS_PER_BLOCK
+        size = len(send_advanced_overview(state))
+        print(f"{num_blocks:>8} {num_questions:>10} {seconds * 1e3:>10.3f} {seconds * 1e6 / num_questions:>12.3f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
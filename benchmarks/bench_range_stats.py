@@ -0,0 +1,46 @@
+"""
+Microbenchmark: RangeSlider statistics at 1k, 100k and 1M responses
+
+Usage:
+    python benchmarks/bench_range_stats.py
+
+Compares the NumPy path with the pure-Python fallback (skipped for NumPy
+when it is not installed). Values come from the same array("d") the
+results store keeps per question.
+"""
+import os
+import random
+import sys
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import range_stats
+from api.range_stats import range_statistics
+
+SIZES = [1_000, 100_000, 1_000_000]
+RANGE_CONFIG = {"min": 0, "max": 100, "stepsize": 1}
+
+
+def bench(values, use_numpy):
+    runs = max(1, min(50, 200_000 // len(values)))
+    seconds = timeit.timeit(lambda: range_statistics(values, RANGE_CONFIG, use_numpy=use_numpy), number=runs)
+    return seconds / runs * 1e3
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'responses':>10} {'numpy ms':>10} {'python ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        values = array("d", (rng.randint(0, 100) for _ in range(size)))
+        python_ms = bench(values, use_numpy=False)
+        if range_stats.np is None:
+            print(f"{size:>10} {'n/a':>10} {python_ms:>10.2f} {'':>8}")
+            continue
+        numpy_ms = bench(values, use_numpy=True)
+        print(f"{size:>10} {numpy_ms:>10.2f} {python_ms:>10.2f} {python_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Headless transcript replay: per-step latency benchmark for the chat hot path
+
+Replays scripted chat transcripts through the Flask test client against
+/api/message with the Vote2 API stubbed in-process (benchmarks/vote2_stub.py).
+For every step it records latency, upstream call count and allocations,
+then prints percentile tables.
+
+Usage:
+    python benchmarks/replay_transcripts.py [--repeat 50] [--questions 20]
+                                            [--json out.json] [--baseline old.json]
+
+Save a run with --json on one commit and pass it as --baseline on another
+to get a p50 delta column.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.vote2_stub import FakeVote2, make_blocks, sample_answer, QUESTION_TYPES
+
+VOTE_CODE = "BENCH1"
+
+
+def quick_transcript():
+    return [
+        ("create", "create"), ("mode", "1"), ("email", "bench@telekom.de"),
+        ("title", "Bench quick"), ("question", "Lieblingsfarbe?"), ("type", "1"),
+        ("options", "rot,blau,gruen"), ("done", "done"),
+    ]
+
+
+def advanced_transcript():
+    return [
+        ("create", "create"), ("mode", "2"), ("email", "bench@telekom.de"),
+        ("title", "Bench advanced"), ("description", "skip"), ("language", "2"),
+        ("block?", "yes"), ("block title", "Zufriedenheit"), ("block description", "skip"),
+        ("q type", "1"), ("q text", "Wie geht's?"), ("option 1", "gut"), ("option 2", "schlecht"),
+        ("options done", "done"), ("save", "save"), ("more in block", "no"),
+        ("more blocks", "no"), ("standalone", "no"), ("done", "done"),
+    ]
+
+
+def vote_transcript(num_questions):
+    steps = [("vote <code>", f"vote {VOTE_CODE}")]
+    for n in range(num_questions):
+        q_type = QUESTION_TYPES[n % len(QUESTION_TYPES)]
+        label = "answer (last)" if n == num_questions - 1 else "answer"
+        steps.append((label, sample_answer(q_type, n)))
+    return steps
+
+
+def result_transcript():
+    return [("result <code>", f"result {VOTE_CODE}")]
+
+
+def send(client, text):
+    """POST one input and wait for any background job it started"""
+    messages = client.post("/api/message", json={"user": "bench", "text": text}).get_json()["messages"]
+    for job_id in [m["job"] for m in messages if m.get("job")]:
+        while True:
+            job = client.get(f"/api/jobs/{job_id}").get_json()
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.0005)
+    return messages
+
+
+def replay(app_module, stub, transcript, samples, trace_alloc):
+    """Run one transcript from a fresh room and append per-step samples"""
+    app_module.ROOMS.clear()
+    with app_module.app.test_client() as client:
+        for label, text in transcript:
+            calls_before = stub.calls
+            if trace_alloc:
+                tracemalloc.reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+            start = time.perf_counter()
+            send(client, text)
+            elapsed = time.perf_counter() - start
+            step = samples.setdefault(label, {"latency": [], "calls": [], "alloc": []})
+            step["calls"].append(stub.calls - calls_before)
+            if trace_alloc:
+                _, peak = tracemalloc.get_traced_memory()
+                step["alloc"].append(peak - base)
+            else:
+                step["latency"].append(elapsed)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(samples):
+    return {
+        label: {
+            "p50_ms": percentile(s["latency"], 50) * 1e3,
+            "p90_ms": percentile(s["latency"], 90) * 1e3,
+            "p99_ms": percentile(s["latency"], 99) * 1e3,
+            "max_ms": max(s["latency"]) * 1e3,
+            "calls": sum(s["calls"]) / len(s["calls"]),
+            "alloc_kb": (sum(s["alloc"]) / len(s["alloc"]) / 1024) if s["alloc"] else 0.0,
+            "n": len(s["latency"]),
+        }
+        for label, s in samples.items()
+    }
+
+
+def print_table(name, summary, baseline=None):
+    print(f"\n== {name} ==")
+    header = f"{'step':<20} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'calls':>6} {'alloc KB':>9}"
+    if baseline:
+        header += f" {'Δp50':>8}"
+    print(header)
+    for label, row in summary.items():
+        line = (
+            f"{label:<20} {row['n']:>5} {row['p50_ms']:>9.3f} {row['p90_ms']:>9.3f} "
+            f"{row['p99_ms']:>9.3f} {row['max_ms']:>9.3f} {row['calls']:>6.1f} {row['alloc_kb']:>9.1f}"
+        )
+        if baseline and label in baseline:
+            line += f" {row['p50_ms'] - baseline[label]['p50_ms']:>+8.3f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="replays per transcript")
+    parser.add_argument("--questions", type=int, default=20, help="questions in the vote transcript")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per upstream call")
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--baseline", help="summary JSON from an earlier run to diff against")
+    args = parser.parse_args()
+
+    # Keep benchmark ballots out of the real outbox and ballot log
+    state_dir = tempfile.mkdtemp()
+    os.environ.setdefault("OUTBOX_PATH", os.path.join(state_dir, "outbox.sqlite3"))
+    os.environ.setdefault("BALLOT_LOG_PATH", os.path.join(state_dir, "ballot_log.jsonl"))
+    import api.validation
+    import app as app_module
+    api.validation.RATE_LIMIT_DELAY = 0
+    app_module.validator.rate_limit_delay = 0
+
+    transcripts = {
+        "create quick": quick_transcript(),
+        "create advanced": advanced_transcript(),
+        f"vote {args.questions} questions": vote_transcript(args.questions),
+        "result": result_transcript(),
+    }
+
+    results = {}
+    with FakeVote2(latency=args.latency) as stub:
+        stub.add_survey(VOTE_CODE, make_blocks(args.questions), "Bench survey")
+        # The app prints debug output on every upstream call; keep the tables readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, transcript in transcripts.items():
+                samples = {}
+                for _ in range(args.repeat):
+                    replay(app_module, stub, transcript, samples, trace_alloc=False)
+                tracemalloc.start()
+                replay(app_module, stub, transcript, samples, trace_alloc=True)
+                tracemalloc.stop()
+                results[name] = summarize(samples)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    for name, summary in results.items():
+        print_table(name, summary, baseline and baseline.get(name))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+In-process stand-in for the Vote2 API, used by the benchmarks
+
+Every module calls requests.get/post/put directly, so installing the stub
+swaps those three functions for a router over in-memory surveys. Each
+request is counted so benchmarks can report upstream calls per step.
+"""
+import itertools
+import json
+import re
+import time
+
+import requests
+
+BASE_URL = "https://vote2.telekom.net/api/v1"
+
+QUESTION_TYPES = ["ChoiceSingle", "ChoiceMulti", "RangeSlider", "TextQuestion"]
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self._data
+
+
+def make_question(q_type, index):
+    question = {
+        "question": {"DE": f"Frage {index}?"},
+        "question_type": q_type,
+        "settings": {"mandatory": False, "grid": False},
+        "config": {},
+        "analysis_mode": "FREE"
+    }
+    if q_type in ["ChoiceSingle", "ChoiceMulti"]:
+        question["config"]["option_type"] = "TEXT"
+        question["config"]["options"] = {str(i): {"DE": f"Option {i}"} for i in range(4)}
+        if q_type == "ChoiceMulti":
+            question["config"]["min_selectable"] = 1
+            question["config"]["max_selectable"] = 4
+    elif q_type == "RangeSlider":
+        question["config"]["range_config"] = {
+            "range_type": "VALUE", "min": 0, "max": 100, "start": "0", "end": "100", "stepsize": 1
+        }
+    return question
+
+
+def make_blocks(num_questions, per_block=10):
+    """Survey structure with num_questions mixed-type questions"""
+    blocks = {}
+    for n in range(num_questions):
+        block_id, q_id = str(n // per_block), str(n % per_block)
+        block = blocks.setdefault(block_id, {"title": {"DE": f"Block {block_id}"}, "questions": {}})
+        block["questions"][q_id] = make_question(QUESTION_TYPES[n % len(QUESTION_TYPES)], n)
+    return blocks
+
+
+def sample_answer(q_type, n):
+    """A valid chat answer for a question of q_type"""
+    if q_type == "ChoiceSingle":
+        return str(n % 4)
+    if q_type == "ChoiceMulti":
+        return f"{n % 4},{(n + 1) % 4}"
+    if q_type == "RangeSlider":
+        return str((n * 7) % 101)
+    return f"Freitext Antwort {n}"
+
+
+class FakeVote2:
+    """Router over in-memory surveys; use as a context manager"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency  # simulated seconds per upstream call
+        self.surveys = {}  # enter_code -> {"title", "blocks"}
+        self.events = {}  # (enter_code, block, question) -> [event]
+        self.calls = 0
+        self._codes = (f"STUB{n:04d}" for n in itertools.count(1))
+        self._event_ids = itertools.count(1)
+        self._saved = None
+
+    def add_survey(self, enter_code, blocks, title="Stub survey"):
+        self.surveys[enter_code] = {"title": title, "blocks": blocks}
+        return enter_code
+
+    def add_ballot(self, enter_code, payload, participant=None):
+        """Record a submitted answer payload as one event per question"""
+        participant = participant or f"p{next(self._event_ids)}"
+        for b_id, block in payload.get("blocks", {}).items():
+            for q_id, question in block.get("questions", {}).items():
+                answer = question["answers"][0]
+                self.events.setdefault((enter_code, b_id, q_id), []).append({
+                    "id": next(self._event_ids),
+                    "participant": participant,
+                    "timestamp": time.time(),
+                    "content": {"answer": answer}
+                })
+
+    def __enter__(self):
+        self._saved = (requests.get, requests.post, requests.put)
+        requests.get = lambda url, **kw: self._route("GET", url, kw)
+        requests.post = lambda url, **kw: self._route("POST", url, kw)
+        requests.put = lambda url, **kw: self._route("PUT", url, kw)
+        return self
+
+    def __exit__(self, *exc):
+        requests.get, requests.post, requests.put = self._saved
+
+    def _route(self, method, url, kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        path = url[len(BASE_URL):] if url.startswith(BASE_URL) else url
+        body = kwargs.get("json") or {}
+
+        if method == "PUT" and path == "/template/validator":
+            return FakeResponse(200, {"valid": True})
+
+        if method == "POST" and path == "/vote":
+            code = next(self._codes)
+            data = body.get("data", {})
+            title = (data.get("config", {}).get("title") or {}).get("DE", "")
+            self.add_survey(code, data.get("question_blocks", {}), title)
+            return FakeResponse(201, {"enter_code": code})
+
+        if method == "GET" and path == "/vote/":
+            return FakeResponse(200, {
+                str(i): {"title": {"DE": s["title"]}, "enter_code": code}
+                for i, (code, s) in enumerate(self.surveys.items())
+            })
+
+        m = re.fullmatch(r"/vote/([^/]+)/blocks/([^/]+)/questions/([^/]+)", path)
+        if method == "GET" and m:
+            survey = self._survey(m.group(1))
+            question = survey and survey["blocks"].get(m.group(2), {}).get("questions", {}).get(m.group(3))
+            return FakeResponse(200, {"data": question}) if question else FakeResponse(404, {"error": "not found"})
+
+        m = re.fullmatch(r"/vote/([^/]+)", path)
+        if method == "GET" and m:
+            survey = self._survey(m.group(1))
+            if not survey:
+                return FakeResponse(404, {"error": "not found"})
+            return FakeResponse(200, {"data": {"question_blocks": survey["blocks"]}})
+
+        m = re.fullmatch(r"/answers/([^/]+)", path)
+        if method == "POST" and m:
+            code = self._code(m.group(1))
+            if code not in self.surveys:
+                return FakeResponse(404, {"error": "not found"})
+            self.add_ballot(code, body)
+            return FakeResponse(201, {"status": "ok"})
+
+        m = re.fullmatch(r"/analysis/([^/]+)/blocks/([^/]+)/questions/([^/]+)", path)
+        if method == "GET" and m:
+            key = (self._code(m.group(1)), str(m.group(2)), str(m.group(3)))
+            return FakeResponse(200, {"events": self.events.get(key, [])})
+
+        return FakeResponse(404, {"error": f"no stub route for {method} {path}"})
+
+    def _code(self, code):
+        # The chat lower-cases enter codes; match them case-insensitively
+        for known in self.surveys:
+            if known.lower() == code.lower():
+                return known
+        return code
+
+    def _survey(self, code):
+        return self.surveys.get(self._code(code))
@@ -19,24 +19,82 @@ function send(){
   })
   .then(r => r.json())
   .then(data => {
-    const box = document.getElementById("messages");
     // data.messages is an array
-    data.messages.forEach(m=>{
-      const el = document.createElement("div");
-      el.className = m.from === user ? "msg user" : "msg bot";
-      if (m.from === "VoteBot") {
-        el.innerHTML =  `<strong>${m.from}:</strong> ${m.text}`;
-      } else {
-        el.textContent = `${m.from}: ${m.text}`;
-      }
-      box.appendChild(el);
-    });
+    render(data.messages, user);
     document.getElementById("msg").value = "";
-    box.scrollTop = box.scrollHeight;
   })
   .catch(e=>console.error(e));
 }
 
+function render(messages, user){
+  const box = document.getElementById("messages");
+  messages.forEach(m=>{
+    const el = document.createElement("div");
+    el.className = m.from === user ? "msg user" : "msg bot";
+    if (m.from === "VoteBot") {
+      el.innerHTML =  `<strong>${m.from}:</strong> ${m.text}`;
+    } else {
+      el.textContent = `${m.from}: ${m.text}`;
+    }
+    box.appendChild(el);
+    // Long-running commands reply with a job id; fetch the final answer later
+    if (m.job) pollJob(m.job, user);
+    // "live <code>" replies carry the survey to watch over Server-Sent Events
+    if (m.stream) watchResults(m.stream, el);
+  });
+  box.scrollTop = box.scrollHeight;
+}
+
+function pollJob(jobId, user){
+  fetch(`/api/jobs/${jobId}`)
+  .then(r => r.json())
+  .then(job => {
+    if (job.status === "pending" || job.status === "running") {
+      setTimeout(() => pollJob(jobId, user), 1000);
+    } else {
+      render(job.messages || [], user);
+    }
+  })
+  .catch(e=>console.error(e));
+}
+
+const liveStreams = {};
+
+function watchResults(code, el){
+  if (liveStreams[code]) liveStreams[code].close();
+  const board = document.createElement("div");
+  board.className = "live-results";
+  el.appendChild(board);
+
+  // questions: "<block>.<question>" -> summary; updates only carry the changed ones
+  let questions = {};
+  const source = new EventSource(`/api/results/${encodeURIComponent(code)}/stream`);
+  liveStreams[code] = source;
+  source.addEventListener("snapshot", e => {
+    questions = JSON.parse(e.data).questions;
+    drawResults(board, questions);
+  });
+  source.addEventListener("update", e => {
+    Object.assign(questions, JSON.parse(e.data).questions);
+    drawResults(board, questions);
+  });
+  source.addEventListener("error", e => {
+    if (e.data) board.textContent = JSON.parse(e.data).error;
+  });
+}
+
+function drawResults(board, questions){
+  const lines = [];
+  Object.keys(questions).forEach(key => {
+    const q = questions[key];
+    lines.push(`${q.text} (${q.responses} responses)`);
+    if (q.options) q.options.forEach(o => lines.push(`  ${o.label}: ${o.count}`));
+    if (q.mean !== undefined && q.mean !== null) lines.push(`  Average: ${q.mean}`);
+    if (q.top_terms && q.top_terms.length) lines.push(`  Top terms: ${q.top_terms.join(", ")}`);
+  });
+  board.textContent = lines.join("\n");
+}
+
 
 const bubble = document.createElement("div");
 bubble.className = "msg " + (m.from === "VoteBot" ? "bot" : "user");
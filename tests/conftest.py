@@ -0,0 +1,21 @@
+"""
+Keep the app's outbox and ballot log out of the working directory: both are
+opened when app is imported, so the paths are set before any test module loads.
+"""
+import os
+import shutil
+import tempfile
+
+_state_dir = None
+
+
+def pytest_configure(config):
+    global _state_dir
+    _state_dir = tempfile.mkdtemp(prefix="votebot-tests-")
+    os.environ["OUTBOX_PATH"] = os.path.join(_state_dir, "outbox.sqlite3")
+    os.environ["BALLOT_LOG_PATH"] = os.path.join(_state_dir, "ballot_log.jsonl")
+
+
+def pytest_unconfigure(config):
+    if _state_dir:
+        shutil.rmtree(_state_dir, ignore_errors=True)
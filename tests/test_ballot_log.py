@@ -0,0 +1,128 @@
+"""
+Tests for the write-ahead ballot log
+"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from api import ballot_log as ballot_log_module
+from api.ballot_log import BallotLog
+from api.outbox import AnswerOutbox
+
+ANSWER = [{"answer": "1", "condanswer": "string"}]
+
+
+def test_restart_restores_vote_in_progress(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = BallotLog(path)
+    log.start("demo", "abc", "0", "0", "ChoiceSingle")
+    log.answer("demo", "0", "0", "ChoiceSingle", ANSWER)
+    log.question("demo", "0", "1", "RangeSlider")
+    log.close()
+
+    with open(path, "a") as f:
+        f.write('{"op": "answer", "sess')  # torn write from a crash
+
+    rooms = {}
+    assert BallotLog(path).restore_rooms(rooms) == 1
+    state = rooms["demo"]
+    assert state["pending_confirmation"] == {"code": "abc", "block": "0", "question": "1", "type": "RangeSlider"}
+    assert state["vote_answers"] == {("0", "0"): ANSWER}
+    assert state["question_types"] == {("0", "0"): "ChoiceSingle"}
+
+
+def test_completed_ballot_missing_from_outbox_is_replayed(tmp_path):
+    sent = []
+
+    def fake_submit(code, payload):
+        sent.append(code)
+        return SimpleNamespace(status_code=201, text="ok")
+
+    path = str(tmp_path / "log.jsonl")
+    log = BallotLog(path)
+    log.complete("demo", "key-1", "abc", {"blocks": {}})
+    log.complete("demo", "key-2", "abc", {"blocks": {}})
+    log.close()
+
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=fake_submit, workers=0)
+    box.enqueue("abc", {"blocks": {}}, dedupe_key="key-1")  # reached the outbox before the crash
+
+    assert BallotLog(path).replay_unsent(box) == 1
+    assert box.drain() == 2
+    assert BallotLog(path).replay_unsent(box) == 0
+
+
+def test_compaction_keeps_only_open_sessions_and_undelivered_ballots(tmp_path, monkeypatch):
+    monkeypatch.setattr(ballot_log_module, "COMPACT_EVERY", 10)
+    path = str(tmp_path / "log.jsonl")
+    log = BallotLog(path, is_delivered=lambda key: key != "key-open")
+    for n in range(3):
+        log.start(f"room{n}", "abc", "0", "0", "ChoiceSingle")
+        log.answer(f"room{n}", "0", "0", "ChoiceSingle", ANSWER)
+        log.complete(f"room{n}", f"key-{n}", "abc", {"blocks": {}})
+    log.complete("other", "key-open", "abc", {"blocks": {}})  # 10th append triggers compaction
+    log.start("live", "abc", "0", "0", "ChoiceSingle")
+    log.answer("live", "0", "0", "ChoiceSingle", ANSWER)
+    log.close()
+
+    with open(path) as f:
+        assert len(f.readlines()) == 6  # 3 voters of delivered ballots, the open ballot and the live session
+
+    reloaded = BallotLog(path)
+    assert list(reloaded.completed) == ["key-open"]
+    assert sorted(session for _, session, _ in reloaded.voters) == ["room0", "room1", "room2"]
+    assert reloaded.sessions["live"]["answers"] == {("0", "0"): ANSWER}
+
+
+def test_app_replays_the_log_on_its_first_request_only(tmp_path, monkeypatch):
+    import app as app_module
+
+    path = str(tmp_path / "log.jsonl")
+    log = BallotLog(path)
+    log.complete("demo", "key-1", "abc", {"blocks": {}})
+    log.close()
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), workers=0)
+    monkeypatch.setattr(app_module, "ballot_log", BallotLog(path))
+    monkeypatch.setattr(app_module, "outbox", box)
+    monkeypatch.setattr(app_module, "_started", False)
+
+    assert box.stats()["pending"] == 0  # importing the app replayed nothing
+    with app_module.app.test_client() as client:
+        client.get("/")
+        client.get("/")
+    assert box.stats()["pending"] == 1
+
+
+def test_restored_vote_checks_answers_again(tmp_path):
+    blocks = {"0": {"questions": {"0": {"question_type": "ChoiceSingle",
+                                        "config": {"options": {"a": {"DE": "A"}, "b": {"DE": "B"}}}}}}}
+    path = str(tmp_path / "log.jsonl")
+    log = BallotLog(path)
+    log.start("demo:Ann", "abc", "0", "0", "ChoiceSingle", room="demo")
+    log.close()
+
+    rooms = {}
+    BallotLog(path).restore_rooms(rooms, load_structure=lambda code: blocks)
+    check = rooms["demo"]["pending_confirmation"]["check"]
+    check([{"answer": "1"}])
+    with pytest.raises(ValueError):
+        check([{"answer": "5"}])
+
+
+def test_compaction_runs_in_the_background_and_keeps_later_appends(tmp_path, monkeypatch):
+    monkeypatch.setattr(ballot_log_module, "COMPACT_EVERY", 5)
+    release = threading.Event()
+    path = str(tmp_path / "log.jsonl")
+    log = BallotLog(path, is_delivered=lambda key: release.wait(5))
+    for n in range(5):
+        log.complete(f"room{n}", f"key-{n}", "abc", {"blocks": {}})  # 5th append starts compaction
+    log.start("live", "abc", "0", "0", "ChoiceSingle")  # compaction is still waiting
+    assert log._compactor is not None
+    release.set()
+    log.answer("live", "0", "0", "ChoiceSingle", ANSWER)
+    log.close()
+
+    reloaded = BallotLog(path)
+    assert not reloaded.completed
+    assert reloaded.sessions["live"]["answers"] == {("0", "0"): ANSWER}
@@ -0,0 +1,111 @@
+"""
+Tests for the /api/messages/batch endpoint (Vote2 calls are stubbed)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+from api.outbox import AnswerOutbox
+from api.ballot_log import BallotLog
+from api import vote_runtime
+
+BLOCKS = {
+    "0": {"title": {"DE": "Block"}, "questions": {"0": {}, "1": {}}},
+}
+
+QUESTIONS = {
+    ("0", "0"): {
+        "question_type": "ChoiceSingle",
+        "question": {"DE": "Lieblingsfarbe?"},
+        "config": {"options": {"0": {"DE": "Rot"}, "1": {"DE": "Blau"}}},
+    },
+    ("0", "1"): {
+        "question_type": "RangeSlider",
+        "question": {"DE": "Wie zufrieden?"},
+        "config": {"range_config": {"min": 0, "max": 10}},
+    },
+}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    submitted = []
+
+    def fake_submit(code, payload):
+        submitted.append((code, payload))
+        return SimpleNamespace(status_code=200, text="ok")
+
+    monkeypatch.setattr(app_module, "fetch_vote_structure", lambda code: BLOCKS)
+    monkeypatch.setattr(app_module, "fetch_question", lambda code, b, q: QUESTIONS[(b, q)])
+    monkeypatch.setattr(app_module, "outbox", AnswerOutbox(str(tmp_path / "outbox.sqlite3"), submit=fake_submit, workers=0))
+    monkeypatch.setattr(app_module, "ballot_log", BallotLog(str(tmp_path / "ballot_log.jsonl")))
+    vote_runtime._submitted_keys.clear()
+    app_module.ROOMS.clear()
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as c:
+        c.submitted = submitted
+        yield c
+    # rejected answers leave a vote pending; don't leak it into other test modules
+    app_module.ROOMS.clear()
+
+
+def test_batch_applies_inputs_in_order(client):
+    resp = client.post("/api/messages/batch", json={"user": "Alice", "inputs": ["vote abc", "1", "7"]})
+    data = resp.get_json()
+
+    assert resp.status_code == 200
+    assert data["processed"] == 3
+    assert data["stopped_at"] is None
+    assert "submitted" in data["messages"][-1]["text"]
+    assert app_module.outbox.drain() == 1
+    assert len(client.submitted) == 1
+    questions = client.submitted[0][1]["blocks"]["0"]["questions"]
+    assert questions["0"]["answers"][0]["0"]["0"][0]["answer"] == "1"
+    assert questions["1"]["answers"][0]["0"]["0"][0]["answer"] == "7"
+
+
+def test_batch_stops_at_first_error(client):
+    resp = client.post("/api/messages/batch", json={"inputs": ["vote abc", "not a number", "1", "7"]})
+    data = resp.get_json()
+
+    assert data["processed"] == 2
+    assert data["stopped_at"] == 1
+    assert data["messages"][-1]["error"] is True
+    assert app_module.outbox.drain() == 0
+
+
+def test_batch_rejects_invalid_inputs(client):
+    resp = client.post("/api/messages/batch", json={"inputs": "vote abc"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("inputs, stopped_at", [
+    (["vote abc", "5", "7"], 1),    # option does not exist
+    (["vote abc", "1", "11"], 2),   # slider above max
+])
+def test_batch_rejects_answers_outside_the_structure(client, inputs, stopped_at):
+    data = client.post("/api/messages/batch", json={"inputs": inputs}).get_json()
+
+    assert data["stopped_at"] == stopped_at
+    assert "Invalid answer" in data["messages"][-1]["text"]
+    assert app_module.outbox.drain() == 0
+
+
+def test_step_flow_voters_are_counted_once_each(client, monkeypatch, tmp_path):
+    from api.participation import CHAT, ParticipationCounter
+
+    counter = ParticipationCounter()
+    path = str(tmp_path / "voters.jsonl")
+    monkeypatch.setattr(app_module, "ballot_log", BallotLog(path, on_complete=counter.add_chat_ballot))
+    for user in ["Alice", "Bob", "Carol", "Dan"]:
+        data = client.post("/api/messages/batch", json={"user": user, "inputs": ["vote abc", "1", "7"]}).get_json()
+        assert data["stopped_at"] is None
+    assert counter.estimate(["abc"], source=CHAT) == 4
+
+    # a vote in progress is logged under its voter and restored into its room
+    client.post("/api/messages/batch", json={"user": "Erin", "inputs": ["vote abc", "0"]})
+    rooms = {}
+    assert BallotLog(path).restore_rooms(rooms) == 1
+    assert rooms["demo"]["vote_session"] == "demo:Erin"
+    assert rooms["demo"]["vote_answers"] == {("0", "0"): [{"answer": "0", "condanswer": "string"}]}
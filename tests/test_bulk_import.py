@@ -0,0 +1,122 @@
+"""
+Tests for bulk ballot import (Vote2 calls are stubbed)
+"""
+import csv
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import api.bulk_import as bulk_import
+
+BLOCKS = {
+    "0": {"title": {"DE": "Block"}, "questions": {
+        "0": {
+            "question_type": "ChoiceSingle",
+            "question": {"DE": "Lieblingsfarbe?"},
+            "config": {"options": {"0": {"DE": "Rot"}, "1": {"DE": "Blau"}}},
+        },
+        "1": {
+            "question_type": "RangeSlider",
+            "question": {"DE": "Wie zufrieden?"},
+            "config": {"range_config": {"min": 0, "max": 10}},
+        },
+    }},
+}
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_submit(code, payload, session=None, debug=True):
+        with lock:
+            calls.append((code, payload))
+        return SimpleNamespace(status_code=200, text="ok")
+
+    monkeypatch.setattr(bulk_import, "get_cached_vote_structure", lambda code: BLOCKS)
+    monkeypatch.setattr(bulk_import, "submit_all_answers", fake_submit)
+    return calls
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows(rows)
+
+
+def test_imports_csv_and_reports_bad_rows(tmp_path, submitted):
+    path = str(tmp_path / "ballots.csv")
+    write_csv(path, [
+        ["id", "0.0", "Wie zufrieden?"],
+        ["a", "1", "7"],
+        ["b", "5", "7"],
+        ["c", "0", ""],
+        ["d", "0", "eleven"],
+    ])
+
+    summary = bulk_import.import_ballots("abc", path, concurrency=2, progress=lambda msg: None)
+
+    assert summary["submitted"] == 2
+    assert summary["failed"] == 2
+    assert len(submitted) == 2
+    with open(summary["errors_file"]) as f:
+        errors = list(csv.reader(f))
+    assert [row[0] for row in errors[1:]] == ["2", "4"]
+    assert "does not exist" in errors[1][1]
+
+
+def test_resume_skips_finished_rows(tmp_path, submitted):
+    path = str(tmp_path / "ballots.jsonl")
+    with open(path, "w") as f:
+        for n in range(5):
+            f.write(json.dumps({"0.0": "0", "0.1": str(n)}) + "\n")
+    with open(path + ".progress", "w") as f:
+        f.write("1\n2\n3\n")
+
+    summary = bulk_import.import_ballots("abc", path, concurrency=4, progress=lambda msg: None)
+
+    assert summary["skipped"] == 3
+    assert summary["submitted"] == 2
+    answers = sorted(p["blocks"]["0"]["questions"]["1"]["answers"][0]["0"]["0"][0]["answer"] for _, p in submitted)
+    assert answers == ["3", "4"]
+
+
+def test_malformed_rows_are_reported_not_fatal(tmp_path, submitted):
+    csv_path = str(tmp_path / "ballots.csv")
+    write_csv(csv_path, [["0.0", "0.1"], ["1", "7"], ["1", "7", "extra"], ["0", "3"]])
+    summary = bulk_import.import_ballots("abc", csv_path, progress=lambda msg: None)
+    assert (summary["submitted"], summary["failed"]) == (2, 1)
+    with open(summary["errors_file"]) as f:
+        assert list(csv.reader(f))[1] == ["2", "row has 1 more cells than the header"]
+
+    jsonl_path = str(tmp_path / "ballots.jsonl")
+    with open(jsonl_path, "w") as f:
+        f.write('{"0.0": "1"}\n{"0.0": \n[1]\n{"0.0": "0"}\n')
+    summary = bulk_import.import_ballots("abc", jsonl_path, progress=lambda msg: None)
+    assert (summary["submitted"], summary["failed"]) == (2, 2)
+    with open(summary["errors_file"]) as f:
+        errors = list(csv.reader(f))[1:]
+    assert [row[0] for row in errors] == ["2", "3"]
+    assert "not valid JSON" in errors[0][1] and "not a JSON object" in errors[1][1]
+
+
+def test_each_finished_row_is_saved_at_once(tmp_path, submitted, monkeypatch):
+    path = str(tmp_path / "ballots.jsonl")
+    with open(path, "w") as f:
+        for n in range(3):
+            f.write(json.dumps({"0.1": str(n)}) + "\n")
+    seen = []
+
+    def fake_submit(code, payload, session=None, debug=True):
+        with open(path + ".progress") as progress_file:
+            seen.append(len(progress_file.read().split()))
+        return SimpleNamespace(status_code=200, text="ok")
+
+    monkeypatch.setattr(bulk_import, "submit_all_answers", fake_submit)
+    bulk_import.import_ballots("abc", path, concurrency=1, progress=lambda msg: None)
+    assert sorted(seen)[-1] >= 1  # earlier rows were on disk while later ones were submitted
+    with open(path + ".progress") as f:
+        assert sorted(f.read().split()) == ["1", "2", "3"]
@@ -0,0 +1,42 @@
+"""
+Tests for ChoiceMulti bitset statistics
+"""
+from array import array
+
+import pytest
+
+from api.choice_stats import multi_choice_statistics, selection_mask, top_pairs
+from api.results_store import ResultsStore
+
+
+def answers(*indices):
+    return [{"answer": str(i), "condanswer": "string"} for i in indices]
+
+
+MASKS = array("Q", [selection_mask(answers(*sel)) for sel in [(0,), (0, 2), (0, 2), (1, 2, 3), ()]])
+
+
+def test_python_statistics():
+    stats = multi_choice_statistics(MASKS, 4, use_numpy=False)
+
+    assert stats["respondents"] == 5
+    assert stats["option_counts"] == [3, 1, 3, 1]
+    assert stats["co_selection"][0][2] == stats["co_selection"][2][0] == 2
+    assert stats["co_selection"][2][2] == 3
+    assert stats["selection_counts"] == {0: 1, 1: 1, 2: 2, 3: 1}
+    assert top_pairs(stats["co_selection"], limit=2) == [(0, 2, 2), (1, 2, 1)]
+
+
+@pytest.mark.parametrize("num_options", [4, 30])
+def test_numpy_matches_fallback(num_options):
+    pytest.importorskip("numpy")
+    masks = array("Q", [(n * 2654435761) % (1 << num_options) for n in range(500)])
+    assert multi_choice_statistics(masks, num_options) == multi_choice_statistics(masks, num_options, use_numpy=False)
+
+
+def test_every_selection_is_counted():
+    events = [{"id": n, "content": {"answer": {"0": {"0": answers(*sel)}}}} for n, sel in enumerate([(0, 1), (1, 2)])]
+    tally = ResultsStore().update("abc", "0", "0", "ChoiceMulti", events)
+
+    assert tally.option_counts == {"0": 1, "1": 2, "2": 1}
+    assert list(tally.selections) == [0b011, 0b110]
@@ -0,0 +1,108 @@
+"""
+Tests for the cross-tab engine
+"""
+import pytest
+
+from api import crosstab as crosstab_module
+from api.crosstab import crosstab, resolve_question
+from api.results_store import ResultsStore
+from workflow.crosstab_command import render_crosstab
+
+
+def choice(q_type, n=3):
+    return {
+        "question": {"DE": q_type},
+        "question_type": q_type,
+        "config": {"options": {str(i): {"DE": f"O{i}"} for i in range(n)}},
+    }
+
+
+BLOCKS = {"0": {"questions": {
+    "0": choice("ChoiceSingle"),
+    "1": choice("ChoiceMulti"),
+    "2": {"question": {"DE": "Slider"}, "question_type": "RangeSlider", "config": {}},
+    "3": {"question": {"DE": "Slider 2"}, "question_type": "RangeSlider", "config": {}},
+    "4": {"question": {"DE": "Text"}, "question_type": "TextQuestion", "config": {}},
+}}}
+
+# respondent -> answers per question; "p4" skipped the slider, "p2" answered Q1 twice
+BALLOTS = [
+    ("p1", {"0": ["0"], "1": ["0", "1"], "2": ["10"], "3": ["1"]}),
+    ("p2", {"0": ["1"], "1": ["1"], "2": ["20"], "3": ["2"]}),
+    ("p3", {"0": ["0"], "1": ["2"], "2": ["30"], "3": ["4"]}),
+    ("p4", {"0": ["2"], "1": ["0", "2"]}),
+    ("p2", {"0": ["0"]}),
+]
+
+
+@pytest.fixture
+def survey(monkeypatch):
+    store = ResultsStore()
+
+    def fetch_question_tally(enter_code, block_id, question_id, question=None):
+        events = [
+            {"id": n, "participant": who,
+             "content": {"answer": {"0": {"0": [{"answer": a, "condanswer": "string"} for a in answers[question_id]]}}}}
+            for n, (who, answers) in enumerate(BALLOTS) if question_id in answers
+        ]
+        q = BLOCKS[block_id]["questions"][question_id]
+        return q, store.update(enter_code, block_id, question_id, q["question_type"], events)
+
+    monkeypatch.setattr(crosstab_module, "get_cached_vote_structure", lambda code: BLOCKS)
+    monkeypatch.setattr(crosstab_module.get_result, "fetch_question_tally", fetch_question_tally)
+
+
+def test_resolve_question():
+    assert resolve_question(BLOCKS, "2") == ("0", "1")
+    assert resolve_question(BLOCKS, "0.3") == ("0", "3")
+    with pytest.raises(ValueError):
+        resolve_question(BLOCKS, "9")
+
+
+def test_python_tables(survey):
+    doc = crosstab("abc", "1", ["2", "3"], use_numpy=False)
+    contingency, grouped = doc["tables"]
+
+    # p2's second ballot (option 0) replaces the first one
+    assert contingency["kind"] == "contingency"
+    assert contingency["respondents"] == 4
+    assert contingency["counts"] == [[1, 2, 1], [0, 0, 0], [1, 0, 1]]
+
+    assert grouped["kind"] == "grouped"
+    assert grouped["respondents"] == 3
+    assert [g["count"] for g in grouped["groups"]] == [3, 0, 0]
+    assert grouped["groups"][0]["mean"] == 20
+    assert grouped["groups"][1]["mean"] is None
+
+    correlation = crosstab("abc", "3", ["4"], use_numpy=False)["tables"][0]
+    assert correlation["kind"] == "correlation"
+    assert correlation["pearson_r"] == pytest.approx(0.98198, abs=1e-4)
+
+
+@pytest.mark.parametrize("row, cols", [("1", ["2", "3"]), ("2", ["3", "1"]), ("3", ["4"])])
+def test_numpy_matches_fallback(survey, row, cols):
+    pytest.importorskip("numpy")
+    fast = crosstab("abc", row, cols)
+    slow = crosstab("abc", row, cols, use_numpy=False)
+    assert _approx_equal(fast, slow)
+
+
+def _approx_equal(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_approx_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_approx_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, float):
+        return b == pytest.approx(a)
+    return a == b
+
+
+def test_text_questions_are_rejected(survey):
+    with pytest.raises(ValueError):
+        crosstab("abc", "1", ["5"])
+
+
+def test_render(survey):
+    text = render_crosstab(crosstab("abc", "2", ["3"], use_numpy=False))
+    assert "Rows: Q2 ChoiceMulti" in text
+    assert "O1: n=2, mean 15.00" in text
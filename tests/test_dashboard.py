@@ -0,0 +1,119 @@
+"""
+Tests for the multi-survey dashboard
+"""
+import time
+
+import pytest
+
+from api import dashboard, get_result
+from api.result_cache import ResultCache
+from api.results_store import ResultsStore
+from workflow.dashboard_command import parse_dashboard_command, render_dashboard
+
+LISTED = [
+    {"title": "Pulse KW01", "enter_code": "KW01"},
+    {"title": "Pulse KW02", "enter_code": "KW02"},
+    {"title": "Offsite", "enter_code": "OFF1"},
+]
+
+
+def document(code):
+    time.sleep(0.05)
+    if code == "BAD":
+        raise ValueError("Cannot load structure for survey BAD")
+    happy = 3 if code == "KW01" else 1
+    questions = [
+        {"block": "0", "question": "0", "text": "Happy?", "type": "ChoiceSingle", "responses": 4,
+         "options": [{"label": "Yes", "count": happy}, {"label": "No", "count": 4 - happy}]},
+        {"block": "0", "question": "1", "text": "Stress  level", "type": "RangeSlider", "responses": 4,
+         "stats": {"mean": 5.0 if code == "KW01" else 7.5}},
+    ]
+    if code == "KW02":
+        questions.append({"block": "0", "question": "2", "text": "New question", "type": "TextQuestion",
+                          "responses": 2, "top_terms": [{"term": "kaffee", "count": 2}]})
+    return {"survey": code, "blocks": [{"id": "0", "title": "", "questions": questions}]}
+
+
+@pytest.fixture(autouse=True)
+def stub(monkeypatch):
+    monkeypatch.setattr(dashboard, "fetch_survey_list", lambda: LISTED)
+
+
+def test_title_pattern_selects_surveys():
+    assert [s["code"] for s in dashboard.resolve_surveys(title_pattern="pulse kw*")] == ["KW01", "KW02"]
+    assert [s["code"] for s in dashboard.resolve_surveys(title_pattern="offsite")] == ["OFF1"]
+    with pytest.raises(ValueError):
+        dashboard.resolve_surveys(title_pattern="nothing*")
+
+
+def test_questions_are_aligned_across_surveys():
+    surveys = dashboard.resolve_surveys(["kw01", "KW02", "BAD"])
+    doc = dashboard.build_dashboard(surveys, load=document)
+
+    assert [s["title"] for s in doc["surveys"]] == ["Pulse KW01", "Pulse KW02", "BAD"]
+    assert doc["surveys"][2]["error"]
+    happy, stress, new = doc["questions"]
+    assert happy["labels"] == ["Yes", "No"]
+    assert [e["shares"]["Yes"] for e in happy["series"][:2]] == [0.75, 0.25]
+    assert [e["mean"] for e in stress["series"][:2]] == [5.0, 7.5]
+    assert new["series"][0] is None and new["series"][1]["top_terms"] == ["kaffee"]
+
+    text = render_dashboard(doc)
+    assert "Pulse KW01 (n=4): Yes 75%, No 25%" in text
+    assert "Pulse KW01: —" in text
+
+
+def test_surveys_are_computed_concurrently():
+    surveys = [{"code": f"KW{n:02d}", "title": f"Pulse {n}"} for n in range(20)]
+    started = time.perf_counter()
+    dashboard.build_dashboard(surveys, concurrency=20, load=document)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_uncached_surveys_take_about_as_long_as_the_slowest(monkeypatch):
+    blocks = {"0": {"title": {"DE": "Pulse"}, "questions": {
+        str(q): {"question_type": "RangeSlider", "question": {"DE": f"Q{q}"}, "config": {}} for q in range(8)
+    }}}
+
+    def slow_events(code, block_id, q_id):
+        time.sleep(0.02)
+        return [], time.time()
+
+    monkeypatch.setattr(get_result, "fetch_vote_structure", lambda code: blocks)
+    monkeypatch.setattr(get_result, "_get_events", slow_events)
+    monkeypatch.setattr(get_result, "results_store", ResultsStore())
+    surveys = [{"code": f"KW{n:02d}", "title": f"Pulse {n}"} for n in range(20)]
+
+    started = time.perf_counter()
+    doc = dashboard.build_dashboard(surveys, concurrency=20)
+    # one survey is 2 rounds of 4 parallel fetches; all 160 calls in a row would take 3.2 s
+    assert time.perf_counter() - started < 0.5
+    assert len(doc["questions"]) == 8 and not any(s["error"] for s in doc["surveys"])
+
+
+def test_fresh_cached_reports_are_reused():
+    computed = []
+    cache = ResultCache(lambda code: computed.append(code) or document(code), ttl=60)
+    surveys = dashboard.resolve_surveys(["KW01", "KW02"])
+    first = dashboard.build_dashboard(surveys, load=cache.get)
+    second = dashboard.build_dashboard(surveys, load=cache.get)
+    assert sorted(computed) == ["KW01", "KW02"]
+    assert first["questions"] == second["questions"]
+
+
+def test_question_errors_are_reported_on_the_survey():
+    def load(code):
+        doc = document(code)
+        doc["blocks"][0]["questions"][1] = {"block": "0", "question": "1", "error": "Cannot fetch question 0.1"}
+        return doc
+
+    doc = dashboard.build_dashboard(dashboard.resolve_surveys(["KW01"]), load=load)
+    assert doc["surveys"][0]["error"] == "Cannot fetch question 0.1"
+    assert [row["text"] for row in doc["questions"]] == ["Happy?"]
+
+
+def test_parse_dashboard_command():
+    assert parse_dashboard_command("a b") == (["a", "b"], None)
+    assert parse_dashboard_command("title:pulse kw*") == (None, "pulse kw*")
+    with pytest.raises(ValueError):
+        parse_dashboard_command("")
@@ -0,0 +1,162 @@
+"""
+Tests for the local columnar event store
+"""
+import math
+import os
+
+import pytest
+import requests
+
+from api import event_store as event_store_module
+from api import get_result
+from api.event_store import EventStore
+from api.results_store import QuestionTally, ResultsStore
+
+
+def event(n, answer, who=None, timestamp=None):
+    return {
+        "id": n, "participant": who or f"p{n}", "timestamp": timestamp,
+        "content": {"answer": {"0": {"0": [{"answer": a, "condanswer": "string"} for a in answer]}}},
+    }
+
+
+EVENTS = [
+    event(1, ["0", "2"], timestamp=100.5),
+    event(2, ["42"], timestamp="2026-01-05T10:00:00Z"),
+    event(3, ["Grüße"], who="p1"),
+]
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_roundtrip_and_incremental_append(tmp_path, monkeypatch, with_numpy):
+    if not with_numpy:
+        monkeypatch.setattr(event_store_module, "np", None)
+    store = EventStore(str(tmp_path))
+    store.append("ABC", "0", "1", EVENTS[:2])
+    store.append("abc", "0", "1", EVENTS)
+
+    assert store.rows("abc", "0", "1") == 3
+    events = store.read_events("abc", "0", "1")
+    assert [e["id"] for e in events] == [1, 2, 3]
+    assert events[2]["participant"] == "p1"
+    assert events[2]["content"] == EVENTS[2]["content"]
+    assert events[0]["timestamp"] == 100.5
+    assert store.respondent_ids("abc") == ["p1", "p2"]
+
+    columns = store.columns("abc", "0", "1")
+    assert list(columns["respondent"]) == [0, 1, 0]
+    assert list(columns["mask"]) == [0b101, 1 << 42, 0]
+    assert columns["value"][1] == 42 and math.isnan(columns["value"][2])
+    assert columns["timestamp"][1] == 1767607200.0
+
+
+def test_rewritten_history_replaces_rows(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.append("abc", "0", "0", EVENTS)
+    store.append("abc", "0", "0", [event(7, ["1"])])
+    assert [e["id"] for e in store.read_events("abc", "0", "0")] == [7]
+
+
+def test_uncommitted_tail_is_ignored(tmp_path):
+    store = EventStore(str(tmp_path))
+    store.append("abc", "0", "0", EVENTS[:1])
+    # a crash after writing columns but before meta.json
+    with open(tmp_path / "abc" / "0.0" / "respondent.i64", "ab") as f:
+        f.write(b"\xff" * 8)
+    assert len(store.columns("abc", "0", "0")["respondent"]) == 1
+    store.append("abc", "0", "0", EVENTS[:2])
+    assert list(store.columns("abc", "0", "0")["respondent"]) == [0, 1]
+
+
+def test_unchanged_fetch_writes_no_metadata(tmp_path, monkeypatch):
+    store = EventStore(str(tmp_path))
+    writes = []
+    write_json = store._write_json
+
+    def counting_write(path, data):
+        writes.append(os.path.basename(path))
+        write_json(path, data)
+
+    monkeypatch.setattr(store, "_write_json", counting_write)
+
+    store.append("abc", "0", "0", [])
+    store.append("abc", "0", "0", [])
+    assert store.has_question("abc", "0", "0")
+    store.append("abc", "0", "0", EVENTS)
+    store.append("abc", "0", "0", EVENTS)
+    store.set_closed("abc")
+    store.set_closed("abc")
+    assert writes == ["meta.json", "meta.json", "survey.json"]
+
+    store.append("abc", "0", "0", EVENTS[:2] + [event(9, ["1"])])  # last event replaced upstream
+    store.set_closed("abc", False)
+    assert writes[3:] == ["meta.json", "survey.json"]
+    assert [e["id"] for e in store.read_events("abc", "0", "0")] == [1, 2, 9]
+
+
+def test_closed_survey_needs_no_upstream_call(tmp_path, monkeypatch):
+    store = EventStore(str(tmp_path))
+    store.append("abc", "0", "0", EVENTS)
+    store.set_closed("abc")
+    monkeypatch.setattr(get_result, "event_store", store)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("upstream called")
+
+    monkeypatch.setattr(requests, "get", no_network)
+    assert [e["id"] for e in get_result.fetch_question_events("abc", "0", "0")] == [1, 2, 3]
+
+    store.set_closed("abc", False)
+    with pytest.raises(AssertionError):
+        get_result.fetch_question_events("abc", "0", "0")
+
+
+# p1..p4 answer, p2 and p4 change their answers later, one event has no participant
+EDITED = [event(1, ["0"]), event(2, ["1", "3"]), event(3, ["x"]), event(4, ["2"]), event(5, ["0", "2"], who="p2"),
+          dict(event(6, ["1"]), participant=None), event(7, ["3"], who="p4")]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("q_type", ["ChoiceSingle", "ChoiceMulti", "RangeSlider"])
+def test_columns_give_the_same_tally_as_events(tmp_path, q_type, use_numpy):
+    store = EventStore(str(tmp_path))
+    store.append("abc", "0", "0", EDITED)
+    results = ResultsStore()
+    expected = results.update("abc", "0", "0", q_type, EDITED)
+    numbers = [results.respondent_ids["abc"][r] for r in store.respondent_ids("abc")]
+
+    tally = QuestionTally.from_columns(q_type, store.columns("abc", "0", "0"), numbers, 4, use_numpy=use_numpy)
+    assert tally.responses == expected.responses
+    assert sorted(zip(tally.respondents, tally.values or tally.selections or tally.choices)) == \
+        sorted(zip(expected.respondents, expected.values or expected.selections or expected.choices))
+    if q_type != "RangeSlider":
+        assert tally.option_counts == {k: n for k, n in expected.option_counts.items() if k != "x"}
+    assert tally.total == expected.total
+    assert tally.timeline.counts == expected.timeline.counts
+
+
+def test_closed_survey_is_tallied_from_columns(tmp_path, monkeypatch):
+    blocks = {"0": {"questions": {"0": {"question_type": "ChoiceMulti", "question": {"DE": "Snacks?"},
+                                        "config": {"options": {k: {"DE": k} for k in "abcd"}}}}}}
+    store = EventStore(str(tmp_path))
+    store.append("abc", "0", "0", EDITED)
+    store.set_closed("abc")
+    results = ResultsStore()
+    seen = []
+    results.column_listeners.append(lambda code, b, q, ids, columns: seen.append(len(ids)))
+    monkeypatch.setattr(get_result, "event_store", store)
+    monkeypatch.setattr(get_result, "results_store", results)
+    monkeypatch.setattr(store, "read_events", lambda *args: pytest.fail("events rebuilt"))
+
+    first = get_result.question_result("abc", "0", "0", blocks["0"]["questions"]["0"])
+    second = get_result.question_result("abc", "0", "0", blocks["0"]["questions"]["0"])
+    assert first == second
+    assert [o["count"] for o in first["options"]] == [2, 1, 1, 1]
+    assert seen == [5]  # built once, reused while the stored rows are unchanged
+
+    results.ingest_ballot("abc", {"blocks": {"0": {"questions": {"0": {"answers": [{"0": {"0": [{"answer": "1"}]}}]}}}}})
+    assert get_result.question_result("abc", "0", "0", blocks["0"]["questions"]["0"])["responses"] == 6
+
+
+def test_store_is_off_without_directory():
+    assert event_store_module.EVENT_STORE_DIR or event_store_module.event_store is None
@@ -0,0 +1,90 @@
+"""
+Tests for the streaming results export
+"""
+import csv
+import io
+import json
+
+import pytest
+
+from api import export
+from api import get_result
+
+BLOCKS = {"0": {"title": {"DE": "Allgemein"}, "questions": {
+    "0": {
+        "question": {"DE": "Farbe?"},
+        "question_type": "ChoiceMulti",
+        "config": {"options": {"0": {"DE": "Rot"}, "1": {"DE": "Blau"}}},
+    },
+    "1": {"question": {"DE": "Kommentar"}, "question_type": "TextQuestion", "config": {}},
+}}}
+
+EVENTS = {
+    "0": [{"id": n, "participant": f"p{n}", "timestamp": 100 + n,
+           "content": {"answer": {"0": {"0": [{"answer": "0"}, {"answer": "1"}]}}}} for n in range(3)],
+    "1": [{"id": 9, "participant": "p0", "content": {"answer": {"0": {"0": [{"answer": "Gut, danke"}]}}}}],
+}
+
+
+@pytest.fixture
+def survey(monkeypatch):
+    fetched = []
+
+    def fetch_question_events(code, block_id, q_id):
+        fetched.append(q_id)
+        return EVENTS[q_id]
+
+    monkeypatch.setattr(export, "get_cached_vote_structure", lambda code: BLOCKS)
+    monkeypatch.setattr(get_result, "fetch_question_events", fetch_question_events)
+    return fetched
+
+
+def test_csv_export_is_chunked_with_labels(survey, monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_ROWS", 2)
+    chunks = list(export.export_chunks("abc", "csv"))
+    assert len(chunks) == 4
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 7
+    assert [r["label"] for r in rows[:2]] == ["Rot", "Blau"]
+    assert rows[-1]["answer"] == "Gut, danke"
+    assert rows[-1]["question_text"] == "Kommentar"
+
+
+def test_questions_are_fetched_lazily(survey):
+    chunks = export.export_chunks("abc", "jsonl")
+    assert survey == []
+    first = json.loads(next(chunks).decode("utf-8").splitlines()[0])
+    assert first["respondent"] == "p0" and first["block_title"] == "Allgemein"
+
+
+def test_unknown_format_is_rejected_before_streaming():
+    with pytest.raises(ValueError):
+        export.export_chunks("abc", "xlsx")
+
+
+def test_parquet_export(survey):
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = b"".join(export.export_chunks("abc", "parquet"))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 7
+    assert table.column("label").to_pylist()[:2] == ["Rot", "Blau"]
+
+
+def test_missing_details_are_fetched_and_failures_are_visible(survey, monkeypatch):
+    blocks = {"0": {"title": {"DE": "Allgemein"}, "questions": {"0": {}, "1": {}}}}
+
+    def fetch_question_events(code, block_id, q_id):
+        if q_id == "1":
+            raise ValueError("cannot fetch result: 502 Bad Gateway")
+        return EVENTS[q_id]
+
+    monkeypatch.setattr(export, "get_cached_vote_structure", lambda code: blocks)
+    monkeypatch.setattr(get_result, "fetch_question", lambda code, b, q: BLOCKS["0"]["questions"][q])
+    monkeypatch.setattr(get_result, "fetch_question_events", fetch_question_events)
+
+    rows = [json.loads(line) for line in b"".join(export.export_chunks("abc", "jsonl")).decode("utf-8").splitlines()]
+    assert [r["label"] for r in rows[:2]] == ["Rot", "Blau"]
+    assert rows[0]["question_type"] == "ChoiceMulti" and rows[0]["error"] is None
+    assert rows[-1]["question"] == "1" and rows[-1]["answer"] is None
+    assert rows[-1]["error"] == "cannot fetch result: 502 Bad Gateway"
@@ -0,0 +1,120 @@
+"""
+Tests for the parallel result report (Vote2 calls are stubbed)
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from api import get_result
+from api.result_cache import ResultCache
+from api.results_store import ResultsStore
+
+BLOCKS = {
+    str(b): {"title": {"DE": f"Block {b}"}, "questions": {str(q): {} for q in range(4)}}
+    for b in range(3)
+}
+
+
+def test_full_result_fetches_in_parallel_and_keeps_order(monkeypatch):
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def fake_result(code, block_id, q_id, question=None):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return {"block": block_id, "question": q_id, "error": f"result {block_id}.{q_id}"}
+
+    monkeypatch.setattr(get_result, "fetch_vote_structure", lambda code: BLOCKS)
+    monkeypatch.setattr(get_result, "question_result", fake_result)
+
+    report = get_result.get_full_survey_result("abc", concurrency=3)
+
+    assert active["max"] == 3
+    lines = [line for line in report.splitlines() if line.startswith("result")]
+    assert lines == [f"result {b}.{q}" for b in range(3) for q in range(4)]
+    assert report.index("Block 1") < report.index("result 1.0")
+
+
+def run_throttled(calls):
+    start = time.monotonic()
+    threads = [threading.Thread(target=get_result._throttle) for _ in range(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.monotonic() - start
+
+
+def test_throttle_is_off_by_default():
+    assert get_result.RESULT_RATE_LIMIT == 0
+    assert run_throttled(50) < 0.05
+
+
+def test_throttle_allows_a_burst_then_spaces_calls(monkeypatch):
+    monkeypatch.setattr(get_result, "RESULT_RATE_LIMIT", 100)
+    monkeypatch.setattr(get_result, "RESULT_BURST", 5)
+    monkeypatch.setattr(get_result, "_tokens", None)
+    assert run_throttled(5) < 0.03
+    assert run_throttled(6) >= 0.04
+
+
+CHOICE_BLOCKS = {
+    "0": {"title": {"DE": "Feedback"}, "questions": {"0": {
+        "question_type": "ChoiceSingle", "question": {"DE": "Mood?"},
+        "config": {"options": {"good": {"DE": "Good"}, "bad": {"DE": "Bad"}}},
+    }}},
+}
+
+
+@pytest.fixture
+def choice_survey(monkeypatch):
+    events = [
+        {"id": n, "participant": f"p{n}", "content": {"answer": {"0": {"0": [{"answer": str(n % 2)}]}}}}
+        for n in range(3)
+    ]
+    monkeypatch.setattr(get_result, "fetch_vote_structure", lambda code: CHOICE_BLOCKS)
+    monkeypatch.setattr(get_result, "_get_events", lambda code, b, q: (list(events), time.time()))
+    monkeypatch.setattr(get_result, "results_store", ResultsStore())
+    return events
+
+
+def test_document_and_report_agree(choice_survey):
+    document = get_result.get_survey_document("abc")
+    question = document["blocks"][0]["questions"][0]
+    assert document["blocks"][0]["title"] == "Feedback"
+    assert question["options"] == [{"label": "Good", "count": 2}, {"label": "Bad", "count": 1}]
+    assert json.loads(json.dumps(document)) == document
+
+    report = get_result.render_survey_document(document)
+    assert "Good: 2 votes" in report and "Total responses: 3" in report
+    assert report == get_result.get_full_survey_result("abc")
+
+
+def test_etag_follows_the_aggregates(choice_survey):
+    first = get_result.get_survey_document("abc")["etag"]
+    assert get_result.get_survey_document("abc")["etag"] == first
+
+    choice_survey.append({"id": 3, "participant": "p3", "content": {"answer": {"0": {"0": [{"answer": "1"}]}}}})
+    assert get_result.get_survey_document("abc")["etag"] != first
+
+
+def test_results_endpoint_answers_304(choice_survey, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "result_cache", ResultCache(get_result.get_survey_document))
+    with app_module.app.test_client() as client:
+        response = client.get("/api/results/abc")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag == f'"{response.get_json()["etag"]}"'
+
+        assert client.get("/api/results/abc", headers={"If-None-Match": etag}).status_code == 304
+        app_module.result_cache.invalidate("abc")
+        choice_survey.append({"id": 3, "participant": "p3", "content": {"answer": {"0": {"0": [{"answer": "0"}]}}}})
+        assert client.get("/api/results/abc", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,45 @@
+"""
+Tests for background jobs and the result command running through them
+"""
+import time
+
+import app as app_module
+from api.result_cache import ResultCache
+from workflow import jobs
+
+
+def wait_for(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_result_command_runs_as_job(monkeypatch):
+    monkeypatch.setattr(app_module, "result_cache", ResultCache(lambda code: {"survey": code, "blocks": []}))
+    with app_module.app.test_client() as client:
+        reply = client.post("/api/message", json={"text": "result abc123"}).get_json()["messages"][-1]
+        assert "job" in reply
+
+        job = wait_for(client, reply["job"])
+        assert job["status"] == "done"
+        assert job["messages"][0]["text"] == "Results for survey abc123"
+
+
+def test_failed_job_reports_error():
+    def boom():
+        raise RuntimeError("upstream down")
+
+    job_id = jobs.submit_job(boom)
+    with app_module.app.test_client() as client:
+        job = wait_for(client, job_id)
+    assert job["status"] == "failed"
+    assert "upstream down" in job["messages"][0]["text"]
+
+
+def test_unknown_job_is_404():
+    with app_module.app.test_client() as client:
+        assert client.get("/api/jobs/999999").status_code == 404
@@ -0,0 +1,69 @@
+"""
+Tests for live result streaming
+"""
+import json
+import time
+
+from api.live_results import LiveResults, diff_snapshots
+
+
+def next_event(subscriber, timeout=2):
+    return subscriber.get(timeout=timeout)
+
+
+def test_diff_only_contains_changed_questions():
+    old = {"0.0": {"responses": 1}, "0.1": {"responses": 2}}
+    new = {"0.0": {"responses": 1}, "0.1": {"responses": 3}}
+    assert diff_snapshots(old, new) == {"0.1": {"responses": 3}}
+
+
+def test_subscribers_share_one_poll_loop():
+    counts = iter(range(1, 1000))
+    live = LiveResults(snapshot=lambda code: {"0.0": {"responses": min(next(counts), 3)}}, interval=0.01)
+
+    first = live.subscribe("abc")
+    second = live.subscribe("ABC")
+    assert next_event(first) == ("snapshot", {"survey": "abc", "questions": {"0.0": {"responses": 1}}})
+    assert next_event(second)[0] == "snapshot"
+    assert next_event(first) == ("update", {"survey": "abc", "questions": {"0.0": {"responses": 2}}})
+    assert next_event(first)[1]["questions"] == {"0.0": {"responses": 3}}
+
+    assert [next_event(second)[0] for _ in range(2)] == ["update", "update"]
+
+    # polling continues once per interval for both subscribers; unchanged polls send nothing
+    time.sleep(0.05)
+    assert first.empty() and second.empty()
+    assert live.polls < 20
+
+    late = live.subscribe("abc")
+    assert next_event(late) == ("snapshot", {"survey": "abc", "questions": {"0.0": {"responses": 3}}})
+
+    for subscriber in (first, second, late):
+        live.unsubscribe("abc", subscriber)
+    time.sleep(0.05)
+    assert live.subscriber_count("abc") == 0
+    assert "abc" not in live._feeds
+
+
+def test_stream_formats_server_sent_events():
+    live = LiveResults(snapshot=lambda code: {"0.0": {"responses": 1}}, interval=0.01)
+    stream = live.stream("abc")
+    assert next(stream) == "retry: 5000\n\n"
+    chunk = next(stream)
+    assert chunk.startswith("event: snapshot\ndata: ")
+    assert json.loads(chunk.split("data: ", 1)[1])["questions"]["0.0"]["responses"] == 1
+
+    stream.close()
+    assert live.subscriber_count("abc") == 0
+
+
+def test_errors_are_reported_once():
+    def broken(code):
+        raise ValueError("Cannot load structure for survey abc")
+
+    live = LiveResults(snapshot=broken, interval=0.01)
+    subscriber = live.subscribe("abc")
+    assert next_event(subscriber) == ("error", {"survey": "abc", "error": "Cannot load structure for survey abc"})
+    time.sleep(0.05)
+    assert subscriber.empty()
+    live.unsubscribe("abc", subscriber)
@@ -0,0 +1,31 @@
+"""
+Tests for the compiled bot message templates
+"""
+import pytest
+
+from workflow.messages import MessageTemplate, join_sections
+
+
+def test_render_escapes_values():
+    tpl = MessageTemplate("<strong>Title:</strong> {title}")
+    assert tpl.render(title="<b>A & B</b>") == "<strong>Title:</strong> &lt;b&gt;A &amp; B&lt;/b&gt;"
+
+
+def test_raw_fields_and_format_spec():
+    tpl = MessageTemplate("{label!h} {value:.1f} {{literal}}")
+    assert tpl.render(label="<br>", value=2.25) == "<br> 2.2 {literal}"
+
+
+def test_render_each_joins_rows():
+    line = MessageTemplate("{index}. {label}")
+    rows = [{"index": 0, "label": "Ja"}, {"index": 1, "label": "Nein"}]
+    assert line.render_each(rows, sep="<br>") == "0. Ja<br>1. Nein"
+
+
+def test_unknown_conversion_is_rejected():
+    with pytest.raises(ValueError):
+        MessageTemplate("{x!r}")
+
+
+def test_join_sections_skips_empty():
+    assert join_sections("a", "", None, "b") == "ab"
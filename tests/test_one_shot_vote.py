@@ -0,0 +1,142 @@
+"""
+Tests for the one-shot ballot command (vote <code> | a1 | a2 ...)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import app as app_module
+from api.outbox import AnswerOutbox
+from api.ballot_log import BallotLog
+from api import vote_runtime
+from workflow import one_shot_vote
+
+BLOCKS = {
+    "0": {
+        "title": {"DE": "Block"},
+        "questions": {
+            "0": {"question_type": "ChoiceSingle", "config": {"options": {"0": {"DE": "Ja"}, "1": {"DE": "Nein"}}}},
+            "1": {"question_type": "ChoiceMulti", "config": {"options": {"0": {"DE": "A"}, "1": {"DE": "B"}, "2": {"DE": "C"}}}},
+        },
+    },
+    "1": {
+        "title": {"DE": "Block 2"},
+        "questions": {
+            "0": {"question_type": "RangeSlider", "config": {"range_config": {"min": 0, "max": 100}}},
+            "1": {"question_type": "TextQuestion", "config": {}},
+        },
+    },
+}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    calls = {"structure": 0, "question": 0, "submitted": []}
+
+    def fake_structure(code):
+        calls["structure"] += 1
+        return BLOCKS
+
+    def fake_question(code, b, q):
+        calls["question"] += 1
+        return None
+
+    def fake_submit(code, payload):
+        calls["submitted"].append((code, payload))
+        return SimpleNamespace(status_code=201, text="ok")
+
+    vote_runtime._structure_cache.clear()
+    vote_runtime._submitted_keys.clear()
+    monkeypatch.setattr(vote_runtime, "fetch_vote_structure", fake_structure)
+    monkeypatch.setattr(one_shot_vote, "fetch_question", fake_question)
+    monkeypatch.setattr(app_module, "outbox", AnswerOutbox(str(tmp_path / "outbox.sqlite3"), submit=fake_submit, workers=0))
+    monkeypatch.setattr(app_module, "ballot_log", BallotLog(str(tmp_path / "ballot_log.jsonl")))
+    app_module.ROOMS.clear()
+    with app_module.app.test_client() as c:
+        c.calls = calls
+        yield c
+
+
+def send(client, text):
+    return client.post("/api/message", json={"text": text}).get_json()["messages"]
+
+
+def test_one_shot_vote_submits_once(client):
+    messages = send(client, "vote ABC123 | 1 | 0,2 | 42 | Free Text here")
+
+    assert "submitted" in messages[-1]["text"]
+    assert client.calls["question"] == 0
+    app_module.outbox.drain()
+    code, payload = client.calls["submitted"][0]
+    assert code == "abc123"
+    multi = payload["blocks"]["0"]["questions"]["1"]["answers"][0]["0"]["0"]
+    assert [a["answer"] for a in multi] == ["0", "2"]
+    text = payload["blocks"]["1"]["questions"]["1"]["answers"][0]["0"]["0"][0]["answer"]
+    assert text == "Free Text here"
+
+
+def test_one_shot_vote_reuses_cached_structure(client):
+    send(client, "vote ABC123 | 1 | 0 | 1 | a")
+    send(client, "vote ABC123 | 0 | 1 | 2 | b")
+    assert client.calls["structure"] == 1
+    app_module.outbox.drain()
+    assert len(client.calls["submitted"]) == 2
+
+
+@pytest.mark.parametrize("ballot", [
+    "vote ABC123 | 1 | 0,2 | 42",           # too few answers
+    "vote ABC123 | 5 | 0,2 | 42 | text",    # option out of range
+    "vote ABC123 | 1 | 0,2 | 101 | text",   # slider out of range
+    "vote ABC123 | x | 0,2 | 42 | text",    # not a number
+])
+def test_one_shot_vote_rejects_invalid_ballots(client, ballot):
+    messages = send(client, ballot)
+    assert messages[-1]["error"] is True
+    assert app_module.outbox.drain() == 0
+
+
+def test_repeated_ballot_is_submitted_once(client):
+    send(client, "vote ABC123 | 1 | 0 | 1 | a")
+    send(client, "vote ABC123 | 1 | 0 | 1 | a")
+    assert app_module.outbox.drain() == 1
+    assert len(client.calls["submitted"]) == 1
+
+
+@pytest.mark.parametrize("answer, ok", [("0", False), ("0,1", True), ("0,1,2", True), ("0,1,2,3", False), ("1,1", False)])
+def test_choice_multi_selection_limits(answer, ok):
+    question = {
+        "question_type": "ChoiceMulti",
+        "config": {"options": {str(i): {"DE": str(i)} for i in range(4)}, "min_selectable": 2, "max_selectable": 3},
+    }
+    check = vote_runtime.compile_answer_check(question)
+    ans_list = vote_runtime.parse_answer("ChoiceMulti", answer)
+    if ok:
+        check(ans_list)
+    else:
+        with pytest.raises(ValueError):
+            check(ans_list)
+
+
+@pytest.mark.parametrize("text", ["inf", "-inf", "1e400", "nan"])
+def test_non_finite_slider_values_raise_value_error(text):
+    with pytest.raises(ValueError):
+        vote_runtime.parse_answer("RangeSlider", text)
+
+
+@pytest.mark.parametrize("text", ["0,x", "1 1.5", "two", ""])
+def test_multi_choice_rejects_tokens_that_are_not_numbers(text):
+    with pytest.raises(ValueError):
+        vote_runtime.parse_answer("ChoiceMulti", text)
+
+
+def test_negative_choice_reaches_the_option_check():
+    question = {"question_type": "ChoiceMulti", "config": {"options": {str(i): {"DE": str(i)} for i in range(4)}}}
+    ans_list = vote_runtime.parse_answer("ChoiceMulti", "1 -2")
+    with pytest.raises(ValueError, match="option -2 does not exist"):
+        vote_runtime.compile_answer_check(question)(ans_list)
+
+
+def test_non_finite_slider_answer_is_rejected(client):
+    reply = send(client, "vote ABC123 | 1 | 0,1 | inf | hi")[-1]
+    assert reply["error"] is True
+    assert app_module.outbox.drain() == 0
@@ -0,0 +1,145 @@
+"""
+Tests for the durable answer-submission outbox
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from api import outbox as outbox_module
+from api import vote_runtime
+from api.outbox import AnswerOutbox
+
+
+class FakeVote2:
+    def __init__(self, statuses=None):
+        self.statuses = list(statuses or [])
+        self.sent = []
+
+    def __call__(self, code, payload):
+        status = self.statuses.pop(0) if self.statuses else 201
+        if status == "raise":
+            raise ConnectionError("connection reset")
+        self.sent.append((code, payload, status))
+        return SimpleNamespace(status_code=status, text="body")
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(outbox_module, "BACKOFF_BASE", 0.0)
+
+
+def test_enqueued_ballot_is_sent(tmp_path):
+    vote2 = FakeVote2()
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=0)
+    box.enqueue("abc", {"blocks": {"0": {}}})
+
+    assert box.stats()["depth"] == 1
+    assert box.drain() == 1
+    assert vote2.sent == [("abc", {"blocks": {"0": {}}}, 201)]
+    assert box.stats() == {"depth": 0, "pending": 0, "sending": 0, "sent": 1, "failed": 0, "oldest_age_seconds": 0.0}
+
+
+def test_transient_errors_are_retried(tmp_path):
+    vote2 = FakeVote2(["raise", 503, 429, 201])
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=0)
+    box.enqueue("abc", {"n": 1})
+
+    assert box.drain() == 4
+    assert box.stats()["sent"] == 1
+
+
+def test_client_errors_fail_without_retry(tmp_path):
+    vote2 = FakeVote2([400])
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=0)
+    box.enqueue("abc", {"n": 1})
+
+    assert box.drain() == 1
+    assert box.stats()["failed"] == 1
+
+
+def test_ballots_of_one_survey_keep_their_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbox_module, "BACKOFF_BASE", 60.0)
+    vote2 = FakeVote2([503])
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=0)
+    box.enqueue("abc", {"n": 1})
+    box.enqueue("abc", {"n": 2})
+    box.enqueue("xyz", {"n": 3})
+
+    # The first ballot of abc is backing off, so abc's second ballot has to wait
+    box.drain()
+    assert [p["n"] for _, p, s in vote2.sent if s == 201] == [3]
+    assert box.stats()["pending"] == 2
+
+
+def test_unsent_ballots_survive_a_restart(tmp_path):
+    path = str(tmp_path / "o.sqlite3")
+    box = AnswerOutbox(path, submit=FakeVote2(), workers=0)
+    box.enqueue("abc", {"n": 1})
+    box._claim()  # claimed by a worker, then the process dies
+
+    vote2 = FakeVote2()
+    restarted = AnswerOutbox(path, submit=vote2, workers=0)
+    assert restarted.drain() == 1
+    assert vote2.sent[0][1] == {"n": 1}
+
+
+def test_background_workers_drain_the_queue(tmp_path):
+    vote2 = FakeVote2()
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=2)
+    for n in range(5):
+        box.enqueue(f"s{n % 2}", {"n": n})
+    box.stop()  # workers finish the queue before exiting
+
+    assert sorted(p["n"] for _, p, _ in vote2.sent) == [0, 1, 2, 3, 4]
+
+
+def test_ballot_already_sent_is_not_posted_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(vote_runtime, "_submitted_keys", {})
+    vote2 = FakeVote2()
+    first = AnswerOutbox(str(tmp_path / "a.sqlite3"), submit=vote2, workers=0)
+    second = AnswerOutbox(str(tmp_path / "b.sqlite3"), submit=vote2, workers=0)
+    key = vote_runtime.ballot_key("demo:Alice", "abc", {"blocks": {}})
+
+    assert first.enqueue("abc", {"blocks": {}}, dedupe_key=key) == first.enqueue("abc", {"blocks": {}}, dedupe_key=key)
+    second.enqueue("abc", {"blocks": {}}, dedupe_key=key)
+    first.drain()
+    second.drain()
+
+    assert len(vote2.sent) == 1
+    assert second.stats()["sent"] == 1
+
+
+def test_failing_callback_does_not_resend_a_sent_ballot(tmp_path, capsys):
+    vote2 = FakeVote2()
+
+    def broken(code, payload, key):
+        raise RuntimeError("callback failed")
+
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=0, on_sent=broken)
+    box.enqueue("abc", {"n": 1})
+
+    assert box.drain() == 1
+    assert len(vote2.sent) == 1
+    assert box.stats()["sent"] == 1
+    assert "callback failed" in capsys.readouterr().err
+
+
+def test_crashed_delivery_does_not_block_the_survey(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(vote_runtime, "_submitted_keys", {})
+    vote2 = FakeVote2()
+    box = AnswerOutbox(str(tmp_path / "o.sqlite3"), submit=vote2, workers=0)
+    box.enqueue("abc", {"n": 1}, dedupe_key="key-1")
+    box.enqueue("abc", {"n": 2})
+    finish = box._finish
+    crashes = [RuntimeError("disk I/O error")]
+
+    def flaky_finish(*args, **kwargs):
+        if crashes:
+            raise crashes.pop()
+        return finish(*args, **kwargs)
+
+    monkeypatch.setattr(box, "_finish", flaky_finish)
+    box.drain()  # the first delivery crashes after the upstream call and goes back in line
+    assert box.stats()["sent"] == 2 and box.stats()["sending"] == 0
+    assert [p["n"] for _, p, _ in vote2.sent] == [1, 2]  # its key kept it from being posted twice
+    assert "disk I/O error" in capsys.readouterr().err
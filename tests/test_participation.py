@@ -0,0 +1,98 @@
+"""
+Tests for HyperLogLog respondent counting
+"""
+import pytest
+
+from api import ballot_log as ballot_log_module
+from api.ballot_log import BallotLog
+from api.hll import HyperLogLog, union
+from api.participation import CHAT, ParticipationCounter
+from api.results_store import ResultsStore
+from workflow.participation_command import parse_participants_command
+
+DAY = 86400
+
+
+def test_hll_estimates_within_error():
+    sketch = HyperLogLog()
+    sketch.update(f"p{i}" for i in range(20000))
+    sketch.update(f"p{i}" for i in range(5000))  # repeats change nothing
+    assert abs(sketch.count() - 20000) < 20000 * 4 * sketch.standard_error()
+    assert len(sketch.registers) == 4096
+
+
+def test_hll_merge_counts_the_union():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update(range(0, 6000))
+    b.update(range(4000, 10000))
+    merged = union([a, b])
+    assert abs(merged.count() - 10000) < 10000 * 0.06
+    assert HyperLogLog.from_bytes(merged.to_bytes()).count() == merged.count()
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(precision=10))
+
+
+def test_small_counts_are_exact_enough():
+    sketch = HyperLogLog()
+    sketch.update(["a", "b", "c", "a"])
+    assert sketch.count() == 3
+
+
+def event(n, who, day):
+    return {"id": n, "participant": who, "timestamp": day * DAY + 60, "content": {"answer": {"0": {"0": []}}}}
+
+
+def test_counter_merges_questions_surveys_and_windows():
+    counter = ParticipationCounter()
+    counter.add_events("A", "0", "0", [event(1, "p1", 0), event(2, "p2", 0)])
+    counter.add_events("a", "0", "1", [event(3, "p1", 1), event(4, "p3", 1)])
+    counter.add_events("b", "0", "0", [event(5, "p3", 2), event(6, "p4", 2)])
+
+    assert counter.estimate(["a"]) == 3
+    assert counter.estimate(["a"], questions=[("0", "1")]) == 2
+    assert counter.estimate(["a", "b"]) == 4
+    assert counter.estimate(since=DAY, until=2 * DAY) == 2
+    assert counter.estimate(since=2 * DAY) == 2
+
+
+def test_store_and_ballot_log_feed_the_counter(tmp_path):
+    counter = ParticipationCounter()
+    store = ResultsStore()
+    store.event_listeners.append(counter.add_events)
+    events = [event(1, "p1", 0), event(2, "p2", 0)]
+    store.update("abc", "0", "0", "TextQuestion", events)
+    store.update("abc", "0", "0", "TextQuestion", events)  # nothing new
+    assert counter.estimate(["abc"]) == 2
+
+    path = str(tmp_path / "ballot_log.jsonl")
+    log = BallotLog(path, on_complete=counter.add_chat_ballot)
+    log.complete("demo:alice", "k1", "abc", {})
+    log.close()
+
+    replayed = ParticipationCounter()
+    BallotLog(path, on_complete=replayed.add_chat_ballot).close()
+    assert counter.estimate(["abc"], source=CHAT) == replayed.estimate(["abc"], source=CHAT) == 1
+
+
+def test_chat_voters_survive_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(ballot_log_module, "COMPACT_EVERY", 10**6)
+    path = str(tmp_path / "ballot_log.jsonl")
+    log = BallotLog(path, is_delivered=lambda key: True)
+    for n in range(5):
+        log.complete(f"demo:voter{n}", f"k{n}", "abc", {"blocks": {}})
+    log.complete("demo:voter0", "k-again", "abc", {"blocks": {}})  # same voter, same day
+    log.compact()
+    log.compact()
+    log.close()
+
+    with open(path) as f:
+        assert len(f.readlines()) == 5  # one slim "voted" event per voter, no payloads
+    replayed = ParticipationCounter()
+    BallotLog(path, on_complete=replayed.add_chat_ballot).close()
+    assert replayed.estimate(["abc"], source=CHAT) == 5
+
+
+def test_parse_participants_command():
+    assert parse_participants_command("abc def 7d") == (["abc", "def"], 7)
+    with pytest.raises(ValueError):
+        parse_participants_command("30d")
@@ -0,0 +1,47 @@
+"""
+Tests for RangeSlider statistics
+"""
+from array import array
+
+import pytest
+
+from api.range_stats import range_statistics, histogram_bins
+
+VALUES = array("d", [1, 2, 2, 3, 4, 5, 5, 5, 9, 10])
+
+
+def test_python_statistics():
+    stats = range_statistics(VALUES, {"min": 1, "max": 10}, percentiles=(25, 90), use_numpy=False)
+
+    assert stats["count"] == 10
+    assert stats["mean"] == pytest.approx(4.6)
+    assert stats["median"] == 4.5
+    assert stats["std"] == pytest.approx(2.8)
+    assert (stats["min"], stats["max"]) == (1, 10)
+    assert stats["percentiles"] == {25: 2.25, 90: pytest.approx(9.1)}
+    assert [row["count"] for row in stats["histogram"]] == [1, 2, 1, 1, 3, 0, 0, 0, 1, 1]
+
+
+def test_numpy_matches_fallback():
+    pytest.importorskip("numpy")
+    config = {"min": 0, "max": 100}
+    values = array("d", [(n * 37) % 101 for n in range(1000)])
+
+    fast = range_statistics(values, config)
+    slow = range_statistics(values, config, use_numpy=False)
+
+    assert fast["histogram"] == slow["histogram"]
+    for key in ("count", "mean", "median", "std", "min", "max"):
+        assert fast[key] == pytest.approx(slow[key])
+    assert fast["percentiles"] == pytest.approx(slow["percentiles"])
+
+
+def test_histogram_groups_large_ranges_into_whole_steps():
+    edges, covers = histogram_bins({"min": 0, "max": 100, "stepsize": 1})
+    assert len(covers) == 10
+    assert covers[0] == (0, 9) and covers[-1] == (90, 100)
+    assert edges[-1] == 100
+
+
+def test_no_values():
+    assert range_statistics([], {"min": 0, "max": 10}) is None
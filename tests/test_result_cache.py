@@ -0,0 +1,89 @@
+"""
+Tests for the stale-while-revalidate result cache
+"""
+import threading
+import time
+
+from api.result_cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting_compute(delay=0.0):
+    calls = []
+
+    def compute(code):
+        calls.append(code)
+        time.sleep(delay)
+        return f"{code} #{len(calls)}"
+
+    return compute, calls
+
+
+def wait_idle(cache, timeout=2):
+    deadline = time.time() + timeout
+    while cache.stats()["refreshing"] and time.time() < deadline:
+        time.sleep(0.005)
+
+
+def test_fresh_entries_are_reused():
+    compute, calls = counting_compute()
+    clock = Clock()
+    cache = ResultCache(compute, ttl=5, max_stale=60, clock=clock)
+
+    assert cache.get("ABC") == "ABC #1"
+    clock.now = 4
+    assert cache.get("abc") == "ABC #1"
+    assert len(calls) == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    compute, calls = counting_compute(delay=0.05)
+    clock = Clock()
+    cache = ResultCache(compute, ttl=5, max_stale=60, clock=clock)
+    cache.get("abc")
+
+    clock.now = 10
+    assert [cache.get("abc") for _ in range(5)] == ["abc #1"] * 5
+    wait_idle(cache)
+    assert len(calls) == 2
+    assert cache.get("abc") == "abc #2"
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_too_stale_entry_is_recomputed():
+    compute, calls = counting_compute()
+    clock = Clock()
+    cache = ResultCache(compute, ttl=5, max_stale=10, clock=clock)
+    cache.get("abc")
+
+    clock.now = 16
+    assert cache.get("abc") == "abc #2"
+
+
+def test_invalidate_forces_recompute():
+    compute, calls = counting_compute()
+    cache = ResultCache(compute, ttl=60, max_stale=60)
+    cache.get("abc")
+    cache.invalidate("ABC")
+    assert cache.get("abc") == "abc #2"
+
+
+def test_concurrent_misses_share_one_computation():
+    compute, calls = counting_compute(delay=0.05)
+    cache = ResultCache(compute, ttl=60, max_stale=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("abc"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["abc #1"] * 8
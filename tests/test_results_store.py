@@ -0,0 +1,129 @@
+"""
+Tests for incremental result tallies
+"""
+import random
+
+import pytest
+
+from api.results_store import ResultsStore, QuestionTally
+
+
+def event(n, *answers):
+    return {"id": n, "content": {"answer": {"0": {"0": [{"answer": a, "condanswer": "string"} for a in answers]}}}}
+
+
+def payload(*answers):
+    return {"blocks": {"0": {"questions": {"0": {"answers": [{"0": {"0": [
+        {"answer": a, "condanswer": "string"} for a in answers
+    ]}}]}}}}}
+
+
+def test_only_new_events_are_counted(monkeypatch):
+    store = ResultsStore()
+    added = []
+    original_add = QuestionTally.add
+    monkeypatch.setattr(QuestionTally, "add", lambda self, ans, *args: (added.append(ans), original_add(self, ans, *args)))
+
+    events = [event(1, "0"), event(2, "1", "2")]
+    store.update("ABC", "0", "0", "ChoiceMulti", events)
+    events.append(event(3, "2"))
+    tally = store.update("abc", "0", "0", "ChoiceMulti", events)
+
+    assert len(added) == 3
+    assert tally.responses == 3
+    assert tally.option_counts == {"0": 1, "1": 1, "2": 2}
+
+
+def test_rewritten_history_rebuilds_the_tally():
+    store = ResultsStore()
+    store.update("abc", "0", "0", "RangeSlider", [event(1, "4"), event(2, "6")])
+    tally = store.update("abc", "0", "0", "RangeSlider", [event(7, "10"), event(8, "20"), event(9, "30")])
+
+    assert tally.responses == 3
+    assert tally.mean() == 20
+
+
+def test_own_ballot_counts_until_vote2_reports_it():
+    store = ResultsStore()
+    store.ingest_ballot("abc", payload("1"), key="k")
+    assert store.update("abc", "0", "0", "ChoiceSingle", [event(1, "0")], fetched_at=0).option_counts == {"0": 1, "1": 1}
+
+    store.mark_delivered("abc", payload("1"), key="k")
+    # a fetch that started before delivery still needs the overlay
+    assert store.update("abc", "0", "0", "ChoiceSingle", [event(1, "0")], fetched_at=0).responses == 2
+
+    tally = store.update("abc", "0", "0", "ChoiceSingle", [event(1, "0"), event(2, "1")], fetched_at=float("inf"))
+    assert tally.option_counts == {"0": 1, "1": 1}
+
+
+def test_failed_ballot_is_forgotten():
+    store = ResultsStore()
+    store.ingest_ballot("abc", payload("1"), key="k")
+    store.forget_ballot("abc", payload("1"), key="k")
+    assert store.update("abc", "0", "0", "ChoiceSingle", []).responses == 0
+
+
+def answer_event(n, who, *answers):
+    return dict(event(n, *answers), participant=who)
+
+
+@pytest.mark.parametrize("q_type", ["ChoiceSingle", "ChoiceMulti", "RangeSlider", "TextQuestion"])
+def test_edited_answers_match_a_recount_of_latest_answers(q_type):
+    rng = random.Random(7)
+    answers = {
+        "ChoiceSingle": lambda: [str(rng.randrange(4))],
+        "ChoiceMulti": lambda: rng.sample("0123", rng.randint(1, 3)),
+        "RangeSlider": lambda: [rng.choice(["1", "5", "9", "n/a"])],
+        "TextQuestion": lambda: [rng.choice(["great pizza", "cold pizza", "great coffee"])],
+    }[q_type]
+    events = [answer_event(n, f"p{rng.randrange(30)}", *answers()) for n in range(300)]
+    latest = {e["participant"]: e for e in events}
+
+    store = ResultsStore()
+    for end in range(0, len(events) + 1, 50):
+        tally = store.update("abc", "0", "0", q_type, events[:end])
+    recount = ResultsStore().update("abc", "0", "0", q_type, list(latest.values()))
+
+    assert tally.responses == recount.responses == len(latest)
+    assert tally.option_counts == recount.option_counts
+    assert sorted(tally.values) == sorted(recount.values)
+    assert tally.total == pytest.approx(recount.total)
+    names = {number: name for name, number in store.respondent_ids["abc"].items()}
+    column = {"ChoiceSingle": tally.choices, "ChoiceMulti": tally.selections, "RangeSlider": tally.values}.get(q_type)
+    for row, number in enumerate(tally.respondents):
+        assert tally.latest[number][0] == row
+        if column is not None:
+            # each row still pairs a respondent with their own latest answer
+            expected = QuestionTally(q_type)
+            expected.add(latest[names[number]]["content"]["answer"]["0"]["0"])
+            assert column[row] == {"ChoiceSingle": expected.choices, "ChoiceMulti": expected.selections,
+                                   "RangeSlider": expected.values}[q_type][0]
+    if q_type == "TextQuestion":
+        assert tally.text.terms.top(3) == recount.text.terms.top(3)
+        assert all(isinstance(entry[5], tuple) for entry in tally.latest.values())  # tokens, not raw text
+
+
+def test_snapshot_overlay_does_not_touch_the_stored_tally():
+    store = ResultsStore()
+    events = [answer_event(1, "p1", "0"), answer_event(2, "p2", "1")]
+    store.update("abc", "0", "0", "ChoiceSingle", events)
+    store.ingest_ballot("abc", payload("1"), key="k1")
+    assert store.update("abc", "0", "0", "ChoiceSingle", events).responses == 3
+
+    store.forget_ballot("abc", payload("1"), key="k1")
+    events.append(answer_event(3, "p1", "1"))
+    tally = store.update("abc", "0", "0", "ChoiceSingle", events)
+    assert tally.responses == 2
+    assert tally.option_counts == {"1": 2}
+
+
+def test_respondent_numbers_are_per_survey_and_cleared():
+    store = ResultsStore()
+    store.update("abc", "0", "0", "ChoiceSingle", [answer_event(1, "p1", "0"), answer_event(2, "p2", "1")])
+    store.update("def", "0", "0", "ChoiceSingle", [answer_event(1, "p9", "0")])
+    assert store.respondent_ids == {"abc": {"p1": 0, "p2": 1}, "def": {"p9": 0}}
+
+    store.clear("abc")
+    assert list(store.respondent_ids) == ["def"]
+    store.clear()
+    assert store.respondent_ids == {}
@@ -0,0 +1,68 @@
+"""
+Tests for text answer analytics
+"""
+import random
+
+from api.results_store import ResultsStore
+from api.text_stats import SpaceSaving, TextSummary, tokenize
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize("Die Kantine ist zu laut, and the coffee is GREAT!") == ["kantine", "laut", "coffee", "great"]
+    assert tokenize("Home-Office 2x pro Woche") == ["home-office", "pro", "woche"]
+    assert tokenize(None) == []
+
+
+def test_space_saving_is_exact_below_capacity():
+    sketch = SpaceSaving(capacity=10)
+    for word in "a b a c a b".split():
+        sketch.offer(word)
+    assert sketch.top(2) == [("a", 3, 0), ("b", 2, 0)]
+
+
+def test_space_saving_retract():
+    sketch = SpaceSaving(capacity=10)
+    for word in "a b a c".split():
+        sketch.offer(word)
+    sketch.retract("a")
+    sketch.retract("c")
+    sketch.retract("gone")  # never tracked: only the total changes
+    assert sketch.top(3) == [("a", 1, 0), ("b", 1, 0)]
+    assert sketch.total == 1
+    sketch.offer("d")
+    assert sketch._min == 1
+
+
+def test_space_saving_keeps_heavy_hitters_in_bounded_memory():
+    rng = random.Random(7)
+    sketch = SpaceSaving(capacity=20)
+    stream = ["hot"] * 3000 + ["warm"] * 1500 + [f"rare{rng.randrange(5000)}" for _ in range(10000)]
+    rng.shuffle(stream)
+    for item in stream:
+        sketch.offer(item)
+
+    assert len(sketch.counts) == 20
+    (first, count, error), (second, *_) = sketch.top(2)
+    assert (first, second) == ("hot", "warm")
+    assert count - error <= 3000 <= count
+
+
+def test_summary_frequency_table():
+    summary = TextSummary()
+    for text in ["Mehr Home Office", "home office bitte", "Bessere Kantine"]:
+        summary.add(text)
+
+    table = summary.frequency_table(limit=2)
+    assert [row["term"] for row in table] == ["home", "office"]
+    assert table[0]["weight"] == 1.0
+    assert summary.frequency_table(limit=1, bigrams=True)[0]["term"] == "home office"
+
+
+def test_text_tally_includes_summary():
+    events = [
+        {"id": n, "content": {"answer": {"0": {"0": [{"answer": text, "condanswer": "string"}]}}}}
+        for n, text in enumerate(["Gute Stimmung", "gute Kantine"])
+    ]
+    tally = ResultsStore().update("abc", "0", "0", "TextQuestion", events)
+    assert tally.responses == 2
+    assert tally.text.terms.top(1) == [("gute", 2, 0)]
@@ -0,0 +1,105 @@
+"""
+Tests for per-minute timelines and the vote time series
+"""
+import pytest
+
+from api import timeseries
+from api.event_store import EventStore
+from api.results_store import ResultsStore
+from api.timeline import Timeline, timeline_from_columns
+from workflow.timeline_command import parse_timeline_command, render_timeline
+
+BLOCKS = {"0": {"questions": {
+    "0": {"question_type": "ChoiceMulti", "question": {"DE": "Snacks?"},
+          "config": {"options": {"a": {"DE": "Apples"}, "b": {"DE": "Bread"}, "c": {"DE": "Cake"}}}},
+    "1": {"question_type": "RangeSlider", "question": {"DE": "Mood?"}, "config": {}},
+}}}
+
+
+def event(n, answer, timestamp):
+    return {"id": n, "participant": f"p{n}", "timestamp": timestamp,
+            "content": {"answer": {"0": {"0": [{"answer": a} for a in answer]}}}}
+
+
+# three answers in the first hour, two in the second, one without a timestamp
+CHOICES = [
+    event(1, ["0"], 30), event(2, ["0", "1"], 90), event(3, ["2"], 3000),
+    event(4, ["1"], 3700), event(5, ["1", "2"], 4000), event(6, ["0"], None),
+]
+SLIDER = [event(n, ["5"], 60.0 * n) for n in range(1, 4)]
+
+
+def test_timeline_rolls_minutes_up():
+    timeline = Timeline()
+    for when, options in [(30, [0]), (90, [0, 1]), (3700, [1]), (None, [0])]:
+        timeline.add(when, options)
+    assert timeline.buckets(60) == [(0, 1, {0: 1}), (60, 1, {0: 1, 1: 1}), (3660, 1, {1: 1})]
+    assert timeline.buckets(3600) == [(0, 2, {0: 2, 1: 1}), (3600, 1, {1: 1})]
+    assert timeline.untimed == 1
+    with pytest.raises(ValueError):
+        timeline.buckets(90)
+
+
+def test_results_store_extends_the_timeline_incrementally():
+    store = ResultsStore()
+    store.update("abc", "0", "0", "ChoiceMulti", CHOICES[:3])
+    tally = store.update("abc", "0", "0", "ChoiceMulti", CHOICES)
+    assert tally.timeline.buckets(3600) == [(0, 3, {0: 2, 1: 1, 2: 1}), (3600, 2, {1: 2, 2: 1})]
+    assert tally.timeline.untimed == 1
+
+    store.ingest_ballot("abc", {"blocks": {"0": {"questions": {"0": {"answers": [{"0": {"0": [{"answer": "2"}]}}]}}}}})
+    assert store.update("abc", "0", "0", "ChoiceMulti", CHOICES).timeline.untimed == 1  # queued ballots are timed
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_stored_columns_give_the_same_timeline(tmp_path, use_numpy):
+    events = CHOICES + [dict(event(7, ["2"], 5000), participant="p2")]  # p2 edits their answer
+    store = EventStore(str(tmp_path))
+    store.append("abc", "0", "0", events)
+    columns = store.columns("abc", "0", "0")
+    from_columns = timeline_from_columns(
+        columns["timestamp"], columns["mask"], 3, columns["respondent"], use_numpy=use_numpy
+    )
+
+    tally = ResultsStore().update("abc", "0", "0", "ChoiceMulti", events)
+    assert tally.timeline.buckets(3600) == [(0, 2, {0: 1, 2: 1}), (3600, 3, {1: 2, 2: 2})]
+    assert from_columns.counts == tally.timeline.counts
+    assert from_columns.untimed == tally.timeline.untimed
+
+
+@pytest.fixture
+def survey(monkeypatch):
+    store = ResultsStore()
+
+    def fetch_survey_tallies(code, blocks, keys):
+        events = {"0": CHOICES, "1": SLIDER}
+        return [(blocks[b]["questions"][q], store.update(code, b, q, blocks[b]["questions"][q]["question_type"],
+                                                          events[q])) for b, q in keys]
+
+    monkeypatch.setattr(timeseries, "get_cached_vote_structure", lambda code: BLOCKS)
+    monkeypatch.setattr(timeseries.get_result, "fetch_survey_tallies", fetch_survey_tallies)
+
+
+def test_survey_timeseries(survey):
+    doc = timeseries.survey_timeseries("abc", "hour")
+    choice, slider = doc["questions"]
+    assert [b["responses"] for b in choice["buckets"]] == [3, 2]
+    assert [b["cumulative"] for b in choice["buckets"]] == [3, 5]
+    assert choice["labels"] == ["Apples", "Bread", "Cake"]
+    assert choice["buckets"][1]["shares"] == [0.0, 1.0, 0.5]
+    assert "shares" not in slider["buckets"][0]
+    assert doc["answers"] == [{"start": 0, "count": 6, "cumulative": 6}, {"start": 3600, "count": 2, "cumulative": 8}]
+
+    with pytest.raises(ValueError):
+        timeseries.survey_timeseries("abc", "week")
+
+
+def test_timeline_command(survey):
+    assert parse_timeline_command("abc") == ("abc", "hour")
+    assert parse_timeline_command("abc day") == ("abc", "day")
+    with pytest.raises(ValueError):
+        parse_timeline_command("abc fortnight")
+
+    text = render_timeline(timeseries.survey_timeseries("abc", "hour"))
+    assert "1970-01-01 01:00" in text and "(total 8)" in text
+    assert "Apples: 67% → 0%" in text
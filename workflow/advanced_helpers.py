@@ -1,6 +1,50 @@
 """
 Helper functions for advanced survey creation mode
 """
+from workflow.messages import MessageTemplate, join_sections
+
+PREVIEW_HEADER = MessageTemplate("<strong>Question Preview:</strong>\n\n{question}\n<strong>Type:</strong> {q_type}\n")
+PREVIEW_OPTIONS = MessageTemplate("<strong>Options:</strong>\n{options!h}")
+PREVIEW_RANGE = MessageTemplate("<strong>Rating Range:</strong> {min} to {max}")
+OPTION_LINE = MessageTemplate("- {option}")
+PREVIEW_ERRORS = MessageTemplate("\n\n<strong>⚠️ Validation Errors:</strong>\n{errors!h}\nPlease fix these issues before saving.")
+PREVIEW_WARNINGS = MessageTemplate("\n\n<strong>⚠️ Warnings:</strong>\n{warnings!h}")
+ERROR_LINE = MessageTemplate("❌ {error}\n")
+WARNING_LINE = MessageTemplate("⚠️ {warning}\n")
+PREVIEW_COMMANDS = (
+    "\n\n<strong>Commands:</strong>\n"
+    "• <strong>save</strong> - Add this question\n"
+    "• <strong>edit question</strong> - Change the question text\n"
+)
+PREVIEW_EDIT_OPTIONS = "• <strong>edit options</strong> - Change the options\n"
+PREVIEW_EDIT_RANGE = "• <strong>edit range</strong> - Change the rating range\n"
+
+OVERVIEW_HEADER = MessageTemplate(
+    "<strong>Survey Overview:</strong>\n\n"
+    "<strong>Creator Email:</strong> {email}\n"
+    "<strong>Title:</strong> {title}\n"
+)
+OVERVIEW_DESCRIPTION = MessageTemplate("<strong>Description:</strong> {description}\n")
+OVERVIEW_LANGUAGE = MessageTemplate("<strong>Language:</strong> {language}\n\n")
+OVERVIEW_BLOCK = MessageTemplate("\n<strong>Block {index}: {title}</strong>\n{description!h}{questions!h}")
+OVERVIEW_BLOCK_DESCRIPTION = MessageTemplate("  {description}\n")
+OVERVIEW_BLOCK_QUESTION = MessageTemplate("  {index}. {question} ({q_type})\n")
+OVERVIEW_STANDALONE_QUESTION = MessageTemplate("{index}. {question} ({q_type})\n")
+OVERVIEW_COMMANDS = (
+    "\n\n<strong>Commands:</strong>\n"
+    "• <strong>done</strong> - Create the survey\n"
+    "• <strong>add block</strong> - Add another question block\n"
+    "• <strong>add question</strong> - Add standalone question\n"
+    "• <strong>cancel</strong> - Discard this survey"
+)
+
+
+def _question_rows(questions):
+    return [
+        {"index": j, "question": q["question"], "q_type": q["type"]}
+        for j, q in enumerate(questions, 1)
+    ]
+
 
 def send_question_preview(state, validator):
     """Generate a preview of the current question with validation"""
@@ -8,12 +52,13 @@ def send_question_preview(state, validator):
     q_type = q["type"]
     question_text = q.get("question", "")
     
-    preview = f"<strong>Question Preview:</strong>\n\n{question_text}\n<strong>Type:</strong> {q_type}\n"
+    sections = [PREVIEW_HEADER.render(question=question_text, q_type=q_type)]
     
     if "options" in q:
-        preview += "<strong>Options:</strong>\n" + "\n".join([f"- {opt}" for opt in q["options"]])
+        options = OPTION_LINE.render_each([{"option": opt} for opt in q["options"]])
+        sections.append(PREVIEW_OPTIONS.render(options=options))
     elif q_type == "RangeSlider" and "rating_min" in q:
-        preview += f"<strong>Rating Range:</strong> {q['rating_min']} to {q['rating_max']}"
+        sections.append(PREVIEW_RANGE.render(min=q["rating_min"], max=q["rating_max"]))
     
     # Transform question data to API format for validation
     question_data_for_validation = {
@@ -48,66 +93,57 @@ def send_question_preview(state, validator):
     validation_result = validator.validate_question(question_data_for_validation, q_type)
     
     if not validation_result.success:
-        preview += "\n\n<strong>⚠️ Validation Errors:</strong>\n"
-        for error in validation_result.errors:
-            preview += f"❌ {error}\n"
-        preview += "\nPlease fix these issues before saving."
+        errors = ERROR_LINE.render_each([{"error": e} for e in validation_result.errors], sep="")
+        sections.append(PREVIEW_ERRORS.render(errors=errors))
     else:
         if validation_result.warnings:
-            preview += "\n\n<strong>⚠️ Warnings:</strong>\n"
-            for warning in validation_result.warnings:
-                preview += f"⚠️ {warning}\n"
-        
-        preview += "\n\n<strong>Commands:</strong>\n"
-        preview += "• <strong>save</strong> - Add this question\n"
-        preview += "• <strong>edit question</strong> - Change the question text\n"
+            warnings = WARNING_LINE.render_each([{"warning": w} for w in validation_result.warnings], sep="")
+            sections.append(PREVIEW_WARNINGS.render(warnings=warnings))
         
+        sections.append(PREVIEW_COMMANDS)
         if q_type in ["ChoiceSingle", "ChoiceMulti"]:
-            preview += "• <strong>edit options</strong> - Change the options\n"
+            sections.append(PREVIEW_EDIT_OPTIONS)
         elif q_type == "RangeSlider":
-            preview += "• <strong>edit range</strong> - Change the rating range\n"
+            sections.append(PREVIEW_EDIT_RANGE)
     
     # Store validation result for later use
     state["temp"]["validation_result"] = validation_result
     
-    return preview
+    return join_sections(*sections)
 
 
 def send_advanced_overview(state):
     """Generate complete overview for advanced mode"""
     t = state["temp"]
     
-    overview = "<strong>Survey Overview:</strong>\n\n"
-    overview += f"<strong>Creator Email:</strong> {t['email']}\n"
-    overview += f"<strong>Title:</strong> {t['title']}\n"
+    sections = [OVERVIEW_HEADER.render(email=t["email"], title=t["title"])]
     
     if "description" in t:
-        overview += f"<strong>Description:</strong> {t['description']}\n"
+        sections.append(OVERVIEW_DESCRIPTION.render(description=t["description"]))
     
-    overview += f"<strong>Language:</strong> {t.get('language', 'EN')}\n\n"
+    sections.append(OVERVIEW_LANGUAGE.render(language=t.get("language", "EN")))
     
     # Show blocks
     if t.get("question_blocks"):
-        overview += "<strong>Question Blocks:</strong>\n"
-        for i, block in enumerate(t["question_blocks"], 1):
-            overview += f"\n<strong>Block {i}: {block['title']}</strong>\n"
-            if block.get("description"):
-                overview += f"  {block['description']}\n"
-            for j, q in enumerate(block["questions"], 1):
-                overview += f"  {j}. {q['question']} ({q['type']})\n"
+        sections.append("<strong>Question Blocks:</strong>\n")
+        sections.append(OVERVIEW_BLOCK.render_each([
+            {
+                "index": i,
+                "title": block["title"],
+                "description": (
+                    OVERVIEW_BLOCK_DESCRIPTION.render(description=block["description"])
+                    if block.get("description") else ""
+                ),
+                "questions": OVERVIEW_BLOCK_QUESTION.render_each(_question_rows(block["questions"]), sep="")
+            }
+            for i, block in enumerate(t["question_blocks"], 1)
+        ], sep=""))
     
     # Show standalone questions
     if t.get("standalone_questions"):
-        overview += "\n<strong>Standalone Questions:</strong>\n"
-        for i, q in enumerate(t["standalone_questions"], 1):
-            overview += f"{i}. {q['question']} ({q['type']})\n"
-    
-    overview += (
-        "\n\n<strong>Commands:</strong>\n"
-        "• <strong>done</strong> - Create the survey\n"
-        "• <strong>add block</strong> - Add another question block\n"
-        "• <strong>add question</strong> - Add standalone question\n"
-        "• <strong>cancel</strong> - Discard this survey"
-    )
-    
-    return overview
+        sections.append("\n<strong>Standalone Questions:</strong>\n")
+        sections.append(OVERVIEW_STANDALONE_QUESTION.render_each(_question_rows(t["standalone_questions"]), sep=""))
+    
+    sections.append(OVERVIEW_COMMANDS)
+    
+    return join_sections(*sections)
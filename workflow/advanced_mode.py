@@ -16,7 +16,7 @@ def handle_advanced_email(text, state, messages, validator):
     """Handle email input for advanced mode"""
     email_pattern = r'^[a-zA-Z0-9._%+-]+@telekom\.(com|de)$'
     if not re.fullmatch(email_pattern, text.strip()):
-        messages.append({"from": "VoteBot", "text": "⚠️ Please enter a valid email address. Only @telekom.com or @telekom.de domains are allowed."})
+        messages.append({"from": "VoteBot", "text": "⚠️ Please enter a valid email address. Only @telekom.com or @telekom.de domains are allowed.", "error": True})
         return jsonify(messages=messages)
     
     state["temp"]["email"] = text.strip()
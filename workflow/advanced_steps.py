@@ -4,8 +4,50 @@ These functions handle the detailed steps of creating questions and blocks
 """
 from flask import jsonify
 from workflow.advanced_helpers import send_question_preview, send_advanced_overview
+from workflow.jobs import submit_job, working_message
+from workflow.messages import MessageTemplate
 from workflow.survey_api import create_advanced_survey
 
+QUESTION_TYPE_MENU = (
+    "What type of question?\n\n"
+    "1. Single Choice\n"
+    "2. Multiple Choice\n"
+    "3. Rating (0-100 scale)\n"
+    "4. Free Text"
+)
+CURRENT_BLOCK = MessageTemplate(
+    "<strong>Current Block: {title}</strong>\n"
+    "Ready to add questions!\n\n"
+    "<strong>What type of question?</strong>\n\n"
+    "1️⃣ Single Choice\n"
+    "2️⃣ Multiple Choice\n"
+    "3️⃣ Rating (0-100 scale)\n"
+    "4️⃣ Free Text"
+)
+ADDING_TO_BLOCK = MessageTemplate("<strong>Adding to: {title}</strong>\n\n{menu!h}")
+QUESTION_SAVED_TO_BLOCK = MessageTemplate(
+    "Question saved to <strong>{title}</strong> ({count} total)\n\n"
+    "Add another question to this block? (yes/no)"
+)
+ERROR_LINE = MessageTemplate("❌ {error}")
+SURVEY_VALIDATION_FAILED = MessageTemplate(
+    "<strong>⚠️ Validation Failed:</strong>\n\n"
+    "{errors!h}\n\n"
+    "Please fix these issues before creating the survey.\n"
+    "Type 'cancel' to discard or fix the issues by adding/editing questions."
+)
+SURVEY_CREATE_ERROR = MessageTemplate(
+    "<strong>❌ Error creating survey:</strong>\n{error}\n\n"
+    "Type 'retry' to try again or 'cancel' to discard."
+)
+SURVEY_CREATED = MessageTemplate(
+    "<strong>✅ Survey created successfully!</strong>\n\n"
+    "<strong>Survey Code:</strong> {code}\n\n"
+    "Type <strong>create</strong> to make another survey, "
+    "<strong>vote {code}</strong> to participate, or "
+    "<strong>result {code}</strong> to see results."
+)
+
 
 def handle_block_selection(text, state, messages):
     """Handle whether user wants to create a block or standalone questions"""
@@ -23,7 +65,7 @@ def handle_block_selection(text, state, messages):
             "3️⃣ Rating (0-100 scale)"
         )})
     else:
-        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'"})
+        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'", "error": True})
     return jsonify(messages=messages)
 
 
@@ -43,15 +85,7 @@ def handle_block_description(text, state, messages):
     state["step"] = "select_question_type"
     
     block_title = state["temp"]["current_block"]["title"]
-    messages.append({"from": "VoteBot", "text": (
-        f"<strong>Current Block: {block_title}</strong>\n"
-        "Ready to add questions!\n\n"
-        "<strong>What type of question?</strong>\n\n"
-        "1️⃣ Single Choice\n"
-        "2️⃣ Multiple Choice\n"
-        "3️⃣ Rating (0-100 scale)\n"
-        "4️⃣ Free Text"
-    )})
+    messages.append({"from": "VoteBot", "text": CURRENT_BLOCK.render(title=block_title)})
     return jsonify(messages=messages)
 
 
@@ -69,7 +103,7 @@ def handle_question_type(text, state, messages):
         state["step"] = "question_text"
         messages.append({"from": "VoteBot", "text": "❓ <strong>Your question?</strong>"})
     else:
-        messages.append({"from": "VoteBot", "text": "⚠️ Please select a valid option (1-4)"})
+        messages.append({"from": "VoteBot", "text": "⚠️ Please select a valid option (1-4)", "error": True})
     return jsonify(messages=messages)
 
 
@@ -99,7 +133,7 @@ def handle_question_options(text, state, messages):
     """Handle adding options to choice questions"""
     if text.lower() == "done":
         if len(state["temp"]["current_question"]["options"]) < 2:
-            messages.append({"from": "VoteBot", "text": "Please add at least 2 options before typing 'done'"})
+            messages.append({"from": "VoteBot", "text": "Please add at least 2 options before typing 'done'", "error": True})
             return jsonify(messages=messages)
         
         state["step"] = "question_confirm"
@@ -118,13 +152,13 @@ def handle_rating_min(text, state, messages):
     try:
         min_val = int(text)
         if min_val < 0 or min_val > 100:
-            messages.append({"from": "VoteBot", "text": "Please enter a number between 0 and 100"})
+            messages.append({"from": "VoteBot", "text": "Please enter a number between 0 and 100", "error": True})
             return jsonify(messages=messages)
         state["temp"]["current_question"]["rating_min"] = min_val
         state["step"] = "rating_max"
         messages.append({"from": "VoteBot", "text": "<strong>Maximum rating value?</strong> (e.g., 100)"})
     except ValueError:
-        messages.append({"from": "VoteBot", "text": "Please enter a valid number"})
+        messages.append({"from": "VoteBot", "text": "Please enter a valid number", "error": True})
     return jsonify(messages=messages)
 
 
@@ -134,10 +168,10 @@ def handle_rating_max(text, state, messages):
         max_val = int(text)
         min_val = state["temp"]["current_question"]["rating_min"]
         if max_val < 0 or max_val > 100:
-            messages.append({"from": "VoteBot", "text": "Please enter a number between 0 and 100"})
+            messages.append({"from": "VoteBot", "text": "Please enter a number between 0 and 100", "error": True})
             return jsonify(messages=messages)
         if max_val <= min_val:
-            messages.append({"from": "VoteBot", "text": f"Maximum must be greater than minimum ({min_val})"})
+            messages.append({"from": "VoteBot", "text": f"Maximum must be greater than minimum ({min_val})", "error": True})
             return jsonify(messages=messages)
         state["temp"]["current_question"]["rating_max"] = max_val
         state["step"] = "question_confirm"
@@ -145,7 +179,7 @@ def handle_rating_max(text, state, messages):
         validator = SurveyValidator()
         messages.append({"from": "VoteBot", "text": send_question_preview(state, validator)})
     except ValueError:
-        messages.append({"from": "VoteBot", "text": "Please enter a valid number"})
+        messages.append({"from": "VoteBot", "text": "Please enter a valid number", "error": True})
     return jsonify(messages=messages)
 
 
@@ -157,7 +191,7 @@ def handle_question_confirm(text, state, messages):
         # Check if validation passed
         validation_result = state["temp"].get("validation_result")
         if validation_result and not validation_result.success:
-            messages.append({"from": "VoteBot", "text": "Cannot save question with validation errors. Please fix the issues first."})
+            messages.append({"from": "VoteBot", "text": "Cannot save question with validation errors. Please fix the issues first.", "error": True})
             return jsonify(messages=messages)
         
         # Save question to current block or standalone
@@ -168,10 +202,7 @@ def handle_question_confirm(text, state, messages):
             
             block_title = state["temp"]["current_block"]["title"]
             q_count = len(state["temp"]["current_block"]["questions"])
-            messages.append({"from": "VoteBot", "text": (
-                f"Question saved to <strong>{block_title}</strong> ({q_count} total)\n\n"
-                "Add another question to this block? (yes/no)"
-            )})
+            messages.append({"from": "VoteBot", "text": QUESTION_SAVED_TO_BLOCK.render(title=block_title, count=q_count)})
         else:
             state["temp"]["standalone_questions"].append(state["temp"]["current_question"])
             state["temp"]["current_question"] = None
@@ -215,14 +246,7 @@ def handle_more_questions_in_block(text, state, messages):
     if text.lower() == "yes":
         state["step"] = "select_question_type"
         block_title = state["temp"]["current_block"]["title"]
-        messages.append({"from": "VoteBot", "text": (
-            f"<strong>Adding to: {block_title}</strong>\n\n"
-            "What type of question?\n\n"
-            "1. Single Choice\n"
-            "2. Multiple Choice\n"
-            "3. Rating (0-100 scale)\n"
-            "4. Free Text"
-        )})
+        messages.append({"from": "VoteBot", "text": ADDING_TO_BLOCK.render(title=block_title, menu=QUESTION_TYPE_MENU)})
     elif text.lower() == "no":
         # Save block and ask if want to create another block
         state["temp"]["question_blocks"].append(state["temp"]["current_block"])
@@ -235,7 +259,7 @@ def handle_more_questions_in_block(text, state, messages):
             "Create another question block? (yes/no)"
         )})
     else:
-        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'"})
+        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'", "error": True})
     
     return jsonify(messages=messages)
 
@@ -244,18 +268,12 @@ def handle_more_standalone(text, state, messages):
     """Ask if user wants to add more standalone questions"""
     if text.lower() == "yes":
         state["step"] = "select_question_type"
-        messages.append({"from": "VoteBot", "text": (
-            "What type of question?\n\n"
-            "1. Single Choice\n"
-            "2. Multiple Choice\n"
-            "3. Rating (0-100 scale)\n"
-            "4. Free Text"
-        )})
+        messages.append({"from": "VoteBot", "text": QUESTION_TYPE_MENU})
     elif text.lower() == "no":
         state["step"] = "advanced_overview"
         messages.append({"from": "VoteBot", "text": send_advanced_overview(state)})
     else:
-        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'"})
+        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'", "error": True})
     
     return jsonify(messages=messages)
 
@@ -270,7 +288,7 @@ def handle_more_blocks(text, state, messages):
         state["step"] = "ask_standalone_after_blocks"
         messages.append({"from": "VoteBot", "text": "Add standalone questions (not in a block)? (yes/no)"})
     else:
-        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'"})
+        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'", "error": True})
     
     return jsonify(messages=messages)
 
@@ -280,190 +298,184 @@ def handle_standalone_after_blocks(text, state, messages):
     if text.lower() == "yes":
         state["temp"]["current_block"] = None
         state["step"] = "select_question_type"
-        messages.append({"from": "VoteBot", "text": (
-            "<strong>Adding standalone questions</strong>\n\n"
-            "What type of question?\n\n"
-            "1. Single Choice\n"
-            "2. Multiple Choice\n"
-            "3. Rating (0-100 scale)\n"
-            "4. Free Text"
-        )})
+        messages.append({"from": "VoteBot", "text": "<strong>Adding standalone questions</strong>\n\n" + QUESTION_TYPE_MENU})
     elif text.lower() == "no":
         state["step"] = "advanced_overview"
         messages.append({"from": "VoteBot", "text": send_advanced_overview(state)})
     else:
-        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'"})
+        messages.append({"from": "VoteBot", "text": "Please reply 'yes' or 'no'", "error": True})
     
     return jsonify(messages=messages)
 
 
-def handle_advanced_overview(text, state, messages, room):
-    """Handle final overview and survey creation"""
-    from app_backup2 import ROOMS
-    
-    cmd = text.lower()
+def create_survey_job(state, room, ROOMS):
+    """Background job body: validate the full survey, then create it"""
+    messages = []
+    # Validate complete survey structure before creation
+    messages.append({"from": "VoteBot", "text": "<strong>Validating survey structure...</strong>"})
     
-    if cmd == "done":
-        # Validate complete survey structure before creation
-        messages.append({"from": "VoteBot", "text": "<strong>Validating survey structure...</strong>"})
+    try:
+        from api.validation import SurveyValidator
+        validator = SurveyValidator()
         
-        try:
-            from api.validation import SurveyValidator
-            validator = SurveyValidator()
-            
-            # Build blocks for validation
-            blocks_for_validation = {}
-            block_idx = 0
-            
-            # Add question blocks
-            for block in state["temp"].get("question_blocks", []):
-                questions_dict = {}
-                for q_idx, q in enumerate(block["questions"]):
-                    question_obj = {
-                        "question": {"DE": q["question"]},
-                        "question_type": q["type"],
-                        "settings": {"mandatory": False, "grid": False},
-                        "config": {},
-                        "analysis_mode": "FREE"
-                    }
-                    
-                    if q["type"] in ["ChoiceSingle", "ChoiceMulti"]:
-                        options_dict = {str(i): {"DE": opt} for i, opt in enumerate(q["options"])}
-                        question_obj["config"]["option_type"] = "TEXT"
-                        question_obj["config"]["options"] = options_dict
-                    elif q["type"] == "RangeSlider":
-                        min_val = q.get("rating_min", 0)
-                        max_val = q.get("rating_max", 100)
-                        question_obj["config"]["range_config"] = {
-                            "min": min_val,
-                            "max": max_val,
-                            "start": str(min_val),
-                            "end": str(max_val),
-                            "stepsize": 1
-                        }
-                    
-                    questions_dict[str(q_idx)] = question_obj
-                
-                # Build proper structure
-                num_questions = len(block["questions"])
-                components = {}
-                for i in range(num_questions):
-                    components[str(i)] = {"default": -1 if i == num_questions - 1 else i + 1}
-                
-                block_data = {
-                    "title": {"DE": block["title"]},
-                    "questions": questions_dict,
-                    "analysis_mode": "FREE",
-                    "structure": {"start": 0, "components": components}
+        # Build blocks for validation
+        blocks_for_validation = {}
+        block_idx = 0
+        
+        # Add question blocks
+        for block in state["temp"].get("question_blocks", []):
+            questions_dict = {}
+            for q_idx, q in enumerate(block["questions"]):
+                question_obj = {
+                    "question": {"DE": q["question"]},
+                    "question_type": q["type"],
+                    "settings": {"mandatory": False, "grid": False},
+                    "config": {},
+                    "analysis_mode": "FREE"
                 }
                 
-                if block.get("description", "").strip():
-                    block_data["description"] = {"DE": block["description"]}
-                
-                blocks_for_validation[str(block_idx)] = block_data
-                block_idx += 1
-            
-            # Add standalone questions
-            if state["temp"].get("standalone_questions"):
-                questions_dict = {}
-                for q_idx, q in enumerate(state["temp"]["standalone_questions"]):
-                    question_obj = {
-                        "question": {"DE": q["question"]},
-                        "question_type": q["type"],
-                        "settings": {"mandatory": False, "grid": False},
-                        "config": {},
-                        "analysis_mode": "FREE"
+                if q["type"] in ["ChoiceSingle", "ChoiceMulti"]:
+                    options_dict = {str(i): {"DE": opt} for i, opt in enumerate(q["options"])}
+                    question_obj["config"]["option_type"] = "TEXT"
+                    question_obj["config"]["options"] = options_dict
+                elif q["type"] == "RangeSlider":
+                    min_val = q.get("rating_min", 0)
+                    max_val = q.get("rating_max", 100)
+                    question_obj["config"]["range_config"] = {
+                        "min": min_val,
+                        "max": max_val,
+                        "start": str(min_val),
+                        "end": str(max_val),
+                        "stepsize": 1
                     }
-                    
-                    if q["type"] in ["ChoiceSingle", "ChoiceMulti"]:
-                        options_dict = {str(i): {"DE": opt} for i, opt in enumerate(q["options"])}
-                        question_obj["config"]["option_type"] = "TEXT"
-                        question_obj["config"]["options"] = options_dict
-                    elif q["type"] == "RangeSlider":
-                        min_val = q.get("rating_min", 0)
-                        max_val = q.get("rating_max", 100)
-                        question_obj["config"]["range_config"] = {
-                            "min": min_val,
-                            "max": max_val,
-                            "start": str(min_val),
-                            "end": str(max_val),
-                            "stepsize": 1
-                        }
-                    
-                    questions_dict[str(q_idx)] = question_obj
-                
-                num_questions = len(state["temp"]["standalone_questions"])
-                components = {}
-                for i in range(num_questions):
-                    components[str(i)] = {"default": -1 if i == num_questions - 1 else i + 1}
                 
-                blocks_for_validation[str(block_idx)] = {
-                    "title": {"DE": "Additional Questions"},
-                    "description": {"DE": "Standalone questions"},
-                    "questions": questions_dict,
-                    "analysis_mode": "FREE",
-                    "structure": {"start": 0, "components": components}
-                }
+                questions_dict[str(q_idx)] = question_obj
+            
+            # Build proper structure
+            num_questions = len(block["questions"])
+            components = {}
+            for i in range(num_questions):
+                components[str(i)] = {"default": -1 if i == num_questions - 1 else i + 1}
             
-            # Validate full survey
-            survey_config = {
-                "title": {"DE": state["temp"]["title"]},
-                "creator": state["temp"]["email"]
+            block_data = {
+                "title": {"DE": block["title"]},
+                "questions": questions_dict,
+                "analysis_mode": "FREE",
+                "structure": {"start": 0, "components": components}
             }
-            if state["temp"].get("description", "").strip():
-                survey_config["description"] = {"DE": state["temp"]["description"]}
             
-            validation_result = validator.validate_full_survey(survey_config, blocks_for_validation)
+            if block.get("description", "").strip():
+                block_data["description"] = {"DE": block["description"]}
+            
+            blocks_for_validation[str(block_idx)] = block_data
+            block_idx += 1
+        
+        # Add standalone questions
+        if state["temp"].get("standalone_questions"):
+            questions_dict = {}
+            for q_idx, q in enumerate(state["temp"]["standalone_questions"]):
+                question_obj = {
+                    "question": {"DE": q["question"]},
+                    "question_type": q["type"],
+                    "settings": {"mandatory": False, "grid": False},
+                    "config": {},
+                    "analysis_mode": "FREE"
+                }
+                
+                if q["type"] in ["ChoiceSingle", "ChoiceMulti"]:
+                    options_dict = {str(i): {"DE": opt} for i, opt in enumerate(q["options"])}
+                    question_obj["config"]["option_type"] = "TEXT"
+                    question_obj["config"]["options"] = options_dict
+                elif q["type"] == "RangeSlider":
+                    min_val = q.get("rating_min", 0)
+                    max_val = q.get("rating_max", 100)
+                    question_obj["config"]["range_config"] = {
+                        "min": min_val,
+                        "max": max_val,
+                        "start": str(min_val),
+                        "end": str(max_val),
+                        "stepsize": 1
+                    }
+                
+                questions_dict[str(q_idx)] = question_obj
             
-            if not validation_result.success:
-                messages.append({"from": "VoteBot", "text": (
-                    "<strong>⚠️ Validation Failed:</strong>\\n\\n"
-                    + "\\n".join([f"❌ {err}" for err in validation_result.errors]) +
-                    "\\n\\nPlease fix these issues before creating the survey.\\n"
-                    "Type 'cancel' to discard or fix the issues by adding/editing questions."
-                )})
-                return jsonify(messages=messages)
+            num_questions = len(state["temp"]["standalone_questions"])
+            components = {}
+            for i in range(num_questions):
+                components[str(i)] = {"default": -1 if i == num_questions - 1 else i + 1}
             
-            # Validation passed, create the survey
-            messages.append({"from": "VoteBot", "text": "<strong>✅ Validation passed! Creating survey...</strong>"})
-            response = create_advanced_survey(state["temp"])
+            blocks_for_validation[str(block_idx)] = {
+                "title": {"DE": "Additional Questions"},
+                "description": {"DE": "Standalone questions"},
+                "questions": questions_dict,
+                "analysis_mode": "FREE",
+                "structure": {"start": 0, "components": components}
+            }
+        
+        # Validate full survey
+        survey_config = {
+            "title": {"DE": state["temp"]["title"]},
+            "creator": state["temp"]["email"]
+        }
+        if state["temp"].get("description", "").strip():
+            survey_config["description"] = {"DE": state["temp"]["description"]}
+        
+        validation_result = validator.validate_full_survey(survey_config, blocks_for_validation)
+        
+        if not validation_result.success:
+            errors = ERROR_LINE.render_each([{"error": err} for err in validation_result.errors])
+            messages.append({"from": "VoteBot", "text": SURVEY_VALIDATION_FAILED.render(errors=errors)})
+            state["step"] = "advanced_overview"
+            return messages
+        
+        # Validation passed, create the survey
+        messages.append({"from": "VoteBot", "text": "<strong>✅ Validation passed! Creating survey...</strong>"})
+        response = create_advanced_survey(state["temp"])
+        
+        if "error" in response:
+            messages.append({"from": "VoteBot", "text": SURVEY_CREATE_ERROR.render(error=response["error"])})
+            state["step"] = "advanced_overview"
+        else:
+            enter_code = response.get("enter_code")
+            ROOMS[room]["last_survey_code"] = enter_code
+            ROOMS[room]["pending_create"] = None
+            state["step"] = "main"  # Reset to main menu
             
-            if "error" in response:
-                messages.append({"from": "VoteBot", "text": (
-                    f"<strong>❌ Error creating survey:</strong>\n{response['error']}\n\n"
-                    "Type 'retry' to try again or 'cancel' to discard."
-                )})
-            else:
-                enter_code = response.get("enter_code")
-                ROOMS[room]["last_survey_code"] = enter_code
-                ROOMS[room]["pending_create"] = None
-                state["step"] = "main"  # Reset to main menu
-                
-                messages.append({"from": "VoteBot", "text": (
-                    f"<strong>✅ Survey created successfully!</strong>\n\n"
-                    f"<strong>Survey Code:</strong> {enter_code}\n\n"
-                    "Type <strong>create</strong> to make another survey, "
-                    "<strong>vote {enter_code}</strong> to participate, or "
-                    "<strong>result {enter_code}</strong> to see results."
-                )})
-        except Exception as e:
-            messages.append({"from": "VoteBot", "text": (
-                f"<strong>❌ Error:</strong> {str(e)}\n\n"
-                "Type 'retry' to try again or 'cancel' to discard."
-            )})
+            messages.append({"from": "VoteBot", "text": SURVEY_CREATED.render(code=enter_code)})
+    except Exception as e:
+        messages.append({"from": "VoteBot", "text": (
+            f"<strong>❌ Error:</strong> {str(e)}\n\n"
+            "Type 'retry' to try again or 'cancel' to discard."
+        )})
+        state["step"] = "advanced_overview"
+    
+    return messages
+
+
+def handle_advanced_creating(text, state, messages):
+    """Reply while the creation job for this survey is still running"""
+    messages.append({"from": "VoteBot", "text": (
+        f"⏳ Your survey is still being created (job {state.get('job_id')}). Please wait a moment."
+    )})
+    return jsonify(messages=messages)
+
+
+def handle_advanced_overview(text, state, messages, room, ROOMS):
+    """Handle final overview and survey creation"""
+    cmd = text.lower()
+    
+    if cmd == "done":
+        # Validation and creation take several Vote2 calls; run them in the background
+        state["step"] = "advanced_creating"
+        state["job_id"] = submit_job(create_survey_job, state, room, ROOMS)
+        messages.append(working_message(state["job_id"], "Validating and creating your survey."))
     elif cmd == "add block":
         state["step"] = "block_title"
         messages.append({"from": "VoteBot", "text": "<strong>Block title?</strong>"})
     elif cmd == "add question":
         state["temp"]["current_block"] = None
         state["step"] = "select_question_type"
-        messages.append({"from": "VoteBot", "text": (
-            "What type of question?\n\n"
-            "1. Single Choice\n"
-            "2. Multiple Choice\n"
-            "3. Rating (0-100 scale)\n"
-            "4. Free Text"
-        )})
+        messages.append({"from": "VoteBot", "text": QUESTION_TYPE_MENU})
     elif cmd == "cancel":
         ROOMS[room]["pending_create"] = None
         state["step"] = "main"  # Reset to main menu
@@ -0,0 +1,78 @@
+"""
+Cross-tab chat command
+    crosstab <code> <row question> <column question> [<column question> ...]
+Questions are 1-based positions in the survey or <block>.<question>.
+"""
+from flask import jsonify
+
+from api.crosstab import crosstab
+from workflow.jobs import submit_job, working_message
+from workflow.messages import MessageTemplate
+
+CROSSTAB_USAGE = (
+    "Usage: crosstab &lt;code&gt; &lt;question&gt; &lt;question&gt; [...]<br>"
+    "Questions are numbers in survey order (1, 2, ...) or &lt;block&gt;.&lt;question&gt;."
+)
+CROSSTAB_HEADER = MessageTemplate("📊 Cross-tab for survey {survey}\nRows: Q{ref} {text}")
+TABLE_HEADER = MessageTemplate("\nvs Q{ref} {text} ({respondents} respondents answered both)")
+CONTINGENCY_ROW = MessageTemplate("  {label}: {cells}")
+CONTINGENCY_CELL = MessageTemplate("{label} {count}")
+GROUP_ROW = MessageTemplate("  {label}: n={count}, mean {mean:.2f}, median {median:g}, sd {std:.2f}, min {min:g}, max {max:g}")
+EMPTY_GROUP_ROW = MessageTemplate("  {label}: n=0")
+CORRELATION_ROW = MessageTemplate("  mean {row_mean:.2f} vs {column_mean:.2f}, Pearson r = {pearson_r}")
+
+
+def parse_crosstab_command(param):
+    """'<code> <q> <q> ...' -> (code, row_ref, [col_refs]); raises ValueError if incomplete"""
+    parts = (param or "").split()
+    if len(parts) < 3:
+        raise ValueError("not enough arguments")
+    return parts[0], parts[1], parts[2:]
+
+
+def render_crosstab(doc):
+    """Chat text for a crosstab() document"""
+    row = doc["row"]
+    lines = [CROSSTAB_HEADER.render(survey=doc["survey"], ref=row["ref"], text=row["text"])]
+    for table in doc["tables"]:
+        col = table["column"]
+        lines.append(TABLE_HEADER.render(ref=col["ref"], text=col["text"], respondents=table["respondents"]))
+        if table["kind"] == "contingency":
+            for label, counts in zip(row["labels"], table["counts"]):
+                cells = ", ".join(
+                    CONTINGENCY_CELL.render(label=col_label, count=n) for col_label, n in zip(col["labels"], counts)
+                )
+                lines.append(CONTINGENCY_ROW.render(label=label, cells=cells))
+        elif table["kind"] == "grouped":
+            for group in table["groups"]:
+                template = GROUP_ROW if group["count"] else EMPTY_GROUP_ROW
+                lines.append(template.render(**group))
+        elif table["respondents"]:
+            r = table["pearson_r"]
+            lines.append(CORRELATION_ROW.render(
+                row_mean=table["row_mean"], column_mean=table["column_mean"],
+                pearson_r="n/a" if r is None else f"{r:.2f}"
+            ))
+    return "\n".join(lines)
+
+
+def crosstab_job(enter_code, row_ref, col_refs):
+    """Background job body for 'crosstab'"""
+    try:
+        doc = crosstab(enter_code, row_ref, col_refs)
+    except ValueError as e:
+        return [{"from": "VoteBot", "text": MessageTemplate("⚠️ {error}").render(error=str(e)), "error": True}]
+    return [{"from": "VoteBot", "text": render_crosstab(doc)}]
+
+
+def handle_crosstab(param, messages):
+    """Start a cross-tab in the background; the fetches fan out over the questions"""
+    try:
+        code, row_ref, col_refs = parse_crosstab_command(param)
+    except ValueError:
+        messages.append({"from": "VoteBot", "text": CROSSTAB_USAGE, "error": True})
+        return jsonify(messages=messages)
+
+    job_id = submit_job(crosstab_job, code, row_ref, col_refs)
+    messages.append(working_message(job_id, f"Cross-tabulating survey {code}."))
+    return jsonify(messages=messages)
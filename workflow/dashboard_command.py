@@ -0,0 +1,86 @@
+"""
+Multi-survey dashboard chat command
+    dashboard <code> <code> [...]
+    dashboard title:<pattern>        e.g. dashboard title:Pulse KW*
+"""
+from flask import jsonify
+
+from api.dashboard import build_dashboard, resolve_surveys
+from workflow.jobs import submit_job, working_message
+from workflow.messages import MessageTemplate
+
+DASHBOARD_USAGE = (
+    "Usage: dashboard &lt;code&gt; &lt;code&gt; [...]<br>"
+    "or: dashboard title:&lt;pattern&gt; (e.g. title:Pulse*)"
+)
+DASHBOARD_HEADER = MessageTemplate("📈 Dashboard for {count} surveys: {codes}")
+QUESTION_HEADER = MessageTemplate("\n{text} ({q_type})")
+SHARE_CELL = MessageTemplate("{label} {share:.0%}")
+CHOICE_LINE = MessageTemplate("  {title} (n={responses}): {cells!h}")
+MEAN_LINE = MessageTemplate("  {title} (n={responses}): average {mean}")
+TEXT_LINE = MessageTemplate("  {title} (n={responses}): {terms}")
+MISSING_LINE = MessageTemplate("  {title}: —")
+ERROR_LINE = MessageTemplate("⚠️ {title}: {error}")
+
+
+def parse_dashboard_command(param):
+    """'<code> ...' or 'title:<pattern>' -> (codes, pattern); raises ValueError if empty"""
+    param = (param or "").strip()
+    if param.startswith("title:"):
+        pattern = param[len("title:"):].strip()
+        if not pattern:
+            raise ValueError("empty title pattern")
+        return None, pattern
+    codes = param.split()
+    if not codes:
+        raise ValueError("no survey codes given")
+    return codes, None
+
+
+def render_dashboard(doc):
+    """Chat text for a build_dashboard() document"""
+    surveys = doc["surveys"]
+    lines = [DASHBOARD_HEADER.render(count=len(surveys), codes=", ".join(s["code"] for s in surveys))]
+    for survey in surveys:
+        if survey.get("error"):
+            lines.append(ERROR_LINE.render(title=survey["title"], error=survey["error"]))
+    for row in doc["questions"]:
+        lines.append(QUESTION_HEADER.render(text=row["text"], q_type=row["type"]))
+        for survey, entry in zip(surveys, row["series"]):
+            if entry is None:
+                lines.append(MISSING_LINE.render(title=survey["title"]))
+            elif "shares" in entry:
+                cells = ", ".join(
+                    SHARE_CELL.render(label=label, share=entry["shares"].get(label, 0.0)) for label in row["labels"]
+                )
+                lines.append(CHOICE_LINE.render(title=survey["title"], responses=entry["responses"], cells=cells))
+            elif "mean" in entry:
+                mean = "n/a" if entry["mean"] is None else f"{entry['mean']:.2f}"
+                lines.append(MEAN_LINE.render(title=survey["title"], responses=entry["responses"], mean=mean))
+            else:
+                terms = ", ".join(entry.get("top_terms") or [])
+                lines.append(TEXT_LINE.render(title=survey["title"], responses=entry["responses"], terms=terms))
+    return "\n".join(lines)
+
+
+def dashboard_job(codes, pattern, load):
+    """Background job body for 'dashboard'"""
+    try:
+        doc = build_dashboard(resolve_surveys(codes, pattern), load=load)
+    except ValueError as e:
+        return [{"from": "VoteBot", "text": MessageTemplate("⚠️ {error}").render(error=str(e)), "error": True}]
+    return [{"from": "VoteBot", "text": render_dashboard(doc)}]
+
+
+def handle_dashboard(param, messages, load):
+    """Compare several surveys question by question, read through `load` in the background"""
+    try:
+        codes, pattern = parse_dashboard_command(param)
+    except ValueError:
+        messages.append({"from": "VoteBot", "text": DASHBOARD_USAGE, "error": True})
+        return jsonify(messages=messages)
+
+    job_id = submit_job(dashboard_job, codes, pattern, load)
+    what = f"surveys titled {pattern}" if pattern else ", ".join(codes)
+    messages.append(working_message(job_id, f"Building the dashboard for {what}."))
+    return jsonify(messages=messages)
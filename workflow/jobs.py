@@ -0,0 +1,80 @@
+"""
+Background jobs for long-running chat commands
+Slow commands (full results, advanced survey creation) run on a bounded
+thread pool; the chat replies immediately with a job id and the final
+messages are fetched via GET /api/jobs/<id>.
+"""
+import itertools
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = 4  # max jobs running at the same time
+MAX_STORED_JOBS = 500  # finished jobs beyond this are dropped, oldest first
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="votebot-job")
+_job_ids = itertools.count(1)
+_lock = threading.Lock()
+
+# job_id -> {"id", "status", "messages", "created", "finished"}
+JOBS = OrderedDict()
+
+
+def submit_job(fn, *args):
+    """
+    Run fn(*args) in the background and return the new job id.
+    fn must return the list of chat messages to deliver when it finishes.
+    """
+    with _lock:
+        job_id = next(_job_ids)
+        JOBS[job_id] = {
+            "id": job_id,
+            "status": "pending",
+            "messages": [],
+            "created": time.time(),
+            "finished": None
+        }
+        _prune_jobs()
+    _executor.submit(_run_job, job_id, fn, args)
+    return job_id
+
+
+def get_job(job_id):
+    """Return a snapshot of the job, or None if it is unknown or expired"""
+    with _lock:
+        job = JOBS.get(job_id)
+        return dict(job) if job else None
+
+
+def working_message(job_id, what):
+    """Immediate chat reply for a command that was moved to the background"""
+    return {"from": "VoteBot", "text": f"⏳ {what} Working on it (job {job_id})...", "job": job_id}
+
+
+def _run_job(job_id, fn, args):
+    _set_job(job_id, status="running")
+    try:
+        messages = fn(*args)
+        _set_job(job_id, status="done", messages=messages, finished=time.time())
+    except Exception as e:
+        traceback.print_exc()
+        _set_job(job_id, status="failed", finished=time.time(), messages=[
+            {"from": "VoteBot", "text": f"<strong>❌ Error:</strong> {str(e)}", "error": True}
+        ])
+
+
+def _set_job(job_id, **fields):
+    with _lock:
+        if job_id in JOBS:
+            JOBS[job_id].update(fields)
+
+
+def _prune_jobs():
+    # Called with _lock held; only finished jobs are dropped
+    excess = len(JOBS) - MAX_STORED_JOBS
+    if excess <= 0:
+        return
+    for job_id in [j for j, job in JOBS.items() if job["finished"]][:excess]:
+        del JOBS[job_id]
@@ -0,0 +1,41 @@
+"""
+Bot message templates
+Templates are compiled once into literal and field parts and rendered with
+a single join instead of growing strings with +=. Field values are
+HTML-escaped because the chat inserts bot text as HTML; write {name!h}
+for values that already are HTML (e.g. the output of another template).
+"""
+import html
+from string import Formatter
+
+
+class MessageTemplate:
+    """A bot message compiled from a str.format style source"""
+
+    def __init__(self, source):
+        self.source = source
+        self._parts = []  # (literal, field, format_spec, raw)
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if conversion not in (None, "h"):
+                raise ValueError(f"Unsupported conversion !{conversion} in template: {source!r}")
+            self._parts.append((literal, field, spec or "", conversion == "h"))
+
+    def render(self, **values):
+        out = []
+        for literal, field, spec, raw in self._parts:
+            if literal:
+                out.append(literal)
+            if field is None:
+                continue
+            value = format(values[field], spec) if spec else str(values[field])
+            out.append(value if raw else html.escape(value, quote=False))
+        return "".join(out)
+
+    def render_each(self, rows, sep="\n"):
+        """Render the template once per row (a dict of field values) and join"""
+        return sep.join([self.render(**row) for row in rows])
+
+
+def join_sections(*sections):
+    """Join already rendered sections, skipping empty ones"""
+    return "".join([s for s in sections if s])
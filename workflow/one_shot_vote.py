@@ -0,0 +1,74 @@
+"""
+One-shot ballot workflow
+Answers every question of a survey in a single chat message:
+    vote <code> | <answer 1> | <answer 2> | ...
+"""
+from flask import jsonify
+from api.fetch_question import fetch_question
+from api.vote_runtime import (
+    get_cached_vote_structure, get_ballot_validator, iter_questions, parse_answer,
+    compile_answer_check, build_full_answer_payload, ballot_key
+)
+
+
+def parse_one_shot_ballot(text):
+    """Split 'vote <code> | a1 | a2' into (code, [a1, a2])"""
+    head, *answers = [part.strip() for part in text.split("|")]
+    head_parts = head.split(maxsplit=1)
+    code = head_parts[1].strip().lower() if len(head_parts) > 1 else ""
+    return code, answers
+
+
+def handle_one_shot_vote(text, messages, outbox, session_id=None, ballot_log=None):
+    """Validate all answers locally and queue the ballot for one upstream call"""
+    code, answers = parse_one_shot_ballot(text)
+    if not code:
+        messages.append({"from": "VoteBot", "text": "Usage: vote &lt;code&gt; | answer 1 | answer 2 | ...", "error": True})
+        return jsonify(messages=messages)
+
+    blocks = get_cached_vote_structure(code)
+    if not blocks:
+        messages.append({"from": "VoteBot", "text": "Survey has no questions or could not be loaded.", "error": True})
+        return jsonify(messages=messages)
+
+    question_keys = list(iter_questions(blocks))
+    validator = get_ballot_validator(code)
+    if len(answers) != len(question_keys):
+        messages.append({"from": "VoteBot", "text": (
+            f"⚠️ This survey has {len(question_keys)} questions but {len(answers)} answers were given."
+        ), "error": True})
+        return jsonify(messages=messages)
+
+    answers_dict = {}
+    question_types = {}
+    for pos, ((block_id, q_id), raw) in enumerate(zip(question_keys, answers), 1):
+        if (block_id, q_id) in validator:
+            q_type, check = validator[(block_id, q_id)]
+        else:
+            # Older structures may lack question details; fall back to the question endpoint
+            question = fetch_question(code, block_id, q_id) or {}
+            q_type = question.get("question_type", "")
+            check = compile_answer_check(question, q_type)
+
+        try:
+            ans_list = parse_answer(q_type, raw)
+        except ValueError:
+            messages.append({"from": "VoteBot", "text": f"⚠️ Answer {pos} ({raw}) is not a valid {q_type} answer.", "error": True})
+            return jsonify(messages=messages)
+        try:
+            check(ans_list)
+        except ValueError as e:
+            messages.append({"from": "VoteBot", "text": f"⚠️ Answer {pos}: {e}", "error": True})
+            return jsonify(messages=messages)
+
+        answers_dict[(block_id, q_id)] = ans_list
+        question_types[(block_id, q_id)] = q_type
+
+    payload = build_full_answer_payload(blocks, answers_dict, question_types)
+    key = ballot_key(session_id, code, payload)
+    if ballot_log is not None:
+        ballot_log.complete(session_id, key, code, payload)
+    outbox.enqueue(code, payload, dedupe_key=key)
+
+    messages.append({"from": "VoteBot", "text": f"✅ All {len(question_keys)} answers submitted. Thank you!"})
+    return jsonify(messages=messages)
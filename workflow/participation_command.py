@@ -0,0 +1,84 @@
+"""
+Distinct-respondent chat command
+    participants <code> [<code> ...] [<days>d]
+Fetches every question of the surveys (which feeds the participation
+sketches through the results store) and reports the estimates.
+"""
+import re
+import time
+
+from flask import jsonify
+
+from api.get_result import fetch_survey_tallies
+from api.hll import HyperLogLog
+from api.participation import CHAT, participation
+from api.vote_runtime import get_cached_vote_structure, iter_questions
+from workflow.jobs import submit_job, working_message
+from workflow.messages import MessageTemplate
+
+DAYS_RE = re.compile(r"^(\d+)d$")
+
+PARTICIPANTS_USAGE = "Usage: participants &lt;code&gt; [&lt;code&gt; ...] [&lt;days&gt;d]"
+PARTICIPANTS_HEADER = MessageTemplate("👥 Distinct respondents{period} (estimate, ±{error:.1f}%)")
+SURVEY_LINE = MessageTemplate("  {code}: ~{count}")
+SURVEY_ERROR_LINE = MessageTemplate("  {code}: {error}")
+TOTAL_LINE = MessageTemplate("  All {surveys} surveys together: ~{count}")
+CHAT_LINE = MessageTemplate("  Voted through this chat: ~{count}")
+
+
+def parse_participants_command(param):
+    """'<code> ... [7d]' -> ([codes], days or None); raises ValueError without codes"""
+    codes, days = [], None
+    for part in (param or "").split():
+        match = DAYS_RE.match(part)
+        if match:
+            days = int(match.group(1))
+        else:
+            codes.append(part)
+    if not codes:
+        raise ValueError("no survey code given")
+    return codes, days
+
+
+def participants_job(codes, days=None):
+    """Background job body for 'participants'"""
+    loaded, lines = [], []
+    for code in codes:
+        blocks = get_cached_vote_structure(code)
+        if not blocks:
+            lines.append(SURVEY_ERROR_LINE.render(code=code, error="cannot load survey"))
+            continue
+        try:
+            fetch_survey_tallies(code, blocks, list(iter_questions(blocks)))
+        except ValueError as e:
+            lines.append(SURVEY_ERROR_LINE.render(code=code, error=str(e)))
+            continue
+        loaded.append(code)
+
+    since = time.time() - days * 86400 if days else None
+    for code in loaded:
+        lines.append(SURVEY_LINE.render(code=code, count=participation.estimate([code], since=since)))
+    if len(loaded) > 1:
+        lines.append(TOTAL_LINE.render(surveys=len(loaded), count=participation.estimate(loaded, since=since)))
+    chat_voters = participation.estimate(loaded, since=since, source=CHAT) if loaded else 0
+    if chat_voters:
+        lines.append(CHAT_LINE.render(count=chat_voters))
+
+    header = PARTICIPANTS_HEADER.render(
+        period=f" in the last {days} days" if days else "",
+        error=HyperLogLog(participation.precision).standard_error() * 100
+    )
+    return [{"from": "VoteBot", "text": "\n".join([header, *lines])}]
+
+
+def handle_participants(param, messages):
+    """Count distinct respondents of one or more surveys in the background"""
+    try:
+        codes, days = parse_participants_command(param)
+    except ValueError:
+        messages.append({"from": "VoteBot", "text": PARTICIPANTS_USAGE, "error": True})
+        return jsonify(messages=messages)
+
+    job_id = submit_job(participants_job, codes, days)
+    messages.append(working_message(job_id, f"Counting respondents of {', '.join(codes)}."))
+    return jsonify(messages=messages)
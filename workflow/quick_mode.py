@@ -4,6 +4,45 @@ Quick mode survey creation workflow
 import re
 from flask import jsonify
 from api.create_survey import create_survey
+from workflow.messages import MessageTemplate
+
+QUICK_OVERVIEW = MessageTemplate(
+    "📋 <strong>Survey Overview</strong>\n\n"
+    "<strong>Creator Email:</strong> {email}\n"
+    "<strong>Title:</strong> {title}\n"
+    "<strong>Question:</strong> {question}\n"
+    "<strong>Type:</strong> {q_type}\n"
+    "{details!h}\n"
+    "{commands!h}"
+)
+QUICK_RANGE = MessageTemplate("<strong>Range:</strong> {min} to {max}\n")
+QUICK_OPTIONS = MessageTemplate("<strong>Options:</strong>\n{options!h}\n")
+OPTION_LINE = MessageTemplate("- {option}")
+QUICK_COMMANDS = (
+    "Type <strong>done</strong> to finalize.\n"
+    "Type <strong>edit title</strong>, <strong>edit question</strong>, or <strong>edit type</strong> to modify.\n"
+    "Type <strong>cancel</strong> to stop."
+)
+QUICK_OPTION_COMMANDS = (
+    "Type <strong>done</strong> to finalize.\n"
+    "Type <strong>edit title</strong>, <strong>edit question</strong>, <strong>edit type</strong>, or <strong>edit options</strong> to modify.\n"
+    "Type <strong>reset</strong> to start over or <strong>cancel</strong> to stop."
+)
+SURVEY_CREATED = MessageTemplate(
+    "✅ <strong>Survey created successfully!</strong>\n\n"
+    "📋 <strong>Survey Code:</strong> {code}\n\n"
+    "Type <strong>create</strong> to make another survey, "
+    "<strong>vote {code}</strong> to participate, or "
+    "<strong>result {code}</strong> to see results."
+)
+
+
+def render_quick_overview(temp, q_type, details="", commands=QUICK_COMMANDS):
+    """Render the quick mode overview shown before creating the survey"""
+    return QUICK_OVERVIEW.render(
+        email=temp["email"], title=temp["title"], question=temp["question"],
+        q_type=q_type, details=details, commands=commands
+    )
 
 
 def handle_quick_mode_selection(state, messages):
@@ -17,7 +56,7 @@ def handle_quick_email(text, state, messages):
     """Handle email input for quick mode"""
     email_pattern = r'^[a-zA-Z0-9._%+-]+@telekom\.(com|de)$'
     if not re.fullmatch(email_pattern, text.strip()):
-        messages.append({"from": "VoteBot", "text": "⚠️ Please enter a valid email address. Only @telekom.com or @telekom.de domains are allowed."})
+        messages.append({"from": "VoteBot", "text": "⚠️ Please enter a valid email address. Only @telekom.com or @telekom.de domains are allowed.", "error": True})
         return jsonify(messages=messages)
     
     state["temp"]["email"] = text.strip()
@@ -58,7 +97,7 @@ def handle_quick_type(text, state, messages):
     }
     
     if text.strip() not in type_map:
-        messages.append({"from": "VoteBot", "text": "Please select a valid option (1-4)"})
+        messages.append({"from": "VoteBot", "text": "Please select a valid option (1-4)", "error": True})
         return jsonify(messages=messages)
     
     state["temp"]["qtype"] = type_map[text.strip()]
@@ -73,20 +112,7 @@ def handle_quick_type(text, state, messages):
     elif state["temp"]["qtype"] == "TextQuestion":
         # TextQuestion has no config, go straight to preview
         state["step"] = "confirm_overview"
-        title = state["temp"]["title"]
-        question = state["temp"]["question"]
-        email = state["temp"]["email"]
-        
-        overview = (
-            "📋 <strong>Survey Overview</strong>\n\n"
-            f"<strong>Creator Email:</strong> {email}\n"
-            f"<strong>Title:</strong> {title}\n"
-            f"<strong>Question:</strong> {question}\n"
-            f"<strong>Type:</strong> Free Text\n\n"
-            "Type <strong>done</strong> to finalize.\n"
-            "Type <strong>edit title</strong>, <strong>edit question</strong>, or <strong>edit type</strong> to modify.\n"
-            "Type <strong>cancel</strong> to stop."
-        )
+        overview = render_quick_overview(state["temp"], "Free Text")
         messages.append({"from": "VoteBot", "text": overview})
     
     return jsonify(messages=messages)
@@ -100,7 +126,7 @@ def handle_quick_rating_min(text, state, messages):
         state["step"] = "ask_rating_max"
         messages.append({"from": "VoteBot", "text": "Maximum rating value? (e.g., 100)"})
     except ValueError:
-        messages.append({"from": "VoteBot", "text": "Please enter a valid number."})
+        messages.append({"from": "VoteBot", "text": "Please enter a valid number.", "error": True})
     return jsonify(messages=messages)
 
 
@@ -111,31 +137,19 @@ def handle_quick_rating_max(text, state, messages):
         min_val = state["temp"]["rating_min"]
         
         if max_val <= min_val:
-            messages.append({"from": "VoteBot", "text": f"⚠️ Maximum must be greater than minimum ({min_val})."})
+            messages.append({"from": "VoteBot", "text": f"⚠️ Maximum must be greater than minimum ({min_val}).", "error": True})
             return jsonify(messages=messages)
         
         state["temp"]["rating_max"] = max_val
         state["step"] = "confirm_overview"
         
         # Generate preview
-        title = state["temp"]["title"]
-        question = state["temp"]["question"]
-        email = state["temp"]["email"]
-        
-        overview = (
-            "📋 <strong>Survey Overview</strong>\n\n"
-            f"<strong>Creator Email:</strong> {email}\n"
-            f"<strong>Title:</strong> {title}\n"
-            f"<strong>Question:</strong> {question}\n"
-            f"<strong>Type:</strong> Rating Scale\n"
-            f"<strong>Range:</strong> {min_val} to {max_val}\n\n"
-            "Type <strong>done</strong> to finalize.\n"
-            "Type <strong>edit title</strong>, <strong>edit question</strong>, or <strong>edit type</strong> to modify.\n"
-            "Type <strong>cancel</strong> to stop."
+        overview = render_quick_overview(
+            state["temp"], "Rating Scale", details=QUICK_RANGE.render(min=min_val, max=max_val)
         )
         messages.append({"from": "VoteBot", "text": overview})
     except ValueError:
-        messages.append({"from": "VoteBot", "text": "Please enter a valid number."})
+        messages.append({"from": "VoteBot", "text": "Please enter a valid number.", "error": True})
     return jsonify(messages=messages)
 
 
@@ -145,22 +159,13 @@ def handle_quick_options(text, state, messages):
     state["temp"]["options"] = opts
     state["step"] = "confirm_overview"
 
-    title = state["temp"]["title"]
-    question = state["temp"]["question"]
-    email = state["temp"]["email"]
     qtype = "Single Choice" if state["temp"]["qtype"] == "ChoiceSingle" else "Multiple Choice"
-    options_text = "\n".join([f"- {o}" for o in opts])
-
-    overview = (
-        "📋 <strong>Survey Overview</strong>\n\n"
-        f"<strong>Creator Email:</strong> {email}\n"
-        f"<strong>Title:</strong> {title}\n"
-        f"<strong>Question:</strong> {question}\n"
-        f"<strong>Type:</strong> {qtype}\n"
-        f"<strong>Options:</strong>\n{options_text}\n\n"
-        "Type <strong>done</strong> to finalize.\n"
-        "Type <strong>edit title</strong>, <strong>edit question</strong>, <strong>edit type</strong>, or <strong>edit options</strong> to modify.\n"
-        "Type <strong>reset</strong> to start over or <strong>cancel</strong> to stop."
+    options_text = OPTION_LINE.render_each([{"option": o} for o in opts])
+
+    overview = render_quick_overview(
+        state["temp"], qtype,
+        details=QUICK_OPTIONS.render(options=options_text),
+        commands=QUICK_OPTION_COMMANDS
     )
 
     messages.append({"from": "VoteBot", "text": overview})
@@ -189,13 +194,7 @@ def handle_quick_confirmation(text, state, messages, room, ROOMS):
         ROOMS[room]["pending_create"] = None
         state["step"] = "main"  # Reset to main menu
 
-        messages.append({"from": "VoteBot", "text": (
-            f"✅ <strong>Survey created successfully!</strong>\n\n"
-            f"📋 <strong>Survey Code:</strong> {enter_code}\n\n"
-            "Type <strong>create</strong> to make another survey, "
-            "<strong>vote {enter_code}</strong> to participate, or "
-            "<strong>result {enter_code}</strong> to see results."
-        )})
+        messages.append({"from": "VoteBot", "text": SURVEY_CREATED.render(code=enter_code)})
         return jsonify(messages=messages)
 
     elif cmd.startswith("edit "):
@@ -213,7 +212,7 @@ def handle_quick_confirmation(text, state, messages, room, ROOMS):
             state["step"] = "ask_options"
             messages.append({"from": "VoteBot", "text": "Enter new options separated by commas:"})
         else:
-            messages.append({"from": "VoteBot", "text": "Invalid edit command. Use: edit title, edit question, edit type, or edit options."})
+            messages.append({"from": "VoteBot", "text": "Invalid edit command. Use: edit title, edit question, edit type, or edit options.", "error": True})
         return jsonify(messages=messages)
 
     elif cmd == "cancel":
@@ -0,0 +1,90 @@
+"""
+Vote time series chat command
+    timeline <code> [minute|hour|day]
+Shows answers per bucket (most recent buckets) and how the option shares
+of every choice question moved from the first bucket to the latest.
+"""
+from datetime import datetime, timezone
+
+from flask import jsonify
+
+from api.timeline import BUCKETS
+from api.timeseries import survey_timeseries
+from workflow.jobs import submit_job, working_message
+from workflow.messages import MessageTemplate
+
+CHAT_BUCKETS = 12  # most recent buckets listed in chat
+BAR_WIDTH = 20
+TIME_FORMATS = {"minute": "%Y-%m-%d %H:%M", "hour": "%Y-%m-%d %H:%M", "day": "%Y-%m-%d"}
+
+TIMELINE_USAGE = "Usage: timeline &lt;code&gt; [minute|hour|day]"
+TIMELINE_HEADER = MessageTemplate("📈 Answers per {bucket} for survey {code} (UTC)")
+BUCKET_LINE = MessageTemplate("  {start}  {bar} {count} (total {cumulative})")
+EARLIER_LINE = MessageTemplate("  … {hidden} earlier {bucket}s")
+NO_ANSWERS = "  No timestamped answers yet."
+SHARES_HEADER = MessageTemplate("\n{text}")
+SHARE_LINE = MessageTemplate("  {label}: {first:.0%} → {last:.0%}")
+
+
+def parse_timeline_command(param):
+    """'<code> [minute|hour|day]' -> (code, bucket); raises ValueError when malformed"""
+    parts = (param or "").split()
+    if not 1 <= len(parts) <= 2:
+        raise ValueError("expected a survey code and an optional bucket")
+    bucket = parts[1] if len(parts) == 2 else "hour"
+    if bucket not in BUCKETS:
+        raise ValueError(f"unknown bucket {bucket}")
+    return parts[0], bucket
+
+
+def render_timeline(doc):
+    """Chat text for a survey_timeseries() document"""
+    bucket = doc["bucket"]
+    lines = [TIMELINE_HEADER.render(bucket=bucket, code=doc["survey"])]
+    answers = doc["answers"]
+    if not answers:
+        lines.append(NO_ANSWERS)
+    if len(answers) > CHAT_BUCKETS:
+        lines.append(EARLIER_LINE.render(hidden=len(answers) - CHAT_BUCKETS, bucket=bucket))
+    shown = answers[-CHAT_BUCKETS:]
+    peak = max((row["count"] for row in shown), default=0)
+    for row in shown:
+        lines.append(BUCKET_LINE.render(
+            start=datetime.fromtimestamp(row["start"], timezone.utc).strftime(TIME_FORMATS[bucket]),
+            bar="▇" * max(1, round(BAR_WIDTH * row["count"] / peak)),
+            count=row["count"],
+            cumulative=row["cumulative"],
+        ))
+
+    for series in doc["questions"]:
+        buckets = series["buckets"]
+        if not series["labels"] or len(buckets) < 2:
+            continue
+        lines.append(SHARES_HEADER.render(text=series["text"]))
+        for i, label in enumerate(series["labels"]):
+            lines.append(SHARE_LINE.render(
+                label=label, first=buckets[0]["shares"][i], last=buckets[-1]["shares"][i]
+            ))
+    return "\n".join(lines)
+
+
+def timeline_job(code, bucket):
+    """Background job body for 'timeline'"""
+    try:
+        doc = survey_timeseries(code, bucket)
+    except ValueError as e:
+        return [{"from": "VoteBot", "text": MessageTemplate("⚠️ {error}").render(error=str(e)), "error": True}]
+    return [{"from": "VoteBot", "text": render_timeline(doc)}]
+
+
+def handle_timeline(param, messages):
+    """Bucket a survey's answers over time in the background"""
+    try:
+        code, bucket = parse_timeline_command(param)
+    except ValueError:
+        messages.append({"from": "VoteBot", "text": TIMELINE_USAGE, "error": True})
+        return jsonify(messages=messages)
+
+    job_id = submit_job(timeline_job, code, bucket)
+    messages.append(working_message(job_id, f"Bucketing the answers of {code} per {bucket}."))
+    return jsonify(messages=messages)